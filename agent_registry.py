@@ -1,39 +1,88 @@
+import importlib
 import logging
+import sys
+import threading
+import time
+from typing import Callable, Dict, NamedTuple
 import streamlit as st
 import multipage_streamlit as mt
-import yaml
-from intro import introduction
-from playground import chat_bot
-from playground import image_inference
-from playground import local_rag
-from playground import document_inference
-from playground import audio_inference
-from skills import cran_generation, reply_engine, cran_business_loan
-from skills import cheque_inference
-from skills import quiz_generator, quizbot
-from skills import audio_summarisation
-from skills import feedback_classification
-from skills import ppt_to_doc
-from skills import label_scanner, marketing, compliance_checklist, stock_statements_agri, stock_statements_consumer
-from skills import audio_summarisation_nodal
-from skills.v2.reply_engine import reply_engine as reply_enginev2
-from skills.v2.compliance_checklist import handler as compliance_checklist_v2_handler
-from sura import app as sura_app
-# from skills.aura.ui import brief_generator
+from utils.feature_config import FeatureConfig, get_feature_config_service
+
+logger = logging.getLogger(__name__)
+
+
+class SkillSpec(NamedTuple):
+    """A page in the registry; its module is imported only when the page is opened"""
+    title: str
+    module: str
+    entry: str = "run"
+    gated: bool = True  # subject to feature_config.yml
+
+
+# Declaring a page here imports nothing; see _lazy_page
+SKILL_MANIFEST = [
+    SkillSpec("Introduction", "intro.introduction", gated=False),
+    SkillSpec("Playground > Chat Bot", "playground.chat_bot", gated=False),
+    SkillSpec("Playground > Document Inference", "playground.document_inference", gated=False),
+    SkillSpec("Playground > Image Inference", "playground.image_inference", gated=False),
+    SkillSpec("Playground > Audio Inference", "playground.audio_inference", gated=False),
+    SkillSpec("Playground > Document QnA (RAG)", "playground.local_rag", gated=False),
+    SkillSpec("Skill > Cheque Inference", "skills.cheque_inference"),
+    SkillSpec("Skill > Reply Engine(GRD)", "skills.reply_engine"),
+    SkillSpec("Skill > Nodal: Meeting Minutes", "skills.audio_summarisation_nodal"),
+    SkillSpec("Skill > Business Loan CRAN [Sample]", "skills.cran_business_loan"),
+    SkillSpec("Skill > CIBIL Analyser [Sample]", "skills.cran_generation"),
+    SkillSpec("Skill > Quiz Generator!", "skills.quiz_generator"),
+    SkillSpec("Skill > QuizzBot!", "skills.quizbot"),
+    SkillSpec("Skill > Audio: Meeting Minutes", "skills.audio_summarisation"),
+    SkillSpec("Skill > Feedback Classification", "skills.feedback_classification"),
+    SkillSpec("Skill > PPT to Doc", "skills.ppt_to_doc"),
+    SkillSpec("Skill > Labels Scanner [Sample]", "skills.label_scanner"),
+    SkillSpec("Skill > Marketing Pitch [Sample]", "skills.marketing"),
+    SkillSpec("Skill > Compliance", "skills.compliance_checklist"),
+    SkillSpec("Skill > Stocks_statements_Agri", "skills.stock_statements_agri"),
+    SkillSpec("Skill > Stocks_statements_Consumer", "skills.stock_statements_consumer"),
+    SkillSpec("Skill > Reply Engine V2 [Experimental]", "skills.v2.reply_engine.reply_engine"),
+    SkillSpec("Skill > Compliance Checklist V2 [Experimental]", "skills.v2.compliance_checklist.handler"),
+]
+
+# module -> seconds its first import took in this process
+_import_timings: Dict[str, float] = {}
+_import_lock = threading.Lock()
+
+
+def load_skill(spec):
+    """Import a skill's module (once per process) and return its entry function"""
+    if spec.module not in sys.modules:
+        with _import_lock:
+            if spec.module not in sys.modules:
+                start = time.perf_counter()
+                importlib.import_module(spec.module)
+                elapsed = time.perf_counter() - start
+                _import_timings[spec.module] = elapsed
+                logger.info("Imported %s for '%s' in %.0f ms", spec.module, spec.title, elapsed * 1000)
+    return getattr(sys.modules[spec.module], spec.entry)
+
+
+def get_import_timings():
+    """Seconds taken by each skill module's first import, slowest first"""
+    with _import_lock:
+        return dict(sorted(_import_timings.items(), key=lambda item: item[1], reverse=True))
+
+
+def _lazy_page(spec) -> Callable[[], None]:
+    def run_page():
+        load_skill(spec)()
+    run_page.__name__ = spec.module.rsplit(".", 1)[-1]
+    return run_page
 
 
 def load_feature_config():
-    """Load feature management configuration from YAML file"""
-    try:
-        with open('feature_config.yml', 'r') as file:
-            config = yaml.safe_load(file)
-            return config.get('feature_management', {}).get('agents', {})
-    except FileNotFoundError:
-        st.warning("Feature configuration file not found. All features will be available.")
-        return {}
-    except yaml.YAMLError as e:
-        st.error(f"Error parsing feature configuration: {e}")
-        return {}
+    """Return the feature management configuration, re-parsed only when the YAML file changes"""
+    config = get_feature_config_service().get()
+    if config.error:
+        st.warning(config.error)
+    return config
 
 
 def get_current_user():
@@ -51,14 +100,10 @@ def get_current_user():
 
 def is_feature_available_for_user(feature_name, user_id, feature_config):
     """Check if a feature is available for the current user"""
-    if not feature_config:
-        return True  # If no config, all features are available
-    
-    # Check if the feature exists in config and user has access
-    if feature_name in feature_config:
-        return user_id in feature_config[feature_name]
-    
-    return True  # If feature not in config, it's available to all
+    if not isinstance(feature_config, FeatureConfig):
+        # A plain {skill: [users]} mapping, as returned by earlier versions
+        feature_config = FeatureConfig(feature_config or {})
+    return feature_config.is_available(feature_name, user_id)
 
 
 def main():
@@ -77,40 +122,11 @@ def register_skills():
     # Display current user in sidebar
     st.sidebar.markdown(f"**Current User:** {current_user}")
     
-    # Always add introduction
-    app.add(title="Introduction", introduction.run)
-    
-    # Add playground features (always available)
-    app.add(title="Playground > Chat Bot", chat_bot.run)
-    app.add(title="Playground > Document Inference", document_inference.run)
-    app.add(title="Playground > Image Inference", image_inference.run)
-    app.add(title="Playground > Audio Inference", audio_inference.run)
-    app.add(title="Playground > Document QnA (RAG)", local_rag.run)
-    
-    # Add skills with feature management
-    skill_mappings = [
-        ("Skill > Cheque Inference", cheque_inference.run),
-        ("Skill > Reply Engine(GRD)", reply_engine.run),
-        ("Skill > Nodal: Meeting Minutes", audio_summarisation_nodal.run),
-        ("Skill > Business Loan CRAN [Sample]", cran_business_loan.run),
-        ("Skill > CIBIL Analyser [Sample]", cran_generation.run),
-        ("Skill > Quiz Generator!", quiz_generator.run),
-        ("Skill > QuizzBot!", quizbot.run),
-        ("Skill > Audio: Meeting Minutes", audio_summarisation.run),
-        ("Skill > Feedback Classification", feedback_classification.run),
-        ("Skill > PPT to Doc", ppt_to_doc.run),
-        ("Skill > Labels Scanner [Sample]", label_scanner.run),
-        ("Skill > Marketing Pitch [Sample]", marketing.run),
-        ("Skill > Compliance", compliance_checklist.run),
-        ("Skill > Stocks_statements_Agri", stock_statements_agri.run),
-        ("Skill > Stocks_statements_Consumer", stock_statements_consumer.run),
-        ("Skill > Reply Engine V2 [Experimental]", reply_enginev2.run),
-        ("Skill > Compliance Checklist V2 [Experimental]", compliance_checklist_v2_handler.run),
-    ]
-    
-    for skill_title, skill_function in skill_mappings:
-        if is_feature_available_for_user(skill_title, current_user, feature_config):
-            app.add(title=skill_title, func=skill_function)
+    # Pages are added as lazy wrappers: only the selected page's module gets imported
+    allowed = feature_config.skills_for(current_user)
+    for spec in SKILL_MANIFEST:
+        if not spec.gated or feature_config.is_available(spec.title, current_user, allowed):
+            app.add(title=spec.title, func=_lazy_page(spec))
     
     app.run_selectbox()
 
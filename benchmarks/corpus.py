@@ -0,0 +1,227 @@
+"""Deterministic synthetic research files for the benchmarks.
+
+Every generator is pure Python (plus openpyxl for XLSX), so corpora can be
+built on a machine with no network and are byte-identical between runs.
+"""
+from __future__ import annotations
+from typing import Dict, List, Sequence
+from xml.sax.saxutils import escape
+import csv
+import io
+import os
+import random
+import zipfile
+
+try:
+	import openpyxl
+except Exception:
+	openpyxl = None
+
+SIZES: Dict[str, Dict[str, int]] = {
+	"small": {"pdf_pages": 5, "docx_paragraphs": 200, "csv_rows": 2_000, "xlsx_rows": 1_000, "text_words": 2_000},
+	"medium": {"pdf_pages": 50, "docx_paragraphs": 2_000, "csv_rows": 100_000, "xlsx_rows": 20_000, "text_words": 20_000},
+	"large": {"pdf_pages": 300, "docx_paragraphs": 20_000, "csv_rows": 1_000_000, "xlsx_rows": 100_000, "text_words": 200_000},
+}
+FORMATS = ("txt", "pdf", "docx", "csv", "xlsx")
+
+_WORDS = (
+	"market", "consumer", "brand", "awareness", "segment", "growth", "survey", "respondents",
+	"premium", "price", "loyalty", "channel", "digital", "retail", "category", "share",
+	"millennials", "households", "purchase", "intent", "trend", "quarter", "region", "spend",
+	"campaign", "engagement", "conversion", "sustainability", "convenience", "quality",
+)
+_REGIONS = ("North", "South", "East", "West", "Central", "Coastal", "Metro", "Rural")
+_CHANNELS = tuple(f"channel_{i:02d}" for i in range(20))
+
+
+def _sentences(rng: random.Random, words: int) -> List[str]:
+	sentences = []
+	while words > 0:
+		length = min(words, rng.randint(8, 20))
+		sentence = " ".join(rng.choice(_WORDS) for _ in range(length))
+		sentences.append(sentence.capitalize() + ".")
+		words -= length
+	return sentences
+
+
+def make_text(words: int, seed: int = 0) -> bytes:
+	rng = random.Random(seed)
+	sentences = _sentences(rng, words)
+	paragraphs = [" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+	return "\n\n".join(paragraphs).encode("utf-8")
+
+
+def make_pdf(pages: int, lines_per_page: int = 45, seed: int = 0) -> bytes:
+	"""A minimal text PDF (Helvetica, one content stream per page)."""
+	rng = random.Random(seed)
+	objects: List[bytes] = [
+		b"<< /Type /Catalog /Pages 2 0 R >>",
+		b"",  # page tree, filled in once the page object numbers are known
+		b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+	]
+	kids = []
+	for _ in range(pages):
+		lines = [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 12))) for _ in range(lines_per_page)]
+		body = " T* ".join(f"({_pdf_escape(line)}) Tj" for line in lines)
+		stream = f"BT /F1 10 Tf 50 760 Td 15 TL {body} ET".encode("latin-1")
+		page_number = len(objects) + 1
+		kids.append(f"{page_number} 0 R")
+		objects.append(
+			f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+			f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_number + 1} 0 R >>".encode("latin-1")
+		)
+		objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+	objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode("latin-1")
+
+	out = io.BytesIO()
+	out.write(b"%PDF-1.4\n")
+	offsets = []
+	for number, body in enumerate(objects, 1):
+		offsets.append(out.tell())
+		out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+	xref = out.tell()
+	out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+	for offset in offsets:
+		out.write(b"%010d 00000 n \n" % offset)
+	out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+	return out.getvalue()
+
+
+def _pdf_escape(text: str) -> str:
+	return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_docx(paragraphs: int, seed: int = 0, table_every: int = 50) -> bytes:
+	"""A minimal WordprocessingML package with paragraphs and an occasional table."""
+	rng = random.Random(seed)
+	body = []
+	for i in range(paragraphs):
+		body.append(docx_paragraph(" ".join(_sentences(rng, rng.randint(20, 60)))))
+		if table_every and i % table_every == table_every - 1:
+			rows = []
+			for _ in range(4):
+				cells = "".join(
+					f"<w:tc><w:p><w:r><w:t>{escape(rng.choice(_WORDS))} {rng.randint(1, 999)}</w:t></w:r></w:p></w:tc>"
+					for _ in range(3)
+				)
+				rows.append(f"<w:tr>{cells}</w:tr>")
+			body.append(f"<w:tbl>{''.join(rows)}</w:tbl>")
+	return build_docx(body)
+
+
+_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_MC = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+
+
+def docx_paragraph(text: str) -> str:
+	return f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def build_docx(body: Sequence[str], headers: Sequence[Sequence[str]] = (), footers: Sequence[Sequence[str]] = ()) -> bytes:
+	"""A WordprocessingML package from raw body blocks (w:p, w:tbl, ...), with optional header and footer parts."""
+	namespaces = f'xmlns:w="{_W}"'
+	if any("<mc:" in block for blocks in (body, *headers, *footers) for block in blocks):
+		namespaces += f' xmlns:mc="{_MC}"'
+	document = (
+		'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+		f'<w:document {namespaces}><w:body>{"".join(body)}<w:sectPr/></w:body></w:document>'
+	)
+	parts = {"word/document.xml": document}
+	for kind, tag, blocks_per_part in (("header", "hdr", headers), ("footer", "ftr", footers)):
+		for i, blocks in enumerate(blocks_per_part, 1):
+			parts[f"word/{kind}{i}.xml"] = (
+				'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+				f'<w:{tag} {namespaces}>{"".join(blocks)}</w:{tag}>'
+			)
+	overrides = "".join(
+		f'<Override PartName="/{name}" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.'
+		f'{"document.main" if name == "word/document.xml" else name[5:11]}+xml"/>'
+		for name in parts
+	)
+	content_types = (
+		'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+		'<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+		'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+		'<Default Extension="xml" ContentType="application/xml"/>'
+		f'{overrides}</Types>'
+	)
+	rels = (
+		'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+		'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+		'<Relationship Id="rId1" '
+		'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+		'Target="word/document.xml"/></Relationships>'
+	)
+	out = io.BytesIO()
+	with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as package:
+		package.writestr("[Content_Types].xml", content_types)
+		package.writestr("_rels/.rels", rels)
+		for name, xml in parts.items():
+			package.writestr(name, xml)
+	return out.getvalue()
+
+
+def _table_rows(rows: int, seed: int):
+	rng = random.Random(seed)
+	for i in range(rows):
+		yield (
+			i + 1,
+			rng.choice(_REGIONS),
+			rng.choice(_CHANNELS),
+			round(rng.lognormvariate(6, 1), 2),
+			rng.randint(0, 50_000),
+			f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+			" ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 6))),
+		)
+
+
+_TABLE_HEADER = ("id", "region", "channel", "spend", "clicks", "date", "note")
+
+
+def make_csv(rows: int, seed: int = 0) -> bytes:
+	out = io.StringIO()
+	writer = csv.writer(out)
+	writer.writerow(_TABLE_HEADER)
+	writer.writerows(_table_rows(rows, seed))
+	return out.getvalue().encode("utf-8")
+
+
+def make_xlsx(rows: int, seed: int = 0, sheets: int = 2) -> bytes:
+	if not openpyxl:
+		raise RuntimeError("openpyxl is not installed")
+	workbook = openpyxl.Workbook(write_only=True)
+	for sheet in range(sheets):
+		worksheet = workbook.create_sheet(f"Sheet{sheet + 1}")
+		worksheet.append(_TABLE_HEADER)
+		for row in _table_rows(rows // sheets, seed + sheet):
+			worksheet.append(row)
+	out = io.BytesIO()
+	workbook.save(out)
+	return out.getvalue()
+
+
+def corpus_path(corpus_dir: str, fmt: str, size: str) -> str:
+	return os.path.join(corpus_dir, f"research.{size}.{fmt}")
+
+
+def build_corpus(corpus_dir: str, sizes: List[str]) -> Dict[str, str]:
+	"""Write (or reuse) one file per format and size; returns {"<fmt>.<size>": path}."""
+	os.makedirs(corpus_dir, exist_ok=True)
+	makers = {
+		"txt": lambda spec: make_text(spec["text_words"]),
+		"pdf": lambda spec: make_pdf(spec["pdf_pages"]),
+		"docx": lambda spec: make_docx(spec["docx_paragraphs"]),
+		"csv": lambda spec: make_csv(spec["csv_rows"]),
+		"xlsx": lambda spec: make_xlsx(spec["xlsx_rows"]),
+	}
+	paths = {}
+	for size in sizes:
+		for fmt in FORMATS:
+			path = corpus_path(corpus_dir, fmt, size)
+			if not os.path.exists(path):
+				tmp = path + ".tmp"
+				with open(tmp, "wb") as f:
+					f.write(makers[fmt](SIZES[size]))
+				os.replace(tmp, path)
+			paths[f"{fmt}.{size}"] = path
+	return paths
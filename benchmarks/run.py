@@ -0,0 +1,301 @@
+"""Offline end-to-end benchmarks.
+
+Times every load_file_to_text path on synthetic corpora and runs BriefService
+and MediaService against the deterministic stub model, so no network or API
+key is needed. Each case runs in its own subprocess so its peak RSS is not
+inflated by earlier cases.
+
+	python -m benchmarks.run --sizes small medium -o before.json
+	python -m benchmarks.run --sizes small medium -o after.json --compare before.json
+"""
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import FORMATS, SIZES, build_corpus
+
+# Bump when the corpus generators change so stale files are not reused
+CORPUS_VERSION = 1
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), f"aura_bench_corpus_v{CORPUS_VERSION}")
+DEFAULT_OUTPUT = "bench_results.json"
+# Slowdown (percent, on p50 latency) reported as a regression by --compare
+DEFAULT_REGRESSION_THRESHOLD = 10.0
+
+OBJECTIVES = "Grow awareness of the brand among 18-34 year olds in urban regions and lift trial by 15%."
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def list_cases(sizes: List[str]) -> List[str]:
+	cases = []
+	for size in sizes:
+		cases += [f"load.{fmt}.{size}" for fmt in FORMATS]
+		cases.append(f"ingest.parallel.{size}")
+		cases += [f"brief.generate.{size}", f"brief.stream.{size}"]
+	cases += ["media_plan.generate", "media_plan.stream"]
+	return cases
+
+
+def _stub_env(latency: float, output_tokens: int) -> Dict[str, str]:
+	"""Environment for a case process: stub model, no rate limiting, no trace export."""
+	env = dict(os.environ)
+	env.update(
+		LLM_BACKEND="stub",
+		STUB_LATENCY_SECONDS=str(latency),
+		STUB_OUTPUT_TOKENS=str(output_tokens),
+		RATE_LIMIT_MAX_RATE="1000000",
+		RATE_LIMIT_TOKENS_PER_MINUTE="1000000000",
+	)
+	env.pop("TRACE_EXPORT_PATH", None)
+	return env
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+	ordered = sorted(samples)
+	rank = (len(ordered) - 1) * pct / 100
+	low = int(rank)
+	high = min(low + 1, len(ordered) - 1)
+	return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _peak_rss_mb() -> float:
+	"""Peak RSS of this process and of its largest finished child (the ingest pool workers)."""
+	scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+	peak = max(
+		resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+		resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+	)
+	return peak * scale / (1024 * 1024)
+
+
+def _summarise(samples: List[float], units: float, unit_name: str, payload_bytes: int) -> dict:
+	total = sum(samples)
+	result = {
+		"iterations": len(samples),
+		"mean_ms": total / len(samples) * 1000,
+		"p50_ms": _percentile(samples, 50) * 1000,
+		"p95_ms": _percentile(samples, 95) * 1000,
+		"p99_ms": _percentile(samples, 99) * 1000,
+		"throughput": units * len(samples) / total if total else 0.0,
+		"throughput_unit": unit_name,
+		"peak_rss_mb": _peak_rss_mb(),
+	}
+	if payload_bytes:
+		result["mb_per_second"] = payload_bytes * len(samples) / total / 1e6 if total else 0.0
+	return result
+
+
+def _time(fn: Callable[[], object], repeat: int, warmup: int) -> List[float]:
+	for _ in range(warmup):
+		fn()
+	samples = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		samples.append(time.perf_counter() - start)
+	return samples
+
+
+async def _time_async(fn, repeat: int, warmup: int) -> List[float]:
+	# One event loop for every iteration: the shared limiter and clients are bound to it
+	for _ in range(warmup):
+		await fn()
+	samples = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		await fn()
+		samples.append(time.perf_counter() - start)
+	return samples
+
+
+def _read(path: str) -> bytes:
+	with open(path, "rb") as f:
+		return f.read()
+
+
+def _run_case(case: str, corpus_dir: str, repeat: int, warmup: int) -> dict:
+	"""Run one case in this process. Only called in a case subprocess."""
+	import asyncio
+
+	parts = case.split(".")
+	if parts[0] == "load":
+		from utils.file_loader import load_file_to_text
+		_, fmt, size = parts
+		path = build_corpus(corpus_dir, [size])[f"{fmt}.{size}"]
+		data = _read(path)
+		name = os.path.basename(path)
+		samples = _time(lambda: load_file_to_text(name, data, use_cache=False), repeat, warmup)
+		return _summarise(samples, 1, "files/s", len(data))
+
+	if parts[0] == "ingest":
+		from utils.file_loader import load_files_to_text
+		size = parts[2]
+		files = [(os.path.basename(path), _read(path)) for path in build_corpus(corpus_dir, [size]).values()]
+		samples = _time(lambda: load_files_to_text(files, use_cache=False), repeat, warmup)
+		return _summarise(samples, len(files), "files/s", sum(len(data) for _, data in files))
+
+	if parts[0] == "brief":
+		from services.brief_service import BriefService
+		_, mode, size = parts
+		research = _read(build_corpus(corpus_dir, [size])[f"txt.{size}"]).decode("utf-8")
+		service = BriefService()
+
+		async def generate():
+			return await service.generate_brief(research, OBJECTIVES, use_cache=False)
+
+		async def stream():
+			async for _ in service.stream_brief(research, OBJECTIVES, use_cache=False):
+				pass
+
+		samples = asyncio.run(_time_async(generate if mode == "generate" else stream, repeat, warmup))
+		return _summarise(samples, 1, "briefs/s", len(research.encode("utf-8")))
+
+	if parts[0] == "media_plan":
+		from services.brief_service import BriefService
+		from services.media_service import MediaService
+		mode = parts[1]
+		research = _read(build_corpus(corpus_dir, ["small"])["txt.small"]).decode("utf-8")
+		service = MediaService()
+
+		async def run() -> List[float]:
+			brief = await BriefService().generate_brief(research, OBJECTIVES, use_cache=False)
+
+			async def generate():
+				return await service.generate_media_plan(brief, use_cache=False)
+
+			async def stream():
+				async for _ in service.stream_media_plan(brief, use_cache=False):
+					pass
+
+			return await _time_async(generate if mode == "generate" else stream, repeat, warmup)
+
+		return _summarise(asyncio.run(run()), 1, "plans/s", 0)
+
+	raise ValueError(f"Unknown benchmark case: {case}")
+
+
+def _spawn_case(case: str, args: argparse.Namespace) -> dict:
+	command = [
+		sys.executable, "-m", "benchmarks.run",
+		"--case", case,
+		"--corpus-dir", args.corpus_dir,
+		"--repeat", str(args.repeat),
+		"--warmup", str(args.warmup),
+	]
+	proc = subprocess.run(
+		command,
+		cwd=_ROOT,
+		env=_stub_env(args.stub_latency, args.stub_output_tokens),
+		capture_output=True,
+		text=True,
+	)
+	if proc.returncode != 0:
+		return {"error": (proc.stderr.strip().splitlines() or [f"exit status {proc.returncode}"])[-1]}
+	return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _git_commit() -> Optional[str]:
+	try:
+		proc = subprocess.run(["git", "rev-parse", "HEAD"], cwd=_ROOT, capture_output=True, text=True, timeout=10)
+	except Exception:
+		return None
+	return proc.stdout.strip() or None
+
+
+def _meta(args: argparse.Namespace) -> dict:
+	return {
+		"commit": _git_commit(),
+		"created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"cpu_count": os.cpu_count(),
+		"repeat": args.repeat,
+		"warmup": args.warmup,
+		"stub_latency_seconds": args.stub_latency,
+		"stub_output_tokens": args.stub_output_tokens,
+	}
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+	"""Print p50, p95, throughput and RSS changes against a baseline; return the regressed cases."""
+	regressions = []
+	print(f"\n{'case':<28} {'p50 ms':>18} {'p95 ms':>18} {'throughput':>14} {'rss MB':>14}")
+	for case, result in results.items():
+		before = baseline.get(case)
+		if not before or "error" in before or "error" in result:
+			continue
+
+		def delta(key: str) -> float:
+			return (result[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+
+		slower = delta("p50_ms")
+		flag = "  REGRESSION" if slower > threshold else ""
+		if flag:
+			regressions.append(case)
+		print(
+			f"{case:<28} {result['p50_ms']:>9.1f} ({slower:+6.1f}%) {result['p95_ms']:>9.1f} ({delta('p95_ms'):+6.1f}%)"
+			f" {delta('throughput'):+13.1f}% {delta('peak_rss_mb'):+13.1f}%{flag}"
+		)
+	return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = argparse.ArgumentParser(description="Offline ingest and LLM-pipeline benchmarks against the stub model.")
+	parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+	parser.add_argument("--cases", nargs="+", help="only run cases starting with one of these prefixes")
+	parser.add_argument("--repeat", type=int, default=5, help="timed iterations per case")
+	parser.add_argument("--warmup", type=int, default=1, help="untimed iterations per case")
+	parser.add_argument("--stub-latency", type=float, default=0.05, help="seconds the stub model waits per call")
+	parser.add_argument("--stub-output-tokens", type=int, default=0, help="stub reply size in tokens (0 = sized to the schema)")
+	parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR)
+	parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="results JSON file")
+	parser.add_argument("--compare", metavar="BASELINE", help="results JSON from an earlier run to compare against")
+	parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD, help="p50 slowdown percent counted as a regression")
+	parser.add_argument("--case", help=argparse.SUPPRESS)
+	args = parser.parse_args(argv)
+
+	if args.case:
+		# Case subprocess: print one JSON line for the parent
+		print(json.dumps(_run_case(args.case, args.corpus_dir, args.repeat, args.warmup)))
+		return 0
+
+	print(f"Building corpus in {args.corpus_dir} ...", file=sys.stderr)
+	build_corpus(args.corpus_dir, args.sizes if "small" in args.sizes else ["small"] + args.sizes)
+	cases = list_cases(args.sizes)
+	if args.cases:
+		cases = [case for case in cases if case.startswith(tuple(args.cases))]
+
+	results: Dict[str, dict] = {}
+	for case in cases:
+		result = results[case] = _spawn_case(case, args)
+		if "error" in result:
+			print(f"{case:<28} ERROR {result['error']}")
+			continue
+		rate = f"{result['mb_per_second']:8.2f} MB/s" if "mb_per_second" in result else " " * 13
+		print(
+			f"{case:<28} p50 {result['p50_ms']:9.1f} ms  p95 {result['p95_ms']:9.1f} ms  p99 {result['p99_ms']:9.1f} ms"
+			f"  {result['throughput']:8.2f} {result['throughput_unit']:<9} {rate}  rss {result['peak_rss_mb']:7.1f} MB"
+		)
+
+	with open(args.output, "w", encoding="utf-8") as f:
+		json.dump({"meta": _meta(args), "results": results}, f, indent=2)
+	print(f"\nWrote {args.output}", file=sys.stderr)
+
+	status = 1 if any("error" in result for result in results.values()) else 0
+	if args.compare:
+		with open(args.compare, encoding="utf-8") as f:
+			baseline = json.load(f)
+		if compare(results, baseline["results"], args.threshold):
+			status = 1
+	return status
+
+
+if __name__ == "__main__":
+	sys.exit(main())
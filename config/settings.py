@@ -1,5 +1,6 @@
 from utils.token_cost import get_token_costs
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -9,12 +10,123 @@ load_dotenv()
 MODEL = "gpt-4-turbo"  # Change this to "gpt-4" or "gpt-3.5-turbo" as needed
 INPUT_COST, OUTPUT_COST = get_token_costs(MODEL)
 
+# Model routing: the first rule whose kind ("brief", "media_plan") and input-token limit match
+# the request picks its model; requests no rule matches use MODEL
+MODEL_ROUTING_ENABLED = True
+MODEL_ROUTING_RULES = [
+	{"kind": "brief", "max_input_tokens": 6_000, "model": "gpt-4o-mini"},
+	{"kind": "media_plan", "max_input_tokens": 2_000, "model": "gpt-4o-mini"},
+]
+# Weakest to strongest; a response that fails to parse is retried on the next model up
+MODEL_FALLBACK_CASCADE = ["gpt-4o-mini", "gpt-4-turbo"]
+# Before escalating, a reply that fails to parse is repaired on the same model with a
+# follow-up call asking only for the fields that were missing, invalid or cut off
+STRUCTURED_REPAIR_ENABLED = True
+
 # Rate limiter configuration
-RATE_LIMIT_MAX_RATE = 50
+RATE_LIMIT_MAX_RATE = int(os.getenv("RATE_LIMIT_MAX_RATE", "50"))
 RATE_LIMIT_TIME_PERIOD = 60
+RATE_LIMIT_TOKENS_PER_MINUTE = int(os.getenv("RATE_LIMIT_TOKENS_PER_MINUTE", "150000"))  # prompt + completion tokens across all calls in the process
 
 # OpenAI configuration
 OPENAI_API_KEY = ""
 OPENAI_TEMPERATURE = 0
 OPENAI_TOP_P = 0
 OPENAI_MAX_TOKENS = 4096
+OPENAI_API_BASE = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+
+# LLM backend: "openai", or "stub" for a deterministic local model that needs no API key
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+STUB_LATENCY_SECONDS = float(os.getenv("STUB_LATENCY_SECONDS", "0.05"))
+STUB_OUTPUT_TOKENS = int(os.getenv("STUB_OUTPUT_TOKENS", "0"))  # 0 = size replies to the requested schema
+
+# Shared HTTP connection pool for LLM calls
+LLM_MAX_CONNECTIONS = 50
+LLM_MAX_KEEPALIVE_CONNECTIONS = 20
+LLM_KEEPALIVE_EXPIRY = 120  # seconds
+LLM_PREWARM_CONNECTIONS = True
+
+# Background worker configuration
+WORKER_MAX_CONCURRENT_JOBS = 8
+JOB_RESULT_TTL_SECONDS = 60 * 60
+JOB_POLL_INTERVAL_SECONDS = 0.5
+
+# Streaming configuration: render briefs and media plans field by field as they arrive
+STREAMING_ENABLED = True
+STREAM_PARSE_INTERVAL_SECONDS = 0.1
+
+# Pipeline mode: start the media plan in the background as soon as the brief is parsed
+PIPELINE_SPECULATIVE_MEDIA_PLAN = False
+
+# Tracing: timing spans are kept in an in-process ring buffer and optionally
+# appended to TRACE_EXPORT_PATH as OTLP/JSON lines
+TRACING_ENABLED = True
+TRACE_BUFFER_SIZE = 10_000
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH") or None
+
+# Extraction cache configuration
+EXTRACTION_CACHE_ENABLED = True
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", os.path.join(tempfile.gettempdir(), "aura_extraction_cache"))
+EXTRACTION_CACHE_MEMORY_MAX_BYTES = 256 * 1024 * 1024
+EXTRACTION_CACHE_DISK_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Uploads are spooled here and read from disk, so sessions do not hold their bytes.
+# Spool files older than the max age (e.g. left by a crashed job) are removed.
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "aura_uploads"))
+UPLOAD_SPOOL_MAX_AGE_SECONDS = 24 * 60 * 60
+
+# Ingest configuration
+INGEST_MAX_WORKERS = min(4, os.cpu_count() or 1)
+# Stop extracting a file once this many tokens have been read (None = no limit)
+INGEST_MAX_TOKENS_PER_FILE = 120_000
+# PDF text engine: "auto" (pdfium when installed, else pdfplumber), "pdfium" or "pdfplumber".
+# Pages where pdfium finds no text are retried with pdfplumber's layout analysis.
+PDF_ENGINE = os.getenv("PDF_ENGINE", "auto")
+# PDFs with at least this many pages are split into page ranges across the ingest pool.
+# With a per-file budget only the first budget / PDF_ESTIMATED_TOKENS_PER_PAGE pages are
+# split, and any shortfall is read in one more pass that stops at the budget.
+PDF_PARALLEL_MIN_PAGES = 100
+PDF_MIN_PAGES_PER_TASK = 50
+PDF_ESTIMATED_TOKENS_PER_PAGE = 400
+
+# Near-duplicate removal: paragraphs whose word shingles overlap a paragraph of an earlier
+# research file by at least the threshold are dropped before retrieval
+DEDUP_ENABLED = True
+DEDUP_SIMILARITY_THRESHOLD = 0.8
+DEDUP_MIN_WORDS = 8
+DEDUP_SHINGLE_WORDS = 5
+DEDUP_NUM_PERMUTATIONS = 128
+DEDUP_LSH_BANDS = 16
+
+# Context packing configuration
+# Research above this many tokens is summarised (map-reduce) before brief generation
+CONTEXT_TOKEN_BUDGET = 60_000
+SUMMARY_CHUNK_TOKENS = 8_000
+SUMMARY_MAX_TOKENS = 1_024
+
+# Research retrieval: when the extracted research is larger than the budget, only the
+# passages that best match the objectives (BM25) are sent to the model.
+# The budget is the packing budget: in the UI and batch flows retrieval fills the
+# context by relevance, so packing only summarises research from callers that skip
+# retrieval (BriefService used directly, or RETRIEVAL_ENABLED = False).
+RETRIEVAL_ENABLED = True
+RETRIEVAL_TOKEN_BUDGET = CONTEXT_TOKEN_BUDGET
+RETRIEVAL_PASSAGE_TOKENS = 256
+
+# LLM response cache configuration
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "aura_response_cache.sqlite3"))
+RESPONSE_CACHE_TTL_SECONDS = 24 * 60 * 60
+RESPONSE_CACHE_MAX_ENTRIES = 1_000
+
+# Session artifact store: briefs, plans and extraction results live on disk and
+# session state only holds handles to them
+ARTIFACT_STORE_PATH = os.getenv("ARTIFACT_STORE_PATH", os.path.join(tempfile.gettempdir(), "aura_session_artifacts.sqlite3"))
+ARTIFACT_IDLE_TTL_SECONDS = 4 * 60 * 60
+ARTIFACT_MEMORY_CACHE_ENTRIES = 64
+
+# Headless batch configuration
+BATCH_MAX_CONCURRENT_JOBS = 4
+
+# Feature management: skill -> allowed users, reloaded when the file changes
+FEATURE_CONFIG_PATH = os.getenv("FEATURE_CONFIG_PATH", "feature_config.yml")
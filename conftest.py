@@ -0,0 +1,13 @@
+# Lets the tests import the app's packages (config, utils, services) from the repository root.
+import os
+import tempfile
+
+# Tests never reach the network or the app's own caches: settings are read at
+# import, so the stub model and a throwaway cache directory are set up first.
+_TEST_DIR = tempfile.mkdtemp(prefix="aura-tests-")
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("STUB_LATENCY_SECONDS", "0")
+os.environ.setdefault("RESPONSE_CACHE_PATH", os.path.join(_TEST_DIR, "responses.sqlite3"))
+os.environ.setdefault("EXTRACTION_CACHE_DIR", os.path.join(_TEST_DIR, "extraction"))
+os.environ.setdefault("ARTIFACT_STORE_PATH", os.path.join(_TEST_DIR, "artifacts.sqlite3"))
+os.environ.setdefault("UPLOAD_SPOOL_DIR", os.path.join(_TEST_DIR, "uploads"))
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from pydantic.json_schema import SkipJsonSchema
 from typing import List, Optional
 
 class CampaignBrief(BaseModel):
@@ -15,6 +16,18 @@ class CampaignBrief(BaseModel):
 	budget_guidance: Optional[str] = None
 	timeline: Optional[str] = None
 
+	# Accounting, filled in by the services: SkipJsonSchema keeps these out of the
+	# schema the model is asked to fill
+
 	# token accounting
-	input_tokens: int = -1
-	output_tokens: int = -1
+	input_tokens: SkipJsonSchema[int] = -1
+	output_tokens: SkipJsonSchema[int] = -1
+	model_name: SkipJsonSchema[str] = ""  # model that produced the brief, for pricing
+
+	# context packing accounting
+	research_tokens: SkipJsonSchema[int] = -1  # research tokens before packing
+	packed_research_tokens: SkipJsonSchema[int] = -1  # research tokens actually sent
+	summarisation_input_tokens: SkipJsonSchema[int] = 0
+	summarisation_output_tokens: SkipJsonSchema[int] = 0
+
+	from_cache: SkipJsonSchema[bool] = False  # served from the response cache at no API cost
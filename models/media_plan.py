@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from pydantic.json_schema import SkipJsonSchema
 from typing import List, Optional
 
 
@@ -26,5 +27,8 @@ class MediaPlan(BaseModel):
 	risk_mitigation: List[str]
 	success_measurement: List[str]
 	implementation_timeline: str
-	input_tokens: int = -1
-	output_tokens: int = -1
+	# Accounting, filled in by the services and kept out of the model's schema
+	input_tokens: SkipJsonSchema[int] = -1
+	output_tokens: SkipJsonSchema[int] = -1
+	model_name: SkipJsonSchema[str] = ""  # model that produced the plan, for pricing
+	from_cache: SkipJsonSchema[bool] = False  # served from the response cache at no API cost
@@ -1,12 +1,64 @@
-from app import main
+import argparse
+import asyncio
+import json
+import os
+import sys
+
 
 def streamlit_ui():
     """Legacy function for backward compatibility"""
+    from app import main
     main()
 
-def run():
-    """Entry point for the application"""
-    main()
+def run(manifest=None, output=None, concurrency=None, media_plan=False, use_cache=True):
+    """Entry point for the application
+
+    With a JSONL manifest, process its jobs headlessly and return a BatchSummary;
+    otherwise start the Streamlit UI. Each manifest line looks like
+    {"id": "...", "files": ["research.pdf"], "objectives": "...",
+    "system_prompt": null, "media_plan": false, "media_prompt": null}.
+    Results go to `output` (default: <manifest>.results.jsonl); rerunning with
+    the same output resumes, skipping jobs that already succeeded.
+    """
+    if manifest is None:
+        from app import main
+        main()
+        return None
+
+    # Imported lazily so the batch path does not need Streamlit
+    from config.settings import BATCH_MAX_CONCURRENT_JOBS
+    from services.batch_runner import BatchRunner, read_manifest
+
+    output = output or os.path.splitext(manifest)[0] + ".results.jsonl"
+    runner = BatchRunner(
+        output,
+        max_concurrent_jobs=concurrency or BATCH_MAX_CONCURRENT_JOBS,
+        media_plan=media_plan,
+        use_cache=use_cache,
+    )
+    return asyncio.run(runner.run(read_manifest(manifest)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate campaign briefs from a JSONL manifest, or start the UI without one.")
+    parser.add_argument("manifest", nargs="?", help="JSONL file with one job per line")
+    parser.add_argument("-o", "--output", help="results JSONL (default: <manifest>.results.jsonl)")
+    parser.add_argument("-c", "--concurrency", type=int, help="jobs to run at once")
+    parser.add_argument("--media-plan", action="store_true", help="also generate a media plan for every job")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the extraction and response caches")
+    parser.add_argument("--stub", action="store_true", help="use the deterministic offline stub model")
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        # Must be set before config.settings is first imported
+        os.environ["LLM_BACKEND"] = "stub"
+    summary = run(args.manifest, args.output, args.concurrency, args.media_plan, not args.no_cache)
+    if summary is not None:
+        json.dump(vars(summary), sys.stdout, indent=2)
+        print()
+        return 1 if summary.failed else 0
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    status = main()
+    if status:
+        sys.exit(status)
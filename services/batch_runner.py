@@ -0,0 +1,242 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+from config.settings import MODEL, BATCH_MAX_CONCURRENT_JOBS, INGEST_MAX_TOKENS_PER_FILE
+from models.campaign_brief import CampaignBrief
+from services.brief_service import BriefService
+from services.media_service import MediaService
+from utils.file_loader import load_files_to_text
+from utils.upload_spool import SpooledFile
+from utils.dedup import remove_near_duplicates
+from utils.retrieval import retrieve_research
+from utils.token_cost import calculate_cost
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchJob:
+	"""One line of a batch manifest: research files and objectives for a brief"""
+	id: str
+	files: List[str]
+	objectives: str
+	system_prompt: Optional[str] = None
+	media_plan: Optional[bool] = None  # None = use the runner default
+	media_prompt: Optional[str] = None
+
+	@classmethod
+	def from_dict(cls, data: Dict[str, Any], base_dir: str = ".") -> "BatchJob":
+		"""Build a job from a manifest record; relative file paths resolve against base_dir."""
+		missing = [key for key in ("id", "files", "objectives") if not data.get(key)]
+		if missing:
+			raise ValueError(f"Manifest record is missing {', '.join(missing)}")
+		files = [data["files"]] if isinstance(data["files"], str) else list(data["files"])
+		return cls(
+			id=str(data["id"]),
+			files=[os.path.join(base_dir, path) for path in files],
+			objectives=data["objectives"],
+			system_prompt=data.get("system_prompt"),
+			media_plan=data.get("media_plan"),
+			media_prompt=data.get("media_prompt"),
+		)
+
+
+def read_manifest(path: str) -> Iterator[BatchJob]:
+	"""Lazily yield the jobs in a JSONL manifest, skipping blank lines."""
+	base_dir = os.path.dirname(os.path.abspath(path))
+	with open(path, encoding="utf-8") as manifest:
+		for line_no, line in enumerate(manifest, 1):
+			if not line.strip():
+				continue
+			try:
+				yield BatchJob.from_dict(json.loads(line), base_dir)
+			except ValueError as e:
+				raise ValueError(f"{path}:{line_no}: {e}") from e
+
+
+@dataclass
+class BatchSummary:
+	"""Totals for one batch run; jobs already completed in the output are counted as skipped"""
+	succeeded: int = 0
+	failed: int = 0
+	skipped: int = 0
+	input_tokens: int = 0
+	output_tokens: int = 0
+	cost: float = 0.0
+	elapsed_seconds: float = 0.0
+	failed_ids: List[str] = field(default_factory=list)
+
+
+class BatchRunner:
+	"""Run manifest jobs through BriefService (and optionally MediaService) headlessly.
+
+	Jobs run with bounded concurrency; every LLM call still goes through the
+	process-wide rate limiter. Each finished job is appended to the output
+	JSONL immediately, so an interrupted run resumes by skipping the ids that
+	already succeeded there.
+	"""
+
+	def __init__(
+		self,
+		output_path: str,
+		max_concurrent_jobs: int = BATCH_MAX_CONCURRENT_JOBS,
+		media_plan: bool = False,
+		use_cache: bool = True,
+	):
+		self.output_path = output_path
+		self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+		self.media_plan = media_plan
+		self.use_cache = use_cache
+
+	def completed_ids(self) -> Set[str]:
+		"""Return ids recorded as succeeded in the output file (the checkpoint)."""
+		done: Set[str] = set()
+		if not os.path.exists(self.output_path):
+			return done
+		with open(self.output_path, encoding="utf-8") as output:
+			for line in output:
+				try:
+					record = json.loads(line)
+				except json.JSONDecodeError:
+					# A torn last line from an interrupted run; that job simply runs again
+					continue
+				if record.get("status") == "ok":
+					done.add(record["id"])
+		return done
+
+	def _ends_torn(self) -> bool:
+		"""Whether the output ends in a partial line left by an interrupted run."""
+		with open(self.output_path, "rb") as output:
+			if output.seek(0, os.SEEK_END) == 0:
+				return False
+			output.seek(-1, os.SEEK_END)
+			return output.read(1) != b"\n"
+
+	async def run(self, jobs: Iterable[BatchJob]) -> BatchSummary:
+		summary = BatchSummary()
+		start = time.perf_counter()
+		seen = self.completed_ids()
+		queue = iter(jobs)
+		os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+
+		with open(self.output_path, "a", encoding="utf-8") as output:
+			if self._ends_torn():
+				# Start after a torn last line rather than appending to it
+				output.write("\n")
+
+			async def worker():
+				# Workers pull from the shared iterator, so the manifest is never fully loaded
+				for job in queue:
+					if job.id in seen:
+						summary.skipped += 1
+						continue
+					seen.add(job.id)
+					record = await self.run_job(job)
+					output.write(json.dumps(record) + "\n")
+					output.flush()
+					os.fsync(output.fileno())
+					self._tally(summary, record)
+
+			await asyncio.gather(*(worker() for _ in range(self.max_concurrent_jobs)))
+
+		summary.elapsed_seconds = time.perf_counter() - start
+		return summary
+
+	async def run_job(self, job: BatchJob) -> Dict[str, Any]:
+		"""Run one job and return its output record; failures are recorded, not raised."""
+		start = time.perf_counter()
+		metrics: Dict[str, Any] = {}
+		try:
+			with span("batch.job", root=True, job_id=job.id) as job_span:
+				metrics["trace_id"] = job_span.trace_id
+				deduped, retrieved, file_errors = await self._extract(job)
+				metrics["extract_seconds"] = round(time.perf_counter() - start, 3)
+				metrics["duplicate_tokens"] = deduped.removed_tokens
+				metrics["research_tokens"] = retrieved.original_tokens
+				metrics["retrieved_tokens"] = retrieved.selected_tokens
+
+				brief_start = time.perf_counter()
+				brief = await BriefService().generate_brief(retrieved.segments, job.objectives, job.system_prompt, use_cache=self.use_cache)
+				metrics["brief"] = self._usage(brief, time.perf_counter() - brief_start)
+				record: Dict[str, Any] = {"id": job.id, "status": "ok", "brief": brief.model_dump()}
+
+				if job.media_plan if job.media_plan is not None else self.media_plan:
+					media_start = time.perf_counter()
+					media_plan = await MediaService().generate_media_plan(brief, job.media_prompt, use_cache=self.use_cache)
+					metrics["media_plan"] = self._usage(media_plan, time.perf_counter() - media_start)
+					record["media_plan"] = media_plan.model_dump()
+				if file_errors:
+					record["file_errors"] = file_errors
+		except Exception as e:
+			logger.exception("Batch job %s failed", job.id)
+			record = {"id": job.id, "status": "error", "error": str(e) or type(e).__name__}
+
+		steps = [value for key, value in metrics.items() if key in ("brief", "media_plan")]
+		metrics["input_tokens"] = sum(step["input_tokens"] for step in steps)
+		metrics["output_tokens"] = sum(step["output_tokens"] for step in steps)
+		metrics["cost"] = round(sum(step["cost"] for step in steps), 6)
+		metrics["latency_seconds"] = round(time.perf_counter() - start, 3)
+		record["metrics"] = metrics
+		return record
+
+	async def _extract(self, job: BatchJob):
+		"""Read and extract the job's files off the event loop; returns (DedupResult, RetrievedContext, file_errors)."""
+		files = []
+		file_errors: Dict[str, str] = {}
+		for path in job.files:
+			try:
+				# Handed over by path: workers open the file themselves instead of receiving its bytes
+				files.append((os.path.basename(path), SpooledFile.from_path(path)))
+			except OSError as e:
+				file_errors[path] = str(e)
+		# to_thread (unlike run_in_executor) carries the tracing context into the thread
+		results = await asyncio.to_thread(
+			load_files_to_text, files, use_cache=self.use_cache, max_tokens=INGEST_MAX_TOKENS_PER_FILE
+		)
+		file_errors.update((result.filename, result.error) for result in results if not result.ok)
+		documents = [(result.filename, result.text) for result in results if result.ok]
+		if not documents:
+			raise ValueError("; ".join(f"Failed to read {name}: {error}" for name, error in file_errors.items()))
+		deduped = await asyncio.to_thread(remove_near_duplicates, documents)
+		retrieved = await asyncio.to_thread(retrieve_research, deduped.documents, job.objectives)
+		return deduped, retrieved, file_errors
+
+	@staticmethod
+	def _usage(result: Any, elapsed: float) -> Dict[str, Any]:
+		"""Token, cost and latency figures for one generated brief or media plan."""
+		input_tokens = max(result.input_tokens, 0)
+		output_tokens = max(result.output_tokens, 0)
+		cost = calculate_cost(result.model_name or MODEL, input_tokens, output_tokens)
+		if isinstance(result, CampaignBrief):
+			input_tokens += result.summarisation_input_tokens
+			output_tokens += result.summarisation_output_tokens
+			cost += calculate_cost(MODEL, result.summarisation_input_tokens, result.summarisation_output_tokens)
+		if result.from_cache:
+			input_tokens = output_tokens = 0
+			cost = 0.0
+		return {
+			"model": result.model_name,
+			"input_tokens": input_tokens,
+			"output_tokens": output_tokens,
+			"cost": cost,
+			"latency_seconds": round(elapsed, 3),
+			"from_cache": result.from_cache,
+		}
+
+	@staticmethod
+	def _tally(summary: BatchSummary, record: Dict[str, Any]) -> None:
+		if record["status"] == "ok":
+			summary.succeeded += 1
+		else:
+			summary.failed += 1
+			summary.failed_ids.append(record["id"])
+		metrics = record["metrics"]
+		summary.input_tokens += metrics["input_tokens"]
+		summary.output_tokens += metrics["output_tokens"]
+		summary.cost += metrics["cost"]
+
@@ -1,48 +1,147 @@
-from langchain_openai import ChatOpenAI
-from aiolimiter import AsyncLimiter
-from typing import List
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Sequence, Union
 from models.campaign_brief import CampaignBrief
 from config.settings import (
-	MODEL, OPENAI_API_KEY, OPENAI_TEMPERATURE,
+	MODEL, OPENAI_TEMPERATURE,
 	OPENAI_TOP_P, OPENAI_MAX_TOKENS,
-	RATE_LIMIT_MAX_RATE, RATE_LIMIT_TIME_PERIOD
+	CONTEXT_TOKEN_BUDGET, RESPONSE_CACHE_ENABLED
 )
-from utils.constants import Constants
+from services.context_packer import ContextPacker, PackedContext
+from services.llm_pool import check_credentials, get_rate_limiter, resolve_model_name
+from services.model_router import ModelRouter
+from services.structured_stream import StreamUpdate
 from utils.prompt_templates import Prompts
+from utils.response_cache import ResponseCache, get_response_cache, hash_text, normalise_text
+from utils.token_counter import count_tokens
+from utils.tracing import span
+
+
+@dataclass
+class _BriefRequest:
+	"""A prepared brief request: either a cache hit or the final prompt to send"""
+	cache_key: str
+	use_cache: bool
+	cached: Optional[CampaignBrief] = None
+	prompt: str = ""
+	user: str = ""
+	packed: Optional[PackedContext] = None
+	input_tokens: int = 0
+
+	@property
+	def messages(self):
+		return (
+			("system", self.prompt),
+			("human", self.user),
+		)
+
 
 class BriefService:
 	"""Service to generate a marketing campaign brief from research and objectives"""
 
 	def __init__(self):
-		if not OPENAI_API_KEY:
-			raise ValueError("OPENAI_API_KEY environment variable is required")
+		check_credentials()
 		
-		self.chat_model = ChatOpenAI(
-			model=Constants.OPENAI_LLM_MODELS[MODEL],
-			api_key=OPENAI_API_KEY,
+		# Clients and the rate limiter are shared process-wide (see services.llm_pool)
+		self.model_name = resolve_model_name(MODEL)
+		self.limiter = get_rate_limiter()
+		self.router = ModelRouter(self.limiter)
+		self.packer = ContextPacker(self.limiter)
+
+	async def generate_brief(
+		self,
+		research: Union[str, Sequence[str]],
+		objectives: str,
+		system_prompt: str | None = None,
+		use_cache: bool = True,
+	) -> CampaignBrief:
+		"""Generate a structured campaign brief.
+
+		research is the research text, or segments of it (e.g. from
+		RetrievedContext.segments) that are joined only into the final prompt.
+		"""
+		request = await self._prepare(research, objectives, system_prompt, use_cache)
+		if request.cached is not None:
+			return request.cached
+
+		parsed = await self.router.invoke(CampaignBrief, "brief", request.messages, request.input_tokens)
+		return self._finalise(request, parsed)
+
+	async def stream_brief(
+		self,
+		research: Union[str, Sequence[str]],
+		objectives: str,
+		system_prompt: str | None = None,
+		use_cache: bool = True,
+	) -> AsyncIterator[StreamUpdate]:
+		"""Generate a brief, yielding partially parsed fields as they stream in.
+
+		The last update carries the finished CampaignBrief in `parsed`; research
+		is taken as by generate_brief.
+		"""
+		request = await self._prepare(research, objectives, system_prompt, use_cache)
+		if request.cached is not None:
+			yield StreamUpdate(request.cached.model_dump(), parsed=request.cached)
+			return
+
+		async for update in self.router.stream(CampaignBrief, "brief", request.messages, request.input_tokens):
+			if not update.final:
+				yield update
+		parsed: CampaignBrief = update.parsed
+
+		brief = self._finalise(request, parsed)
+		yield StreamUpdate(brief.model_dump(), message=update.message, parsed=brief)
+
+	async def _prepare(
+		self, research: Union[str, Sequence[str]], objectives: str, system_prompt: str | None, use_cache: bool
+	) -> _BriefRequest:
+		with span("prompt.build", kind="brief") as prompt_span:
+			prompt = system_prompt or Prompts.campaign_brief_system_prompt
+			# Segments come trimmed from retrieval; hashing and packing read them in place
+			segments = [research.strip()] if isinstance(research, str) else research
+			request = _BriefRequest(
+				cache_key=self._cache_key(segments, objectives, prompt),
+				use_cache=use_cache and RESPONSE_CACHE_ENABLED,
+				prompt=prompt,
+			)
+			if request.use_cache:
+				cached = get_response_cache().get(request.cache_key, CampaignBrief)
+				prompt_span.set(cached=cached is not None)
+				if cached is not None:
+					cached.from_cache = True
+					request.cached = cached
+					return request
+
+			# Summarise oversized research so the final prompt fits the context budget
+			request.packed = await self.packer.pack(segments, objectives)
+			framing = f"Objectives:\n{objectives.strip()}\n\nMarket Research:\n"
+			# The one place the research is joined into a single string
+			request.user = "".join([framing, *request.packed.segments])
+			request.input_tokens = count_tokens(prompt + framing, MODEL) + request.packed.packed_tokens
+			prompt_span.set(input_tokens=request.input_tokens)
+			return request
+
+	def _finalise(self, request: _BriefRequest, parsed: CampaignBrief) -> CampaignBrief:
+		packed = request.packed
+		parsed.research_tokens = packed.original_tokens
+		parsed.packed_research_tokens = packed.packed_tokens
+		parsed.summarisation_input_tokens = packed.summarisation_input_tokens
+		parsed.summarisation_output_tokens = packed.summarisation_output_tokens
+		# Freshly generated, whatever the model may have put in the field
+		parsed.from_cache = False
+		if request.use_cache:
+			get_response_cache().put(request.cache_key, "brief", parsed)
+		return parsed
+
+	def _cache_key(self, research: Sequence[str], objectives: str, prompt: str) -> str:
+		return ResponseCache.make_key(
+			"brief",
+			model=self.model_name,
+			routing=self.router.describe(),
 			temperature=OPENAI_TEMPERATURE,
 			top_p=OPENAI_TOP_P,
 			max_tokens=OPENAI_MAX_TOKENS,
+			context_budget=CONTEXT_TOKEN_BUDGET,
+			system_prompt=prompt,
+			objectives=normalise_text(objectives),
+			research=hash_text(research),
 		)
-		self.structured_llm = self.chat_model.with_structured_output(CampaignBrief, include_raw=True)
-		self.limiter = AsyncLimiter(max_rate=RATE_LIMIT_MAX_RATE, time_period=RATE_LIMIT_TIME_PERIOD)
-
-	async def generate_brief(self, research_text: str, objectives: str, system_prompt: str | None = None) -> CampaignBrief:
-		"""Generate a structured campaign brief"""
-		prompt = system_prompt or Prompts.campaign_brief_system_prompt
-		# Truncate overly large inputs to avoid token limits (basic safeguard)
-		context = research_text.strip()
-		user = f"Objectives:\n{objectives.strip()}\n\nMarket Research:\n{context}"
-
-		async with self.limiter:
-			response = await self.structured_llm.ainvoke(
-				(
-					("system", prompt),
-					("human", user),
-				)
-			)
-			print("media response: ", response)
-			parsed: CampaignBrief = response["parsed"]
-			parsed.input_tokens = response["raw"].usage_metadata.get("prompt_tokens", -1)
-			parsed.output_tokens = response["raw"].usage_metadata.get("completion_tokens", -1)
-			return parsed
@@ -0,0 +1,104 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Iterable, Sequence, Tuple, Union
+from config.settings import MODEL, CONTEXT_TOKEN_BUDGET, SUMMARY_CHUNK_TOKENS, SUMMARY_MAX_TOKENS
+from services.llm_pool import get_chat_model
+from utils.prompt_templates import Prompts
+from utils.token_cost import get_token_usage
+from utils.token_counter import count_tokens, split_into_chunks
+from utils.tracing import span
+
+# Upper bound on reduce rounds; each round shrinks the summaries by roughly SUMMARY_CHUNK_TOKENS / SUMMARY_MAX_TOKENS
+_MAX_REDUCE_ROUNDS = 4
+
+
+@dataclass
+class PackedContext:
+	"""Research context that fits the token budget, with accounting for the packing work"""
+	segments: Sequence[str]  # "".join() is the context; left unjoined until the prompt is built
+	original_tokens: int
+	packed_tokens: int
+	summarisation_input_tokens: int = 0
+	summarisation_output_tokens: int = 0
+
+
+class ContextPacker:
+	"""Fit research text into the model's context budget using map-reduce summarisation"""
+
+	def __init__(self, limiter, model_name: str = MODEL, budget_tokens: int = CONTEXT_TOKEN_BUDGET):
+		self.limiter = limiter
+		self.model_name = model_name
+		self.budget_tokens = budget_tokens
+
+	async def pack(self, research: Union[str, Sequence[str]], objectives: str) -> PackedContext:
+		"""Return the research unchanged if it fits the budget, otherwise a summarised version that does.
+
+		research may be given as segments (e.g. RetrievedContext.segments); they
+		are only joined if the research has to be summarised.
+		"""
+		with span("context.pack") as pack_span:
+			packed = await self._pack([research] if isinstance(research, str) else research, objectives)
+			pack_span.set(original_tokens=packed.original_tokens, packed_tokens=packed.packed_tokens)
+		return packed
+
+	async def _pack(self, segments: Sequence[str], objectives: str) -> PackedContext:
+		original_tokens = sum(count_tokens(segment, self.model_name) for segment in segments)
+		if original_tokens <= self.budget_tokens:
+			return PackedContext(segments, original_tokens, original_tokens)
+
+		# Map: summarise every chunk concurrently, sized so the summaries roughly fit the budget
+		chunks = split_into_chunks("".join(segments), SUMMARY_CHUNK_TOKENS, self.model_name)
+		summary_tokens = max(256, min(SUMMARY_MAX_TOKENS, self.budget_tokens // len(chunks)))
+		results = await asyncio.gather(*(
+			self._summarise(Prompts.research_chunk_summary_prompt, chunk, objectives, summary_tokens)
+			for chunk in chunks
+		))
+		calls = list(results)
+
+		# Reduce: merge groups of summaries until the combined text fits
+		text = self._join(summary for summary, _, _ in results)
+		for _ in range(_MAX_REDUCE_ROUNDS):
+			if count_tokens(text, self.model_name) <= self.budget_tokens:
+				break
+			groups = split_into_chunks(text, SUMMARY_CHUNK_TOKENS, self.model_name)
+			results = await asyncio.gather(*(
+				self._summarise(Prompts.research_merge_prompt, group, objectives, SUMMARY_MAX_TOKENS)
+				for group in groups
+			))
+			calls.extend(results)
+			text = self._join(summary for summary, _, _ in results)
+
+		packed_tokens = count_tokens(text, self.model_name)
+		if packed_tokens > self.budget_tokens:
+			# Last resort so the final prompt always fits
+			text = text[:len(text) * self.budget_tokens // packed_tokens]
+			packed_tokens = count_tokens(text, self.model_name)
+
+		return PackedContext(
+			segments=[text],
+			original_tokens=original_tokens,
+			packed_tokens=packed_tokens,
+			summarisation_input_tokens=sum(max(input_tokens, 0) for _, input_tokens, _ in calls),
+			summarisation_output_tokens=sum(max(output_tokens, 0) for _, _, output_tokens in calls),
+		)
+
+	async def _summarise(self, prompt: str, text: str, objectives: str, max_tokens: int) -> Tuple[str, int, int]:
+		"""Return (summary, input_tokens, output_tokens) for one summarisation call."""
+		user = f"Objectives:\n{objectives.strip()}\n\nResearch:\n{text}"
+		estimate = count_tokens(prompt + user, self.model_name) + max_tokens
+		async with self.limiter.limit(estimate) as reservation:
+			with span("llm.summarise", model=self.model_name) as call_span:
+				response = await get_chat_model(self.model_name).bind(max_tokens=max_tokens).ainvoke(
+					(
+						("system", prompt),
+						("human", user),
+					)
+				)
+				input_tokens, output_tokens = get_token_usage(response)
+				call_span.set(input_tokens=input_tokens, output_tokens=output_tokens)
+			reservation.settle(input_tokens + output_tokens)
+		return response.content, input_tokens, output_tokens
+
+	@staticmethod
+	def _join(summaries: Iterable[str]) -> str:
+		return "\n\n".join(summary.strip() for summary in summaries if summary.strip())
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from config.settings import WORKER_MAX_CONCURRENT_JOBS, JOB_RESULT_TTL_SECONDS, LLM_PREWARM_CONNECTIONS
+from services.llm_pool import prewarm_connections
+from utils.tracing import Span, span
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+	PENDING = "pending"
+	RUNNING = "running"
+	SUCCEEDED = "succeeded"
+	FAILED = "failed"
+	CANCELLED = "cancelled"
+
+
+@dataclass
+class Job:
+	"""A unit of work running on the background worker's event loop"""
+	id: str
+	kind: str
+	status: JobStatus = JobStatus.PENDING
+	progress: float = 0.0
+	message: str = "Queued"
+	result: Any = None
+	partial: Any = None  # latest partial result published by a streaming job
+	error: Optional[str] = None
+	created_at: float = field(default_factory=time.time)
+	started_at: Optional[float] = None
+	finished_at: Optional[float] = None
+	span: Optional[Span] = None  # root tracing span of the job
+	_future: Optional[Future] = field(default=None, repr=False)
+	# Runs once when the job ends however it ends, including cancelled before it started
+	_cleanup: Optional[Callable[[], None]] = field(default=None, repr=False)
+
+	@property
+	def done(self) -> bool:
+		return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+	def report(self, progress: float, message: str = "") -> None:
+		"""Update progress (0..1) from inside the job; read by UI polling."""
+		self.progress = min(max(progress, 0.0), 1.0)
+		if message:
+			self.message = message
+
+
+class BackgroundWorker:
+	"""A long-lived asyncio event loop on a daemon thread that runs submitted jobs.
+
+	All Streamlit sessions share the loop, so pooled LLM connections stay warm
+	and a job keeps running when the script that submitted it reruns.
+	"""
+
+	def __init__(self, max_concurrent_jobs: int = WORKER_MAX_CONCURRENT_JOBS, job_ttl_seconds: float = JOB_RESULT_TTL_SECONDS):
+		self.job_ttl_seconds = job_ttl_seconds
+		self._jobs: Dict[str, Job] = {}
+		self._lock = threading.Lock()
+		self._loop = asyncio.new_event_loop()
+		self._semaphore = asyncio.Semaphore(max_concurrent_jobs)
+		self._ready = threading.Event()
+		self._thread = threading.Thread(target=self._run, name="aura-background-worker", daemon=True)
+		self._thread.start()
+		self._ready.wait()
+
+	def _run(self) -> None:
+		asyncio.set_event_loop(self._loop)
+		self._loop.call_soon(self._ready.set)
+		if LLM_PREWARM_CONNECTIONS:
+			self._loop.create_task(prewarm_connections())
+		self._loop.run_forever()
+
+	@property
+	def loop(self) -> asyncio.AbstractEventLoop:
+		return self._loop
+
+	def submit(self, kind: str, fn: Callable[[Job], Awaitable[Any]], cleanup: Optional[Callable[[], None]] = None) -> Job:
+		"""Queue `fn(job)` on the worker loop and return its Job handle immediately.
+
+		`cleanup` (e.g. deleting the job's spooled uploads) runs once the job has
+		finished, failed or been cancelled, even if it never started.
+		"""
+		job = Job(id=uuid.uuid4().hex, kind=kind, _cleanup=cleanup)
+		with self._lock:
+			self._prune()
+			self._jobs[job.id] = job
+		job._future = asyncio.run_coroutine_threadsafe(self._execute(job, fn), self._loop)
+		return job
+
+	def get(self, job_id: Optional[str]) -> Optional[Job]:
+		if not job_id:
+			return None
+		with self._lock:
+			return self._jobs.get(job_id)
+
+	def cancel(self, job_id: Optional[str]) -> bool:
+		"""Cancel a pending or running job. Returns False if it had already finished."""
+		job = self.get(job_id)
+		if job is None:
+			return False
+		was_pending = job.status == JobStatus.PENDING
+		if not self._transition(job, (JobStatus.PENDING, JobStatus.RUNNING), JobStatus.CANCELLED):
+			return False
+		if job._future is not None:
+			job._future.cancel()
+		if was_pending:
+			# _execute may never run for it, so nothing else would clean up
+			self._run_cleanup(job)
+		return True
+
+	def discard(self, job_id: Optional[str]) -> None:
+		"""Forget a finished job once its result has been collected, instead of holding it until the TTL."""
+		with self._lock:
+			job = self._jobs.get(job_id)
+			if job is not None and job.done:
+				del self._jobs[job_id]
+
+	async def _execute(self, job: Job, fn: Callable[[Job], Awaitable[Any]]) -> None:
+		try:
+			async with self._semaphore:
+				if not self._transition(job, (JobStatus.PENDING,), JobStatus.RUNNING):
+					return
+				job.started_at = time.time()
+				try:
+					with span(f"job.{job.kind}", root=True, job_id=job.id) as job_span:
+						job.span = job_span
+						result = await fn(job)
+				except asyncio.CancelledError:
+					self._transition(job, (JobStatus.RUNNING,), JobStatus.CANCELLED)
+				except Exception as e:
+					logger.exception("Background job %s (%s) failed", job.id, job.kind)
+					self._transition(job, (JobStatus.RUNNING,), JobStatus.FAILED, error=str(e) or type(e).__name__)
+				else:
+					self._transition(job, (JobStatus.RUNNING,), JobStatus.SUCCEEDED, result=result, progress=1.0, message="Done")
+		finally:
+			self._run_cleanup(job)
+
+	def _transition(self, job: Job, expected: Iterable[JobStatus], status: JobStatus, **updates: Any) -> bool:
+		"""Move the job to `status` only if it is still in one of the expected states.
+
+		A job cancelled from the UI thread thus stays cancelled even if its
+		coroutine completes afterwards.
+		"""
+		with self._lock:
+			if job.status not in expected:
+				return False
+			for name, value in updates.items():
+				setattr(job, name, value)
+			job.status = status
+			if job.done:
+				job.finished_at = time.time()
+			return True
+
+	def _run_cleanup(self, job: Job) -> None:
+		with self._lock:
+			cleanup, job._cleanup = job._cleanup, None
+		if cleanup is not None:
+			try:
+				cleanup()
+			except Exception:
+				logger.exception("Cleanup of background job %s (%s) failed", job.id, job.kind)
+
+	def _prune(self) -> None:
+		"""Forget finished jobs older than the TTL. Caller holds the lock."""
+		cutoff = time.time() - self.job_ttl_seconds
+		expired = [job_id for job_id, job in self._jobs.items() if job.done and (job.finished_at or 0) < cutoff]
+		for job_id in expired:
+			del self._jobs[job_id]
+
+
+_worker: Optional[BackgroundWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_worker() -> BackgroundWorker:
+	"""Return the process-wide background worker, starting it on first use."""
+	global _worker
+	with _worker_lock:
+		if _worker is None:
+			_worker = BackgroundWorker()
+		return _worker
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_openai import ChatOpenAI
+from config.settings import (
+	MODEL, OPENAI_API_KEY, OPENAI_API_BASE, OPENAI_TEMPERATURE,
+	OPENAI_TOP_P, OPENAI_MAX_TOKENS,
+	LLM_BACKEND, STUB_LATENCY_SECONDS, STUB_OUTPUT_TOKENS,
+	RATE_LIMIT_MAX_RATE, RATE_LIMIT_TIME_PERIOD, RATE_LIMIT_TOKENS_PER_MINUTE,
+	LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE_CONNECTIONS, LLM_KEEPALIVE_EXPIRY,
+)
+from utils.constants import Constants
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class _Reservation:
+	"""Tokens reserved for one call; settle() corrects the estimate with the real usage"""
+
+	def __init__(self, limiter: "SharedRateLimiter", tokens: int):
+		self._limiter = limiter
+		self.tokens = tokens
+
+	def settle(self, actual_tokens: int) -> None:
+		if actual_tokens >= 0:
+			self._limiter._adjust_tokens(self.tokens - actual_tokens)
+			self.tokens = actual_tokens
+
+
+class SharedRateLimiter:
+	"""Process-wide limiter for requests per period and tokens per minute.
+
+	Both limits are token buckets guarded by a thread lock, so one instance can
+	be shared by every service, session and event loop in the process. Waiting
+	callers sleep without holding the lock.
+	"""
+
+	def __init__(self, max_rate: float, time_period: float, tokens_per_minute: float):
+		self.max_rate = max_rate
+		self.time_period = time_period
+		self.tokens_per_minute = tokens_per_minute
+		self._requests = float(max_rate)
+		self._tokens = float(tokens_per_minute)
+		self._updated = time.monotonic()
+		self._lock = threading.Lock()
+
+	@asynccontextmanager
+	async def limit(self, tokens: int = 0) -> AsyncIterator[_Reservation]:
+		"""Wait for capacity for one request of roughly `tokens` tokens (prompt + max output)."""
+		tokens = min(max(tokens, 0), int(self.tokens_per_minute))
+		with span("llm.limiter_wait", tokens=tokens):
+			await self._acquire(tokens)
+		yield _Reservation(self, tokens)
+
+	async def __aenter__(self) -> None:
+		await self._acquire(0)
+
+	async def __aexit__(self, *exc) -> None:
+		return None
+
+	async def _acquire(self, tokens: int) -> None:
+		while True:
+			with self._lock:
+				self._refill()
+				if self._requests >= 1 and self._tokens >= tokens:
+					self._requests -= 1
+					self._tokens -= tokens
+					return
+				wait = max(
+					(1 - self._requests) * self.time_period / self.max_rate,
+					(tokens - self._tokens) * 60 / self.tokens_per_minute,
+				)
+			await asyncio.sleep(max(wait, 0.01))
+
+	def _adjust_tokens(self, delta: float) -> None:
+		with self._lock:
+			self._refill()
+			self._tokens = min(self._tokens + delta, float(self.tokens_per_minute))
+
+	def _refill(self) -> None:
+		now = time.monotonic()
+		elapsed = now - self._updated
+		self._updated = now
+		self._requests = min(float(self.max_rate), self._requests + elapsed * self.max_rate / self.time_period)
+		self._tokens = min(float(self.tokens_per_minute), self._tokens + elapsed * self.tokens_per_minute / 60)
+
+
+class _LoopClients:
+	"""Pooled HTTP clients and chat models bound to one event loop"""
+
+	def __init__(self):
+		limits = httpx.Limits(
+			max_connections=LLM_MAX_CONNECTIONS,
+			max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+			keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+		)
+		self.http_client = httpx.Client(limits=limits)
+		self.http_async_client = httpx.AsyncClient(limits=limits)
+		self.chat_models: Dict[Tuple[str, int], BaseChatModel] = {}
+		self.structured_models: Dict[Tuple[str, int, type], Any] = {}
+		self.tool_models: Dict[Tuple[str, int, type], Any] = {}
+
+
+_limiter: Optional[SharedRateLimiter] = None
+# Async HTTP connections cannot cross event loops, so pools are kept per loop and
+# dropped with it; a long-lived loop therefore reuses one warm pool indefinitely.
+_loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClients]" = weakref.WeakKeyDictionary()
+_no_loop_clients: Optional[_LoopClients] = None
+_lock = threading.Lock()
+
+
+def get_rate_limiter() -> SharedRateLimiter:
+	"""Return the limiter shared by every LLM call in the process."""
+	global _limiter
+	with _lock:
+		if _limiter is None:
+			_limiter = SharedRateLimiter(RATE_LIMIT_MAX_RATE, RATE_LIMIT_TIME_PERIOD, RATE_LIMIT_TOKENS_PER_MINUTE)
+		return _limiter
+
+
+def _clients_for_current_loop() -> _LoopClients:
+	global _no_loop_clients
+	try:
+		loop = asyncio.get_running_loop()
+	except RuntimeError:
+		loop = None
+	with _lock:
+		if loop is None:
+			if _no_loop_clients is None:
+				_no_loop_clients = _LoopClients()
+			return _no_loop_clients
+		clients = _loop_clients.get(loop)
+		if clients is None:
+			clients = _loop_clients[loop] = _LoopClients()
+		return clients
+
+
+def resolve_model_name(model_name: str = MODEL) -> str:
+	"""Map a friendly model name from settings to the OpenAI model identifier."""
+	return Constants.OPENAI_LLM_MODELS.get(model_name, model_name)
+
+
+def check_credentials() -> None:
+	"""Raise ValueError if the configured LLM backend needs an API key that is not set."""
+	if LLM_BACKEND != "stub" and not OPENAI_API_KEY:
+		raise ValueError("OPENAI_API_KEY environment variable is required")
+
+
+def get_chat_model(model_name: str = MODEL, max_tokens: int = OPENAI_MAX_TOKENS) -> BaseChatModel:
+	"""Return the shared chat model for the running event loop, creating it on first use."""
+	check_credentials()
+	clients = _clients_for_current_loop()
+	key = (resolve_model_name(model_name), max_tokens)
+	with _lock:
+		chat_model = clients.chat_models.get(key)
+		if chat_model is None and LLM_BACKEND == "stub":
+			from services.stub_chat_model import StubChatModel
+			chat_model = clients.chat_models[key] = StubChatModel(
+				model_name=key[0],
+				max_tokens=max_tokens,
+				latency_seconds=STUB_LATENCY_SECONDS,
+				output_tokens=STUB_OUTPUT_TOKENS,
+			)
+		elif chat_model is None:
+			chat_model = clients.chat_models[key] = ChatOpenAI(
+				model=key[0],
+				api_key=OPENAI_API_KEY,
+				base_url=OPENAI_API_BASE,
+				temperature=OPENAI_TEMPERATURE,
+				top_p=OPENAI_TOP_P,
+				max_tokens=max_tokens,
+				http_client=clients.http_client,
+				http_async_client=clients.http_async_client,
+				stream_usage=True,
+			)
+		return chat_model
+
+
+def get_structured_model(schema: type, model_name: str = MODEL, max_tokens: int = OPENAI_MAX_TOKENS):
+	"""Return the shared `with_structured_output(schema, include_raw=True)` runnable.
+
+	Uses function calling, like streaming does. With the default json_schema
+	method a reply cut off at max_tokens raises LengthFinishReasonError before
+	include_raw can report it, so it could be neither repaired nor escalated.
+	"""
+	chat_model = get_chat_model(model_name, max_tokens)
+	clients = _clients_for_current_loop()
+	key = (resolve_model_name(model_name), max_tokens, schema)
+	with _lock:
+		structured = clients.structured_models.get(key)
+		if structured is None:
+			structured = clients.structured_models[key] = chat_model.with_structured_output(
+				schema, include_raw=True, method="function_calling"
+			)
+		return structured
+
+
+def get_tool_model(schema: type, model_name: str = MODEL, max_tokens: int = OPENAI_MAX_TOKENS):
+	"""Return the shared chat model bound to call `schema` as a tool; used for streaming structured output."""
+	chat_model = get_chat_model(model_name, max_tokens)
+	clients = _clients_for_current_loop()
+	key = (resolve_model_name(model_name), max_tokens, schema)
+	with _lock:
+		bound = clients.tool_models.get(key)
+		if bound is None:
+			bound = clients.tool_models[key] = chat_model.bind_tools([schema], tool_choice=schema.__name__)
+		return bound
+
+
+async def prewarm_connections(connections: int = 2) -> None:
+	"""Open keep-alive connections to the API on the running loop ahead of the first request."""
+	if LLM_BACKEND == "stub":
+		return
+	clients = _clients_for_current_loop()
+
+	async def _touch():
+		try:
+			await clients.http_async_client.head(OPENAI_API_BASE, timeout=10)
+		except httpx.HTTPError as e:
+			logger.debug("Connection pre-warm failed: %s", e)
+
+	await asyncio.gather(*(_touch() for _ in range(connections)))
@@ -1,58 +1,129 @@
-from langchain_openai import ChatOpenAI
-from aiolimiter import AsyncLimiter
-from typing import List
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
 from models.media_plan import MediaPlan
 from models.campaign_brief import CampaignBrief
 from config.settings import (
-	MODEL, OPENAI_API_KEY, OPENAI_TEMPERATURE,
+	MODEL, OPENAI_TEMPERATURE,
 	OPENAI_TOP_P, OPENAI_MAX_TOKENS,
-	RATE_LIMIT_MAX_RATE, RATE_LIMIT_TIME_PERIOD
+	RESPONSE_CACHE_ENABLED
 )
-from utils.constants import Constants
+from services.llm_pool import check_credentials, get_rate_limiter, resolve_model_name
+from services.model_router import ModelRouter
+from services.structured_stream import StreamUpdate
 from utils.prompt_templates import Prompts
+from utils.response_cache import ResponseCache, get_response_cache, hash_text
+from utils.token_counter import count_tokens
+from utils.tracing import span
+
+
+@dataclass
+class _MediaPlanRequest:
+	"""A prepared media plan request: either a cache hit or the prompt to send"""
+	cache_key: str
+	use_cache: bool
+	prompt: str
+	user: str
+	cached: Optional[MediaPlan] = None
+
+	@property
+	def messages(self):
+		return (
+			("system", self.prompt),
+			("human", self.user),
+		)
+
+	@property
+	def input_tokens(self) -> int:
+		return count_tokens(self.prompt + self.user, MODEL)
+
 
 class MediaService:
 	"""Service to generate a media plan from campaign brief"""
 
 	def __init__(self):
-		if not OPENAI_API_KEY:
-			raise ValueError("OPENAI_API_KEY environment variable is required")
+		check_credentials()
 		
-		self.chat_model = ChatOpenAI(
-			model=Constants.OPENAI_LLM_MODELS[MODEL],
-			api_key=OPENAI_API_KEY,
-			temperature=OPENAI_TEMPERATURE,
-			top_p=OPENAI_TOP_P,
-			max_tokens=OPENAI_MAX_TOKENS,
-		)
-		self.structured_llm = self.chat_model.with_structured_output(MediaPlan, include_raw=True)
-		self.limiter = AsyncLimiter(max_rate=RATE_LIMIT_MAX_RATE, time_period=RATE_LIMIT_TIME_PERIOD)
+		# Clients and the rate limiter are shared process-wide (see services.llm_pool)
+		self.model_name = resolve_model_name(MODEL)
+		self.limiter = get_rate_limiter()
+		self.router = ModelRouter(self.limiter)
 
-	async def generate_media_plan(self, campaign_brief: CampaignBrief, custom_prompt: str | None = None) -> MediaPlan:
+	async def generate_media_plan(
+		self,
+		campaign_brief: CampaignBrief,
+		custom_prompt: str | None = None,
+		use_cache: bool = True,
+	) -> MediaPlan:
 		"""Generate a structured media plan based on the campaign brief"""
-		prompt = custom_prompt or Prompts.media_plan_system_prompt
+		request = self._prepare(campaign_brief, custom_prompt, use_cache)
+		if request.cached is not None:
+			return request.cached
+
+		# A reply that cannot be parsed even after repair and escalation raises StructuredOutputError
+		parsed = await self.router.invoke(MediaPlan, "media_plan", request.messages, request.input_tokens)
+
+		return self._finalise(request, parsed)
+
+	async def stream_media_plan(
+		self,
+		campaign_brief: CampaignBrief,
+		custom_prompt: str | None = None,
+		use_cache: bool = True,
+	) -> AsyncIterator[StreamUpdate]:
+		"""Generate a media plan, yielding partially parsed fields as they stream in.
+
+		The last update carries the finished MediaPlan in `parsed`.
+		"""
+		request = self._prepare(campaign_brief, custom_prompt, use_cache)
+		if request.cached is not None:
+			yield StreamUpdate(request.cached.model_dump(), parsed=request.cached)
+			return
+
+		async for update in self.router.stream(MediaPlan, "media_plan", request.messages, request.input_tokens):
+			if not update.final:
+				yield update
+		parsed: MediaPlan = update.parsed
+
+		media_plan = self._finalise(request, parsed)
+		yield StreamUpdate(media_plan.model_dump(), message=update.message, parsed=media_plan)
+
+	def _prepare(self, campaign_brief: CampaignBrief, custom_prompt: str | None, use_cache: bool) -> _MediaPlanRequest:
+		with span("prompt.build", kind="media_plan") as prompt_span:
+			prompt = custom_prompt or Prompts.media_plan_system_prompt
 		
-		# Convert campaign brief to text format for the AI
-		brief_text = self._format_brief_for_media_plan(campaign_brief)
-		user = f"Campaign Brief:\n{brief_text}"
-
-		async with self.limiter:
-			try:
-				response = await self.structured_llm.ainvoke(
-					(
-						("system", prompt),
-						("human", user),
-					)
-				)
-				print("media response: ", response)
-				parsed: MediaPlan = response["parsed"]
-				parsed.input_tokens = response["raw"].usage_metadata.get("prompt_tokens", -1)
-				parsed.output_tokens = response["raw"].usage_metadata.get("completion_tokens", -1)
-				return parsed
-			except Exception as e:
-				import traceback
-				error_details = traceback.format_exc()
-				raise Exception(f"Failed to generate media plan: {str(e)}\nDetails: {error_details}")
+			# Convert campaign brief to text format for the AI
+			brief_text = self._format_brief_for_media_plan(campaign_brief)
+			user = f"Campaign Brief:\n{brief_text}"
+
+			request = _MediaPlanRequest(
+				cache_key=ResponseCache.make_key(
+					"media_plan",
+					model=self.model_name,
+					routing=self.router.describe(),
+					temperature=OPENAI_TEMPERATURE,
+					top_p=OPENAI_TOP_P,
+					max_tokens=OPENAI_MAX_TOKENS,
+					system_prompt=prompt,
+					brief=hash_text(user),
+				),
+				use_cache=use_cache and RESPONSE_CACHE_ENABLED,
+				prompt=prompt,
+				user=user,
+			)
+			if request.use_cache:
+				cached = get_response_cache().get(request.cache_key, MediaPlan)
+				prompt_span.set(cached=cached is not None)
+				if cached is not None:
+					cached.from_cache = True
+					request.cached = cached
+			return request
+
+	def _finalise(self, request: _MediaPlanRequest, parsed: MediaPlan) -> MediaPlan:
+		# Freshly generated, whatever the model may have put in the field
+		parsed.from_cache = False
+		if request.use_cache:
+			get_response_cache().put(request.cache_key, "media_plan", parsed)
+		return parsed
 
 	def _format_brief_for_media_plan(self, brief: CampaignBrief) -> str:
 		"""Format the campaign brief into a structured text for media plan generation"""
@@ -0,0 +1,182 @@
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from pydantic import BaseModel
+from config.settings import (
+	MODEL, OPENAI_MAX_TOKENS,
+	MODEL_ROUTING_ENABLED, MODEL_ROUTING_RULES, MODEL_FALLBACK_CASCADE, STRUCTURED_REPAIR_ENABLED,
+)
+from services.llm_pool import SharedRateLimiter, get_tool_model, resolve_model_name
+from services.structured_repair import repair_structured_output
+from services.structured_stream import StreamUpdate, StructuredOutputError, parse_structured, stream_structured
+from utils.token_cost import get_token_usage
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRouter:
+	"""Choose the model for each structured request and escalate when its output fails to parse.
+
+	A request is routed by its kind and estimated input tokens to the first
+	matching rule's model (or the default model). If the response cannot be
+	parsed, a follow-up call to the same model asks for just the fields that
+	were missing, invalid or cut off; only if that fails too is the request
+	retried on each stronger model in the fallback cascade. The returned object
+	records the model that produced it and the tokens of every attempt.
+	"""
+
+	def __init__(
+		self,
+		limiter: SharedRateLimiter,
+		rules: Optional[Sequence[Dict[str, Any]]] = None,
+		cascade: Optional[Sequence[str]] = None,
+		default_model: str = MODEL,
+		enabled: bool = MODEL_ROUTING_ENABLED,
+	):
+		self.limiter = limiter
+		self.rules = list(MODEL_ROUTING_RULES if rules is None else rules)
+		self.cascade = list(MODEL_FALLBACK_CASCADE if cascade is None else cascade)
+		self.default_model = default_model
+		self.enabled = enabled
+
+	def route(self, kind: str, input_tokens: int) -> str:
+		"""Return the model for a request of `kind` with roughly `input_tokens` prompt tokens."""
+		if not self.enabled:
+			return self.default_model
+		for rule in self.rules:
+			if rule.get("kind") not in (None, kind):
+				continue
+			limit = rule.get("max_input_tokens")
+			if limit is None or input_tokens <= limit:
+				return rule["model"]
+		return self.default_model
+
+	def candidates(self, kind: str, input_tokens: int) -> List[str]:
+		"""The routed model followed by the stronger cascade models, without duplicate model ids."""
+		first = self.route(kind, input_tokens)
+		models = [first]
+		if self.enabled and first in self.cascade:
+			models += self.cascade[self.cascade.index(first) + 1:]
+		unique: Dict[str, str] = {}
+		for model_name in models:
+			unique.setdefault(resolve_model_name(model_name), model_name)
+		return list(unique.values())
+
+	def describe(self) -> Dict[str, Any]:
+		"""The routing configuration, for inclusion in response cache keys."""
+		return {"enabled": self.enabled, "rules": self.rules, "cascade": self.cascade, "default": self.default_model}
+
+	async def invoke(self, schema: type, kind: str, messages: Sequence[Tuple[str, str]], input_tokens: int) -> BaseModel:
+		"""Return `schema` parsed from the first candidate model whose response validates."""
+		usage = _Usage()
+		failure: Optional[StructuredOutputError] = None
+		for model_name in self.candidates(kind, input_tokens):
+			async with self.limiter.limit(input_tokens + OPENAI_MAX_TOKENS) as reservation:
+				# Covers the network call and parsing, as in stream()
+				with span("llm.call", kind=kind, model=model_name, streaming=False) as call_span:
+					response = await get_tool_model(schema, model_name).ainvoke(messages)
+					used = get_token_usage(response)
+					try:
+						parsed = parse_structured(schema, response)
+					except StructuredOutputError as e:
+						failure = e
+						parsed = None
+					call_span.set(input_tokens=used[0], output_tokens=used[1], parsed=parsed is not None)
+				reservation.settle(sum(used))
+			logger.debug("%s response from %s: %d input / %d output tokens", schema.__name__, model_name, *used)
+			if parsed is not None:
+				return usage.apply(parsed, used, _served_by(response, model_name))
+			usage.add(used)
+			repaired = await self._repair(schema, messages, response, model_name, input_tokens, usage)
+			if repaired is not None:
+				return repaired
+			logger.warning("%s from %s failed to parse (%s); escalating", schema.__name__, model_name, failure)
+		raise failure
+
+	async def stream(
+		self, schema: type, kind: str, messages: Sequence[Tuple[str, str]], input_tokens: int
+	) -> AsyncIterator[StreamUpdate]:
+		"""Stream `schema` like stream_structured, restarting on a stronger model if the result fails to parse.
+
+		The final update's `parsed` carries the model name and the tokens of every attempt.
+		"""
+		usage = _Usage()
+		models = self.candidates(kind, input_tokens)
+		for attempt, model_name in enumerate(models, 1):
+			failure: Optional[StructuredOutputError] = None
+			async with self.limiter.limit(input_tokens + OPENAI_MAX_TOKENS) as reservation:
+				with span("llm.call", kind=kind, model=model_name, streaming=True) as call_span:
+					try:
+						start = time.perf_counter()
+						first_chunk = None
+						async for update in stream_structured(schema, messages, model_name):
+							if first_chunk is None:
+								first_chunk = time.perf_counter() - start
+								call_span.set(first_update_seconds=round(first_chunk, 3))
+							if not update.final:
+								yield update
+								continue
+							final = update
+					except StructuredOutputError as e:
+						failure = e
+						used = get_token_usage(e.raw)
+					else:
+						used = get_token_usage(final.message)
+					call_span.set(input_tokens=used[0], output_tokens=used[1], parsed=failure is None)
+				reservation.settle(sum(used))
+			logger.debug("%s response from %s: %d input / %d output tokens", schema.__name__, model_name, *used)
+			if failure is None:
+				usage.apply(final.parsed, used, _served_by(final.message, model_name))
+				yield StreamUpdate(final.parsed.model_dump(), message=final.message, parsed=final.parsed)
+				return
+			usage.add(used)
+			repaired = await self._repair(schema, messages, failure.raw, model_name, input_tokens, usage)
+			if repaired is not None:
+				yield StreamUpdate(repaired.model_dump(), message=failure.raw, parsed=repaired)
+				return
+			if attempt == len(models):
+				raise failure
+			logger.warning("%s from %s failed to parse (%s); escalating", schema.__name__, model_name, failure)
+
+	async def _repair(
+		self, schema: type, messages: Sequence[Tuple[str, str]], message: Any, model_name: str, input_tokens: int, usage: "_Usage"
+	) -> Optional[BaseModel]:
+		"""Complete a reply that failed to parse on the same model, or None to escalate.
+
+		The failed reply's tokens must already be in `usage`; the follow-up's are added here.
+		"""
+		if not STRUCTURED_REPAIR_ENABLED:
+			return None
+		repaired, used = await repair_structured_output(schema, messages, message, model_name, self.limiter, input_tokens)
+		if repaired is None:
+			usage.add(used)
+			return None
+		return usage.apply(repaired, used, _served_by(message, model_name))
+
+
+class _Usage:
+	"""Tokens spent on failed attempts, added to the successful one"""
+
+	def __init__(self):
+		self.input_tokens = 0
+		self.output_tokens = 0
+
+	def add(self, used: Tuple[int, int]) -> None:
+		self.input_tokens += max(used[0], 0)
+		self.output_tokens += max(used[1], 0)
+
+	def apply(self, parsed: BaseModel, used: Tuple[int, int], model_name: str) -> BaseModel:
+		input_tokens, output_tokens = used
+		# Failed attempts are priced at the final model's rate, which over- rather than under-estimates
+		parsed.input_tokens = input_tokens + self.input_tokens if input_tokens >= 0 else -1
+		parsed.output_tokens = output_tokens + self.output_tokens if output_tokens >= 0 else -1
+		parsed.model_name = model_name
+		return parsed
+
+
+def _served_by(message: Any, model_name: str) -> str:
+	"""The model id the API reports for a response, falling back to the requested one."""
+	metadata = getattr(message, "response_metadata", None) or {}
+	return metadata.get("model_name") or resolve_model_name(model_name)
+
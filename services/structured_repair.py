@@ -0,0 +1,153 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple
+from pydantic import BaseModel, ValidationError, create_model
+from config.settings import OPENAI_MAX_TOKENS
+from services.llm_pool import SharedRateLimiter, get_structured_model
+from utils.partial_json import parse_partial_json
+from utils.prompt_templates import Prompts
+from utils.token_cost import get_token_usage
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RepairPlan:
+	"""What can be kept from a reply that failed to parse, and which fields to ask for again"""
+	kept: Dict[str, Any]
+	fields: Tuple[str, ...]
+	errors: Dict[str, str] = field(default_factory=dict)  # field -> validation message
+	truncated: bool = False
+
+	@property
+	def problem(self) -> str:
+		problems = []
+		if self.truncated:
+			problems.append("it was cut off before it was complete")
+		problems += [f"{name} was invalid ({message})" for name, message in self.errors.items()]
+		missing = [name for name in self.fields if name not in self.errors]
+		if missing and not self.truncated:
+			problems.append(f"it was missing {', '.join(missing)}")
+		return "; ".join(problems) or "it could not be parsed"
+
+
+def raw_arguments(message: Any) -> str:
+	"""The raw JSON arguments of a structured reply's tool call (or its content in JSON mode)."""
+	# Streamed chunks keep the unparsed text; parsed tool_calls would hide a truncation
+	for chunk in getattr(message, "tool_call_chunks", None) or []:
+		if chunk.get("args"):
+			return chunk["args"]
+	for call in getattr(message, "invalid_tool_calls", None) or []:
+		if call.get("args"):
+			return call["args"]
+	for call in getattr(message, "tool_calls", None) or []:
+		return json.dumps(call["args"])
+	content = getattr(message, "content", "")
+	return content if isinstance(content, str) else ""
+
+
+@lru_cache(maxsize=64)
+def output_fields(schema: type) -> Tuple[str, ...]:
+	"""Fields the model is expected to fill: those in the schema it is sent.
+
+	Accounting fields (token counts, model name) are left out with
+	SkipJsonSchema and are never asked for.
+	"""
+	properties = schema.model_json_schema().get("properties", {})
+	return tuple(name for name in schema.model_fields if name in properties)
+
+
+def plan_repair(schema: type, raw_text: str, truncated: bool = False) -> Optional[RepairPlan]:
+	"""Split a failed reply into the fields to keep and the fields to request again.
+
+	None when nothing can be salvaged (not JSON, or no usable fields), in which
+	case regenerating the whole reply is as cheap as repairing it.
+	"""
+	try:
+		partial = parse_partial_json(raw_text, keep_partial_strings=False)
+	except ValueError:
+		return None
+	if not isinstance(partial, dict):
+		return None
+	try:
+		json.loads(raw_text)
+	except json.JSONDecodeError:
+		truncated = True
+
+	wanted = output_fields(schema)
+	kept = {name: value for name, value in partial.items() if name in wanted}
+	if truncated and kept:
+		# The last field may have been cut off mid-list or mid-object
+		kept.pop(next(reversed(kept)))
+	errors: Dict[str, str] = {}
+	try:
+		schema.model_validate(kept)
+	except ValidationError as e:
+		for error in e.errors():
+			name = error["loc"][0] if error["loc"] else None
+			if name in kept:
+				errors.setdefault(name, error["msg"])
+	for name in errors:
+		kept.pop(name)
+	# Optional fields may be absent only because the reply was cut off before them
+	fields = tuple(
+		name for name in wanted
+		if name not in kept and (truncated or name in errors or schema.model_fields[name].is_required())
+	)
+	if not kept or not fields:
+		return None
+	return RepairPlan(kept, fields, errors, truncated)
+
+
+@lru_cache(maxsize=64)
+def repair_schema(schema: type, fields: Tuple[str, ...]) -> type:
+	"""A model with only `fields` of `schema`, reused for the same set of fields."""
+	return create_model(
+		f"{schema.__name__}Fields",
+		__doc__=f"The remaining fields of a {schema.__name__}",
+		**{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields},
+	)
+
+
+async def repair_structured_output(
+	schema: type,
+	messages: Sequence[Tuple[str, str]],
+	message: Any,
+	model_name: str,
+	limiter: SharedRateLimiter,
+	input_tokens: int,
+) -> Tuple[Optional[BaseModel], Tuple[int, int]]:
+	"""Complete a reply that failed to parse with a follow-up call for only its missing or invalid fields.
+
+	Returns (parsed, (input_tokens, output_tokens) of the follow-up); parsed is
+	None when the reply cannot be salvaged or the merged result still fails to
+	validate.
+	"""
+	finish_reason = (getattr(message, "response_metadata", None) or {}).get("finish_reason")
+	plan = plan_repair(schema, raw_arguments(message), truncated=finish_reason == "length")
+	if plan is None:
+		return None, (0, 0)
+
+	follow_up = Prompts.structured_repair_prompt.format(
+		problem=plan.problem, kept=json.dumps(plan.kept, ensure_ascii=False), fields=", ".join(plan.fields)
+	)
+	repair_messages = (*messages, ("human", follow_up))
+	async with limiter.limit(input_tokens + OPENAI_MAX_TOKENS) as reservation:
+		with span("llm.repair", schema=schema.__name__, model=model_name, fields=len(plan.fields)) as repair_span:
+			response = await get_structured_model(repair_schema(schema, plan.fields), model_name).ainvoke(repair_messages)
+			used = get_token_usage(response["raw"])
+			repair_span.set(input_tokens=used[0], output_tokens=used[1], parsed=response["parsed"] is not None)
+		reservation.settle(sum(used))
+	if response["parsed"] is None:
+		logger.warning("Repair of %s from %s failed to parse (%s)", schema.__name__, model_name, response["parsing_error"])
+		return None, used
+	try:
+		parsed = schema.model_validate({**plan.kept, **response["parsed"].model_dump(include=set(plan.fields))})
+	except ValidationError as e:
+		logger.warning("Repaired %s from %s is still invalid (%s)", schema.__name__, model_name, e)
+		return None, used
+	logger.info("Repaired %s from %s by asking for %s", schema.__name__, model_name, ", ".join(plan.fields))
+	return parsed, used
@@ -0,0 +1,89 @@
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Optional, Sequence, Tuple
+from langchain_core.messages import AIMessageChunk
+from pydantic import BaseModel, ValidationError
+from config.settings import MODEL, STREAM_PARSE_INTERVAL_SECONDS
+from services.llm_pool import get_tool_model
+from services.structured_repair import raw_arguments
+from utils.partial_json import parse_partial_json
+from utils.tracing import span
+
+
+class StructuredOutputError(ValueError):
+	"""The model's reply could not be parsed into the requested schema"""
+
+	def __init__(self, message: str, raw: Any = None):
+		super().__init__(message)
+		self.raw = raw  # the model's raw message, for token accounting
+
+
+@dataclass
+class StreamUpdate:
+	"""A snapshot of a structured response while it streams in.
+
+	Intermediate updates carry only `partial`; the last one also carries the
+	validated `parsed` model and, when it came from the model, the aggregated
+	raw `message`.
+	"""
+	partial: dict = field(default_factory=dict)
+	message: Optional[AIMessageChunk] = None
+	parsed: Optional[BaseModel] = None
+
+	@property
+	def final(self) -> bool:
+		return self.parsed is not None
+
+
+def _tool_arguments(message: AIMessageChunk) -> str:
+	"""Return the JSON arguments streamed so far for the first tool call (or the content in JSON mode)."""
+	for chunk in message.tool_call_chunks:
+		if chunk.get("args"):
+			return chunk["args"]
+	return message.content if isinstance(message.content, str) else ""
+
+
+async def stream_structured(
+	schema: type,
+	messages: Sequence[Tuple[str, str]],
+	model_name: str = MODEL,
+) -> AsyncIterator[StreamUpdate]:
+	"""Stream `schema` as a forced tool call, yielding partially parsed fields as they arrive.
+
+	Partial JSON is re-parsed at most every STREAM_PARSE_INTERVAL_SECONDS to
+	keep the cost of repeated parsing independent of the chunk rate.
+	"""
+	message: Optional[AIMessageChunk] = None
+	partial: dict = {}
+	last_parse = 0.0
+	async for chunk in get_tool_model(schema, model_name).astream(messages):
+		message = chunk if message is None else message + chunk
+		now = time.monotonic()
+		if now - last_parse < STREAM_PARSE_INTERVAL_SECONDS:
+			continue
+		last_parse = now
+		try:
+			snapshot = parse_partial_json(_tool_arguments(message))
+		except ValueError:
+			continue
+		if isinstance(snapshot, dict) and snapshot != partial:
+			partial = snapshot
+			yield StreamUpdate(partial)
+
+	if message is None:
+		raise StructuredOutputError("The model returned an empty response")
+	parsed = parse_structured(schema, message)
+	yield StreamUpdate(parsed.model_dump(), message=message, parsed=parsed)
+
+
+def parse_structured(schema: type, message: Any) -> BaseModel:
+	"""Validate `schema` from a complete reply's tool call arguments, streamed or not."""
+	with span("llm.parse", schema=schema.__name__) as parse_span:
+		try:
+			parsed = schema.model_validate(json.loads(raw_arguments(message)))
+		except (json.JSONDecodeError, ValidationError) as e:
+			parse_span.set(parsed=False)
+			raise StructuredOutputError(f"Could not parse a {schema.__name__} from the model response: {e}", raw=message) from e
+		parse_span.set(parsed=True)
+	return parsed
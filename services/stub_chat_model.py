@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from utils.token_counter import count_tokens
+
+_WORDS = (
+	"audience", "brand", "channel", "growth", "insight", "message", "market",
+	"reach", "segment", "strategy", "engagement", "awareness", "conversion",
+	"budget", "creative", "launch", "loyalty", "retention", "signal", "trend",
+)
+_ARRAY_ITEMS = 3
+_STREAM_CHUNK_CHARS = 24
+
+
+class StubChatModel(BaseChatModel):
+	"""Deterministic offline chat model used for batch runs and benchmarks.
+
+	Replies depend only on the prompt, so repeated runs are reproducible. Tool
+	calls are filled from the bound tool's JSON schema, plain replies are word
+	salad sized to `max_tokens`, and both report usage_metadata like the real
+	API. `latency_seconds` is spread over the streamed chunks.
+	"""
+
+	model_name: str = "stub"
+	latency_seconds: float = 0.0
+	output_tokens: int = 0  # 0 = natural size for the schema / max_tokens
+	max_tokens: int = 4096
+
+	@property
+	def _llm_type(self) -> str:
+		return "stub"
+
+	def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[str] = None, **kwargs: Any):
+		formatted = [convert_to_openai_tool(tool) for tool in tools]
+		return self.bind(tools=formatted, tool_choice=tool_choice, **kwargs)
+
+	def _generate(
+		self,
+		messages: List[BaseMessage],
+		stop: Optional[List[str]] = None,
+		run_manager: Optional[CallbackManagerForLLMRun] = None,
+		**kwargs: Any,
+	) -> ChatResult:
+		if self.latency_seconds:
+			time.sleep(self.latency_seconds)
+		return ChatResult(generations=[ChatGeneration(message=self._reply(messages, **kwargs))])
+
+	async def _agenerate(
+		self,
+		messages: List[BaseMessage],
+		stop: Optional[List[str]] = None,
+		run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+		**kwargs: Any,
+	) -> ChatResult:
+		if self.latency_seconds:
+			await asyncio.sleep(self.latency_seconds)
+		return ChatResult(generations=[ChatGeneration(message=self._reply(messages, **kwargs))])
+
+	def _stream(
+		self,
+		messages: List[BaseMessage],
+		stop: Optional[List[str]] = None,
+		run_manager: Optional[CallbackManagerForLLMRun] = None,
+		**kwargs: Any,
+	) -> Iterator[ChatGenerationChunk]:
+		chunks = self._chunks(self._reply(messages, **kwargs))
+		for chunk in chunks:
+			if self.latency_seconds:
+				time.sleep(self.latency_seconds / len(chunks))
+			yield ChatGenerationChunk(message=chunk)
+
+	async def _astream(
+		self,
+		messages: List[BaseMessage],
+		stop: Optional[List[str]] = None,
+		run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+		**kwargs: Any,
+	) -> AsyncIterator[ChatGenerationChunk]:
+		chunks = self._chunks(self._reply(messages, **kwargs))
+		for chunk in chunks:
+			if self.latency_seconds:
+				await asyncio.sleep(self.latency_seconds / len(chunks))
+			yield ChatGenerationChunk(message=chunk)
+
+	def _reply(self, messages: List[BaseMessage], tools: Optional[List[dict]] = None, max_tokens: Optional[int] = None, **kwargs: Any) -> AIMessage:
+		prompt = "\n".join(str(message.content) for message in messages)
+		seed = hashlib.sha256(prompt.encode("utf-8")).digest()
+		input_tokens = count_tokens(prompt, self.model_name)
+		if tools:
+			function = tools[0]["function"]
+			args = _fill_schema(function.get("parameters", {}), function["name"], seed)
+			call_id = "call_" + seed.hex()[:24]
+			content = ""
+			tool_calls = [{"name": function["name"], "args": args, "id": call_id, "type": "tool_call"}]
+			output_tokens = self.output_tokens or count_tokens(json.dumps(args), self.model_name)
+		else:
+			words = min(self.output_tokens or 200, max_tokens or self.max_tokens)
+			content = " ".join(_WORDS[(seed[i % len(seed)] + i) % len(_WORDS)] for i in range(words))
+			tool_calls = []
+			output_tokens = self.output_tokens or count_tokens(content, self.model_name)
+		return AIMessage(
+			content=content,
+			tool_calls=tool_calls,
+			usage_metadata={
+				"input_tokens": input_tokens,
+				"output_tokens": output_tokens,
+				"total_tokens": input_tokens + output_tokens,
+			},
+			response_metadata={"model_name": self.model_name, "finish_reason": "tool_calls" if tool_calls else "stop"},
+		)
+
+	@staticmethod
+	def _chunks(message: AIMessage) -> List[AIMessageChunk]:
+		"""Split a reply into streamed chunks; usage is reported on the last one, as with stream_usage."""
+		chunks: List[AIMessageChunk] = []
+		if message.tool_calls:
+			call = message.tool_calls[0]
+			arguments = json.dumps(call["args"])
+			for start in range(0, len(arguments), _STREAM_CHUNK_CHARS):
+				first = start == 0
+				chunks.append(AIMessageChunk(content="", tool_call_chunks=[{
+					"name": call["name"] if first else None,
+					"args": arguments[start:start + _STREAM_CHUNK_CHARS],
+					"id": call["id"] if first else None,
+					"index": 0,
+				}]))
+		else:
+			text = message.content
+			chunks.extend(
+				AIMessageChunk(content=text[start:start + _STREAM_CHUNK_CHARS])
+				for start in range(0, len(text), _STREAM_CHUNK_CHARS)
+			)
+		chunks.append(AIMessageChunk(
+			content="",
+			usage_metadata=message.usage_metadata,
+			response_metadata=message.response_metadata,
+		))
+		return chunks
+
+
+def _fill_schema(schema: Dict[str, Any], name: str, seed: bytes, defs: Optional[Dict[str, Any]] = None) -> Any:
+	"""Build a deterministic value matching a JSON schema; optional properties are left out."""
+	defs = defs if defs is not None else schema.get("$defs", {})
+	if "$ref" in schema:
+		schema = defs.get(schema["$ref"].rsplit("/", 1)[-1], {})
+	if "anyOf" in schema:
+		schema = next((option for option in schema["anyOf"] if option.get("type") != "null"), {})
+	kind = schema.get("type", "string")
+	if kind == "object":
+		required = schema.get("required", [])
+		return {
+			key: _fill_schema(value, key, seed, defs)
+			for key, value in schema.get("properties", {}).items()
+			if key in required
+		}
+	if kind == "array":
+		return [_fill_schema(schema.get("items", {}), f"{name} {i + 1}", seed, defs) for i in range(_ARRAY_ITEMS)]
+	if kind == "integer":
+		return seed[0]
+	if kind == "number":
+		return seed[0] / 4
+	if kind == "boolean":
+		return bool(seed[0] & 1)
+	if "enum" in schema:
+		return schema["enum"][seed[0] % len(schema["enum"])]
+	label = name.replace("_", " ").capitalize()
+	return f"{label}: {_WORDS[seed[1] % len(_WORDS)]} {_WORDS[seed[2] % len(_WORDS)]}"
@@ -0,0 +1,108 @@
+import threading
+from dataclasses import dataclass
+from typing import List
+
+import pytest
+
+from models.campaign_brief import CampaignBrief
+from utils import artifact_store
+from utils.artifact_store import ArtifactStore
+
+
+@dataclass
+class _Result:
+	filename: str
+	text: str
+
+
+_BRIEF = CampaignBrief(
+	title="Spring launch",
+	objective_summary="Grow trial",
+	target_audience=["students"],
+	key_insights=["price sensitive"],
+	value_proposition="Cheaper coffee",
+	messaging_pillars=["value"],
+	channels=["social"],
+	recommendations=["sampling"],
+	kpis=["trial rate"],
+	input_tokens=900,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+	return ArtifactStore(str(tmp_path / "artifacts.sqlite3"), idle_ttl_seconds=3600, memory_entries=2)
+
+
+def test_values_round_trip_through_disk(store, tmp_path):
+	brief = store.put("session", "brief", _BRIEF)
+	results = store.put("session", "research", [_Result("a.pdf", "text " * 1000)], List[_Result])
+
+	fresh = ArtifactStore(store.path, idle_ttl_seconds=3600, memory_entries=2)
+
+	assert fresh.get(brief) == _BRIEF
+	assert fresh.get(results) == [_Result("a.pdf", "text " * 1000)]
+	assert results.size < len("text " * 1000)
+
+
+def test_replacing_a_slot_invalidates_the_old_handle(store):
+	old = store.put("session", "brief", _BRIEF)
+	new = store.put("session", "brief", _BRIEF.model_copy(update={"title": "Summer launch"}))
+
+	assert new.version == old.version + 1
+	assert store.get(old) is None
+	assert store.get(new).title == "Summer launch"
+
+
+def test_sessions_do_not_share_slots(store):
+	first = store.put("first", "brief", _BRIEF)
+	second = store.put("second", "brief", _BRIEF.model_copy(update={"title": "Other"}))
+
+	assert store.get(first).title == "Spring launch"
+	assert store.get(second).title == "Other"
+
+
+def test_memory_cache_is_bounded_and_reloads_from_disk(store):
+	handles = [store.put(f"s{i}", "brief", _BRIEF) for i in range(4)]
+
+	assert len(store._memory) == 2
+	assert store.get(handles[0]) == _BRIEF
+	assert list(store._memory)[-1] == (handles[0].key, handles[0].version)
+
+
+def test_deleted_artifacts_are_gone(store):
+	handle = store.put("session", "brief", _BRIEF)
+	store.delete(handle)
+
+	assert store.get(handle) is None
+
+
+def test_idle_artifacts_are_evicted(store, monkeypatch):
+	monkeypatch.setattr(artifact_store, "_EVICT_INTERVAL_SECONDS", 0)
+	store.idle_ttl_seconds = -1
+	idle = store.put("idle", "brief", _BRIEF)
+	store._memory.clear()
+
+	store.put("active", "brief", _BRIEF)
+
+	assert store.get(idle) is None
+
+
+def test_concurrent_sessions(store):
+	errors = []
+
+	def session(n):
+		try:
+			for i in range(10):
+				handle = store.put(f"s{n}", "brief", _BRIEF.model_copy(update={"title": f"{n}-{i}"}))
+				assert store.get(handle).title == f"{n}-{i}"
+		except Exception as e:
+			errors.append(e)
+
+	threads = [threading.Thread(target=session, args=(n,)) for n in range(4)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	assert errors == []
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import pytest
+
+from services.batch_runner import BatchRunner, read_manifest
+
+
+@pytest.fixture
+def manifest(tmp_path):
+	(tmp_path / "coffee.txt").write_text("Students buy oat milk lattes before lectures.", encoding="utf-8")
+	(tmp_path / "tea.txt").write_text("Loose leaf tea sales grew in rural shops.", encoding="utf-8")
+	jobs = [
+		{"id": "coffee", "files": "coffee.txt", "objectives": "Grow trial among students"},
+		{"id": "tea", "files": ["tea.txt", "coffee.txt"], "objectives": "Defend tea share", "media_plan": True},
+		{"id": "missing", "files": ["nowhere.txt"], "objectives": "Anything"},
+	]
+	path = tmp_path / "jobs.jsonl"
+	path.write_text("\n".join(json.dumps(job) for job in jobs) + "\n\n", encoding="utf-8")
+	return str(path)
+
+
+def _records(path):
+	with open(path, encoding="utf-8") as output:
+		return [json.loads(line) for line in output]
+
+
+def test_manifest_paths_resolve_against_its_directory(manifest, tmp_path):
+	jobs = list(read_manifest(manifest))
+
+	assert [job.id for job in jobs] == ["coffee", "tea", "missing"]
+	assert jobs[1].files == [str(tmp_path / "tea.txt"), str(tmp_path / "coffee.txt")]
+
+
+def test_manifest_errors_name_the_line(tmp_path):
+	path = tmp_path / "bad.jsonl"
+	path.write_text('{"id": "a", "files": "x.txt"}\n', encoding="utf-8")
+
+	with pytest.raises(ValueError, match="bad.jsonl:1: .*objectives"):
+		list(read_manifest(str(path)))
+
+
+def test_run_records_every_job_and_resumes_where_it_stopped(manifest, tmp_path):
+	output = str(tmp_path / "results.jsonl")
+	runner = BatchRunner(output, max_concurrent_jobs=2, use_cache=False)
+
+	summary = asyncio.run(runner.run(read_manifest(manifest)))
+
+	assert (summary.succeeded, summary.failed, summary.skipped) == (2, 1, 0)
+	assert summary.failed_ids == ["missing"]
+	records = {record["id"]: record for record in _records(output)}
+	assert records["coffee"]["brief"]["title"]
+	assert "media_plan" in records["tea"] and "media_plan" not in records["coffee"]
+	assert "nowhere.txt" in records["missing"]["error"]
+
+	# An interrupted write leaves a torn last line; resuming skips what succeeded and retries the rest
+	with open(output, "a", encoding="utf-8") as fh:
+		fh.write('{"id": "tea", "sta')
+	resumed = asyncio.run(BatchRunner(output, use_cache=False).run(read_manifest(manifest)))
+
+	assert (resumed.succeeded, resumed.failed, resumed.skipped) == (0, 1, 2)
+	assert BatchRunner(output).completed_ids() == {"coffee", "tea"}
+	with open(output, encoding="utf-8") as fh:
+		lines = fh.read().splitlines()
+	assert lines[-2] == '{"id": "tea", "sta'
+	assert json.loads(lines[-1])["id"] == "missing"
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+from services.brief_service import BriefService
+from services.context_packer import ContextPacker
+from services.llm_pool import get_rate_limiter
+from utils.response_cache import hash_text
+from utils.retrieval import retrieve_research
+
+
+def _retrieved(tag):
+	documents = [
+		("coffee.txt", f"{tag} Students buy oat milk lattes before lectures."),
+		("tea.txt", "Loose leaf tea sales grew in rural shops."),
+	]
+	return retrieve_research(documents, "students coffee")
+
+
+def test_segments_hash_like_the_joined_text():
+	segments = ["### Source: a.txt\n\n", "first", "\n\n", "second"]
+
+	assert hash_text(segments) == hash_text("".join(segments))
+
+
+def test_segments_build_the_same_prompt_as_the_joined_text():
+	retrieved = _retrieved(time.time())
+
+	async def run():
+		service = BriefService()
+		from_segments = await service._prepare(retrieved.segments, "Grow trial", None, use_cache=False)
+		from_text = await service._prepare(f"  {retrieved.text}\n", "Grow trial", None, use_cache=False)
+		return from_segments, from_text
+
+	from_segments, from_text = asyncio.run(run())
+
+	assert from_segments.user == from_text.user
+	assert from_segments.user.endswith(retrieved.text)
+	assert from_segments.cache_key == from_text.cache_key
+	assert from_segments.input_tokens > from_segments.packed.packed_tokens > 0
+
+
+def test_a_brief_from_segments_is_cached_for_the_same_text():
+	retrieved = _retrieved(time.time())
+
+	async def run():
+		service = BriefService()
+		return await service.generate_brief(retrieved.segments, "Grow trial"), await service.generate_brief(retrieved.text, "Grow trial")
+
+	first, second = asyncio.run(run())
+
+	assert not first.from_cache
+	assert second.from_cache
+
+
+def test_oversized_segments_are_joined_and_summarised():
+	segments = [f"Paragraph {i} about coffee shops, students and oat milk prices in town.\n" for i in range(400)]
+
+	async def run():
+		return await ContextPacker(get_rate_limiter(), budget_tokens=2_000).pack(segments, "Grow trial")
+
+	packed = asyncio.run(run())
+
+	assert len(packed.segments) == 1
+	assert packed.packed_tokens <= 2_000 < packed.original_tokens
+	assert packed.summarisation_input_tokens > 0
@@ -0,0 +1,65 @@
+import random
+
+from benchmarks.corpus import build_docx, docx_paragraph
+from utils.dedup import MinHasher, estimated_similarity, remove_near_duplicates
+from utils.file_loader import load_file_to_text
+
+_WORDS = "brand market growth audience channel loyalty premium segment retail launch pricing budget insight trend".split()
+
+
+def _paragraphs(count, seed):
+	rng = random.Random(seed)
+	return [f"{seed}-{i} " + " ".join(rng.choice(_WORDS) for _ in range(rng.randint(12, 30))) for i in range(count)]
+
+
+def _docx(paragraphs):
+	return build_docx([docx_paragraph(text) for text in paragraphs])
+
+
+def test_partially_overlapping_docx_files_lose_only_the_shared_paragraphs():
+	shared = _paragraphs(20, seed=1)
+	first = _docx(shared + _paragraphs(20, seed=2))
+	second = _docx(_paragraphs(20, seed=3) + shared)
+	documents = [
+		("v1.docx", load_file_to_text("v1.docx", first, use_cache=False)),
+		("v2.docx", load_file_to_text("v2.docx", second, use_cache=False)),
+	]
+
+	result = remove_near_duplicates(documents)
+
+	assert result.removed_paragraphs == 20
+	assert result.removed_per_source == {"v2.docx": 20}
+	assert result.documents[0] == documents[0]
+	kept = result.documents[1][1].split("\n")
+	assert kept == _paragraphs(20, seed=3)
+
+
+def test_near_duplicates_are_removed_and_short_lines_kept():
+	paragraph = " ".join(_paragraphs(1, seed=6))
+	edited = paragraph + " overall"
+	documents = [("a.txt", f"Summary\n{paragraph}"), ("b.txt", f"Summary\n{edited}\n\nother unrelated words about tea leaves and loose leaf pricing in rural shops")]
+
+	result = remove_near_duplicates(documents, threshold=0.8)
+
+	assert result.removed_paragraphs == 1
+	assert result.documents[1][1] == "Summary\n\nother unrelated words about tea leaves and loose leaf pricing in rural shops"
+
+
+def test_minhash_similarity_tracks_overlap():
+	hasher = MinHasher()
+	text = " ".join(_paragraphs(1, seed=4))
+	assert estimated_similarity(hasher.signature(text), hasher.signature(text)) == 1.0
+	assert estimated_similarity(hasher.signature(text), hasher.signature(" ".join(_paragraphs(1, seed=5)))) < 0.3
+
+
+def test_repeats_within_one_file_are_kept():
+	row = "north | 2024 | social | 12000 | 340 | 0.028 | 9.4 | retained"
+	summary = "Sample Data (first 10 rows): channel spend clicks conversions region quarter"
+	first = "\n".join([summary, row, row, row, summary])
+	second = f"{row}\nA later file with its own closing paragraph about regional spend trends."
+
+	result = remove_near_duplicates([("q1.csv", first), ("q2.csv", second)])
+
+	assert result.documents[0] == ("q1.csv", first)
+	assert result.documents[1][1] == "A later file with its own closing paragraph about regional spend trends."
+	assert result.removed_per_source == {"q2.csv": 1}
@@ -0,0 +1,78 @@
+import pytest
+
+from benchmarks.corpus import build_docx, docx_paragraph
+from utils.file_loader import iter_docx_paragraphs, load_file_to_text
+
+
+def _cell(*paragraphs):
+	return f"<w:tc>{''.join(docx_paragraph(text) for text in paragraphs)}</w:tc>"
+
+
+def _row(*cells):
+	return f"<w:tr>{''.join(cells)}</w:tr>"
+
+
+def _text(body, **parts):
+	return load_file_to_text("report.docx", build_docx(body, **parts), use_cache=False)
+
+
+def test_paragraphs_are_separated_by_newlines_with_tabs_and_breaks():
+	body = [
+		docx_paragraph("Market overview"),
+		'<w:p><w:r><w:t>Spend</w:t><w:tab/><w:t>12k</w:t><w:br/><w:t>next line</w:t></w:r></w:p>',
+		"<w:p/>",
+		docx_paragraph("Closing"),
+	]
+
+	assert _text(body) == "Market overview\nSpend\t12k\nnext line\n\nClosing"
+
+
+def test_table_rows_are_cells_joined_with_separators():
+	table = "<w:tbl>" + "".join([
+		_row(_cell("Channel"), _cell("Spend"), _cell("Reach")),
+		_row(_cell("Social"), _cell("12,000"), _cell("first", "  second  line ")),
+		_row(_cell(""), _cell(""), _cell("")),
+	]) + "</w:tbl>"
+
+	assert _text([docx_paragraph("Before"), table, docx_paragraph("After")]) == (
+		"Before\nChannel | Spend | Reach\nSocial | 12,000 | first second line\nAfter"
+	)
+
+
+def test_nested_tables_stay_inside_their_cell():
+	inner = "<w:tbl>" + _row(_cell("a"), _cell("b")) + "</w:tbl>"
+	outer = "<w:tbl>" + _row(_cell("Outer"), f"<w:tc>{inner}</w:tc>") + "</w:tbl>"
+
+	assert _text([outer]) == "Outer | a | b"
+
+
+def test_headers_come_first_and_footers_last_each_once():
+	text = _text(
+		[docx_paragraph("Body")],
+		headers=[[docx_paragraph("Acme"), docx_paragraph("Confidential")], [docx_paragraph("Acme Confidential")]],
+		footers=[[docx_paragraph("Page footer")], [docx_paragraph("Page footer")]],
+	)
+
+	assert text == "Header: Acme Confidential\nBody\nFooter: Page footer"
+
+
+def test_markup_compatibility_fallback_is_not_read_twice():
+	text_box = (
+		"<w:p><w:r><w:t>Intro </w:t></w:r><mc:AlternateContent>"
+		f"<mc:Choice Requires=\"wps\"><w:txbxContent>{docx_paragraph('Boxed quote')}</w:txbxContent></mc:Choice>"
+		f"<mc:Fallback><w:txbxContent>{docx_paragraph('Boxed quote')}</w:txbxContent></mc:Fallback>"
+		"</mc:AlternateContent></w:p>"
+	)
+
+	assert _text([text_box, docx_paragraph("After")]) == "Intro Boxed quote\nAfter"
+
+
+def test_streaming_matches_the_whole_text():
+	data = build_docx([docx_paragraph(f"Paragraph {i}") for i in range(500)])
+
+	assert "".join(iter_docx_paragraphs(data)).split("\n") == [f"Paragraph {i}" for i in range(500)]
+
+
+def test_invalid_files_are_reported():
+	with pytest.raises(ValueError, match="Not a valid DOCX"):
+		list(iter_docx_paragraphs(b"not a zip"))
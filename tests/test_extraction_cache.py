@@ -0,0 +1,94 @@
+import os
+import sys
+import threading
+
+from utils.extraction_cache import ExtractionCache
+
+
+def _cache(tmp_path, memory_max_bytes=1024 * 1024, disk_max_bytes=1024 * 1024):
+	return ExtractionCache(str(tmp_path / "cache"), memory_max_bytes, disk_max_bytes)
+
+
+def _disk_total(cache):
+	return sum(size for _, size, _ in cache._scan_disk())
+
+
+def test_key_depends_on_content_extension_and_version():
+	key = ExtractionCache.make_key("a.pdf", b"data", "1")
+
+	assert ExtractionCache.make_key("renamed.PDF", b"data", "1") == key
+	assert ExtractionCache.make_key("a.pdf", memoryview(b"data"), "1") == key
+	assert ExtractionCache.make_key("a.txt", b"data", "1") != key
+	assert ExtractionCache.make_key("a.pdf", b"data", "2") != key
+	assert ExtractionCache.make_key("a.pdf", b"other", "1") != key
+
+
+def test_disk_tier_survives_a_new_process(tmp_path):
+	first = _cache(tmp_path)
+	first.put("ab" * 32, "extracted text")
+
+	second = _cache(tmp_path)
+
+	assert second.get("ab" * 32) == "extracted text"
+	assert second.stats().disk_hits == 1
+	assert second.get("cd" * 32) is None
+	assert second.stats().misses == 1
+
+
+def test_overwriting_an_entry_does_not_grow_the_disk_total(tmp_path):
+	cache = _cache(tmp_path)
+	for _ in range(5):
+		cache.put("ab" * 32, "x" * 1000)
+	cache.put("ab" * 32, "x" * 400)
+
+	assert cache.stats().disk_bytes == _disk_total(cache) == 400
+
+
+def test_disk_tier_evicts_least_recently_used_entries(tmp_path):
+	cache = _cache(tmp_path, disk_max_bytes=2500)
+	keys = [f"{i:02d}" * 32 for i in range(3)]
+	for i, key in enumerate(keys):
+		cache.put(key, "x" * 1000)
+		path = cache._path(key)
+		os.utime(path, (i, i))
+
+	cache.put("99" * 32, "x" * 1000)
+
+	assert not os.path.exists(cache._path(keys[0]))
+	assert os.path.exists(cache._path("99" * 32))
+	assert cache.stats().disk_bytes == _disk_total(cache) <= 2500
+
+
+def test_memory_tier_counts_bytes_not_characters(tmp_path):
+	text = "€" * 100
+	cache = _cache(tmp_path)
+	cache.put("ab" * 32, text)
+
+	assert cache.stats().memory_bytes == sys.getsizeof(text) > len(text)
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+	texts = {f"{i:02d}" * 32: str(i) * 1000 for i in range(3)}
+	cache = _cache(tmp_path, memory_max_bytes=sum(map(sys.getsizeof, texts.values())) - 1)
+	for key, text in texts.items():
+		cache.put(key, text)
+
+	assert list(cache._memory) == list(texts)[1:]
+	assert cache.stats().memory_bytes == sum(map(sys.getsizeof, cache._memory.values()))
+
+
+def test_concurrent_puts_keep_the_totals_consistent(tmp_path):
+	cache = _cache(tmp_path)
+
+	def put(n):
+		for i in range(20):
+			cache.put(f"{i % 5:02d}" * 32, str(n) * (100 + i))
+
+	threads = [threading.Thread(target=put, args=(n,)) for n in range(4)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	assert len(cache._memory) == 5
+	assert cache.stats().memory_bytes == sum(map(sys.getsizeof, cache._memory.values()))
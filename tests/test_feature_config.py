@@ -0,0 +1,71 @@
+import os
+
+from utils.feature_config import FeatureConfigService, normalise_skill_key
+
+_CONFIG = """
+feature_management:
+  agents:
+    "Skill > QuizzBot":
+      - alice
+    Media Planner:
+      - alice
+      - bob
+"""
+
+
+def _write(path, text, mtime):
+	path.write_text(text, encoding="utf-8")
+	os.utime(path, ns=(mtime, mtime))
+
+
+def test_missing_file_reports_the_error(tmp_path):
+	config = FeatureConfigService(str(tmp_path / "missing.yml")).get()
+
+	assert config.error == "Feature configuration file not found. All features will be available."
+	assert config.is_available("Skill > QuizzBot", "anyone")
+
+
+def test_users_are_indexed_to_normalised_skills(tmp_path):
+	path = tmp_path / "feature_config.yml"
+	_write(path, _CONFIG, 1_000_000_000)
+
+	config = FeatureConfigService(str(path)).get()
+
+	assert config.error is None
+	assert config.skills_for("bob") == {"media planner"}
+	assert config.is_available("Skill > quizzbot!", "alice")
+	assert not config.is_available("QuizzBot", "bob")
+	assert config.is_available("Unlisted skill", "bob")
+	assert normalise_skill_key("Playground > Media  Planner") == "media planner"
+
+
+def test_file_is_reread_only_when_it_changes(tmp_path):
+	path = tmp_path / "feature_config.yml"
+	_write(path, _CONFIG, 1_000_000_000)
+	service = FeatureConfigService(str(path))
+	first = service.get()
+
+	assert service.get() is first
+
+	_write(path, _CONFIG.replace("- bob", "- carol"), 2_000_000_000)
+	second = service.get()
+	assert second is not first
+	assert second.skills_for("carol") == {"media planner"}
+
+
+def test_broken_edit_keeps_the_last_good_config(tmp_path):
+	path = tmp_path / "feature_config.yml"
+	_write(path, _CONFIG, 1_000_000_000)
+	service = FeatureConfigService(str(path))
+	good = service.get()
+
+	_write(path, "feature_management: [unclosed", 2_000_000_000)
+
+	assert service.get() is good
+
+
+def test_broken_file_on_first_load_reports_the_error(tmp_path):
+	path = tmp_path / "feature_config.yml"
+	_write(path, "feature_management: [unclosed", 1_000_000_000)
+
+	assert FeatureConfigService(str(path)).get().error.startswith("Error parsing feature configuration")
@@ -0,0 +1,69 @@
+import pytest
+
+from benchmarks.corpus import make_pdf
+from utils import file_loader
+from utils.file_loader import _extract_text, _plan_tasks, _timed_extract_pdf_range, load_files_to_text
+
+
+@pytest.fixture(scope="module")
+def long_pdf():
+	return make_pdf(240, seed=1)
+
+
+@pytest.fixture
+def four_workers(monkeypatch):
+	monkeypatch.setattr(file_loader, "INGEST_MAX_WORKERS", 4)
+	monkeypatch.setattr(file_loader, "PDF_PARALLEL_MIN_PAGES", 100)
+	monkeypatch.setattr(file_loader, "PDF_MIN_PAGES_PER_TASK", 20)
+
+
+def test_unbudgeted_pdf_is_split_across_the_pool(long_pdf, four_workers):
+	tasks, rest = _plan_tasks(0, "report.pdf", long_pdf, None, None)
+
+	assert [args[2:4] for _, fn, args in tasks] == [(0, 60), (60, 120), (120, 180), (180, 240)]
+	assert all(fn is _timed_extract_pdf_range for _, fn, _ in tasks)
+	assert rest is None
+
+
+def test_budgeted_pdf_splits_only_the_pages_that_fill_the_budget(long_pdf, four_workers, monkeypatch):
+	monkeypatch.setattr(file_loader, "PDF_ESTIMATED_TOKENS_PER_PAGE", 100)
+
+	tasks, rest = _plan_tasks(0, "report.pdf", long_pdf, None, 10_000)
+
+	assert [args[2:4] for _, _, args in tasks] == [(0, 25), (25, 50), (50, 75), (75, 100)]
+	assert rest == (100, 240)
+
+
+def test_small_budget_is_read_in_one_pass(long_pdf, four_workers):
+	tasks, _ = _plan_tasks(0, "report.pdf", long_pdf, None, 2_000)
+
+	assert [fn for _, fn, _ in tasks] == [file_loader._timed_extract]
+
+
+@pytest.mark.parametrize("tokens_per_page, planned", [(500, (0, 120)), (1_500, (0, 40))])
+def test_budgeted_ranges_match_a_single_pass(long_pdf, four_workers, monkeypatch, tokens_per_page, planned):
+	# The corpus has about 870 tokens a page: 500 reads more pages than the budget
+	# needs, 1,500 too few, so the rest is read in a second pass
+	monkeypatch.setattr(file_loader, "PDF_ESTIMATED_TOKENS_PER_PAGE", tokens_per_page)
+	tasks, _ = _plan_tasks(0, "report.pdf", long_pdf, None, 60_000)
+	assert (tasks[0][2][2], tasks[-1][2][3]) == planned
+	expected = _extract_text("report.pdf", long_pdf, max_tokens=60_000)
+
+	[result] = load_files_to_text([("report.pdf", long_pdf)], use_cache=False, max_tokens=60_000)
+
+	assert result.ok
+	assert result.text == expected
+
+
+def test_unbudgeted_ranges_match_a_single_pass(long_pdf, four_workers):
+	[result] = load_files_to_text([("report.pdf", long_pdf)], use_cache=False)
+
+	assert result.text == _extract_text("report.pdf", long_pdf)
+
+
+def test_failures_are_reported_per_file():
+	results = load_files_to_text([("notes.txt", b"plain notes"), ("broken.pdf", b"not a pdf"), ("x.bin", b"")], use_cache=False)
+
+	assert results[0].text == "plain notes"
+	assert not results[1].ok
+	assert "Unsupported file type" in results[2].error
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services import job_queue
+from services.job_queue import BackgroundWorker, JobStatus
+
+
+@pytest.fixture
+def worker(monkeypatch):
+	monkeypatch.setattr(job_queue, "LLM_PREWARM_CONNECTIONS", False)
+	return BackgroundWorker(max_concurrent_jobs=1)
+
+
+def _wait(condition, timeout=5.0):
+	deadline = time.monotonic() + timeout
+	while not condition():
+		assert time.monotonic() < deadline, "timed out"
+		time.sleep(0.01)
+
+
+class _Cleanup:
+	def __init__(self):
+		self.calls = 0
+
+	def __call__(self):
+		self.calls += 1
+
+
+def test_successful_job_reports_its_result_and_cleans_up(worker):
+	cleanup = _Cleanup()
+
+	async def work(job):
+		job.report(0.5, "Halfway")
+		return 42
+
+	job = worker.submit("brief", work, cleanup=cleanup)
+	_wait(lambda: job.done)
+
+	assert (job.status, job.result, job.progress, job.message) == (JobStatus.SUCCEEDED, 42, 1.0, "Done")
+	assert job.finished_at >= job.started_at
+	assert cleanup.calls == 1
+
+
+def test_failing_job_reports_the_error(worker):
+	cleanup = _Cleanup()
+
+	async def work(job):
+		raise ValueError("bad research")
+
+	job = worker.submit("brief", work, cleanup=cleanup)
+	_wait(lambda: cleanup.calls)
+
+	assert (job.status, job.error) == (JobStatus.FAILED, "bad research")
+	assert cleanup.calls == 1
+
+
+def test_cancelling_a_running_job(worker):
+	started = threading.Event()
+	cleanup = _Cleanup()
+
+	async def work(job):
+		started.set()
+		await asyncio.sleep(30)
+
+	job = worker.submit("brief", work, cleanup=cleanup)
+	started.wait(5)
+
+	assert worker.cancel(job.id)
+	_wait(lambda: cleanup.calls)
+	assert job.status == JobStatus.CANCELLED
+	assert not worker.cancel(job.id)
+
+
+def test_cancelling_a_pending_job_releases_it_without_running(worker):
+	release = threading.Event()
+	ran = []
+
+	async def blocker(job):
+		while not release.is_set():
+			await asyncio.sleep(0.01)
+
+	async def work(job):
+		ran.append(job.id)
+
+	first = worker.submit("brief", blocker)
+	cleanup = _Cleanup()
+	pending = worker.submit("brief", work, cleanup=cleanup)
+	_wait(lambda: first.status == JobStatus.RUNNING)
+
+	assert worker.cancel(pending.id)
+	assert cleanup.calls == 1
+	release.set()
+	_wait(lambda: first.done)
+	time.sleep(0.05)
+	assert pending.status == JobStatus.CANCELLED
+	assert ran == []
+	assert cleanup.calls == 1
+
+
+def test_job_that_swallows_cancellation_stays_cancelled(worker):
+	started = threading.Event()
+	cleanup = _Cleanup()
+
+	async def work(job):
+		started.set()
+		try:
+			await asyncio.sleep(30)
+		except asyncio.CancelledError:
+			return "finished anyway"
+
+	job = worker.submit("brief", work, cleanup=cleanup)
+	started.wait(5)
+	worker.cancel(job.id)
+	_wait(lambda: cleanup.calls)
+
+	assert job.status == JobStatus.CANCELLED
+	assert job.result is None
+
+
+def test_finished_jobs_can_be_discarded_and_expire(worker):
+	async def work(job):
+		return "ok"
+
+	job = worker.submit("brief", work)
+	_wait(lambda: job.done)
+	worker.discard(job.id)
+	assert worker.get(job.id) is None
+
+	worker.job_ttl_seconds = 0
+	old = worker.submit("brief", work)
+	_wait(lambda: old.done)
+	worker.submit("brief", work)
+	assert worker.get(old.id) is None
@@ -0,0 +1,36 @@
+import asyncio
+
+from models.campaign_brief import CampaignBrief
+from services.llm_pool import get_rate_limiter
+from services.model_router import ModelRouter
+from utils.tracing import capture_spans
+
+MESSAGES = [("system", "Write a campaign brief."), ("user", "Grow trial among students.")]
+
+
+def _trace(streaming):
+	async def run():
+		router = ModelRouter(get_rate_limiter(), enabled=False)
+		if not streaming:
+			return await router.invoke(CampaignBrief, "brief", MESSAGES, 100)
+		async for update in router.stream(CampaignBrief, "brief", MESSAGES, 100):
+			if update.final:
+				return update.parsed
+
+	with capture_spans() as spans:
+		parsed = asyncio.run(run())
+	return parsed, spans
+
+
+def test_invoke_and_stream_record_the_same_spans():
+	for streaming in (False, True):
+		parsed, spans = _trace(streaming)
+		by_name = {span.name: span for span in spans}
+		call, parse = by_name["llm.call"], by_name["llm.parse"]
+
+		assert parse.parent_id == call.span_id
+		assert call.attributes["streaming"] is streaming
+		assert call.attributes["parsed"] is True
+		assert parse.attributes["parsed"] is True
+		assert (call.attributes["input_tokens"], call.attributes["output_tokens"]) == (parsed.input_tokens, parsed.output_tokens)
+		assert parsed.output_tokens > 0
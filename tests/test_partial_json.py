@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from utils.partial_json import parse_partial_json
+
+
+def test_complete_json_matches_json_loads():
+	text = '{"name": "Launch", "budget": 12.5, "channels": ["tv", "social"], "live": true, "notes": null}'
+	assert parse_partial_json(text) == json.loads(text)
+
+
+def test_truncated_objects_and_arrays_are_closed():
+	assert parse_partial_json('{"a": 1, "b": [1, 2, {"c": "x"') == {"a": 1, "b": [1, 2, {"c": "x"}]}
+
+
+def test_cut_off_string_is_kept_or_dropped_with_its_key():
+	text = '{"a": 1, "b": "half a sent'
+	assert parse_partial_json(text) == {"a": 1, "b": "half a sent"}
+	assert parse_partial_json(text, keep_partial_strings=False) == {"a": 1}
+
+
+def test_dangling_escape_is_dropped():
+	assert parse_partial_json('{"a": "line\\') == {"a": "line"}
+	assert parse_partial_json('{"a": "caf\\u00') == {"a": "caf"}
+
+
+@pytest.mark.parametrize("text, expected", [
+	('{"a": 12', {}),
+	('{"a": tr', {}),
+	('{"a": 1, "b"', {"a": 1}),
+	('{"a": 1, "b":', {"a": 1}),
+	('[1, 2, 3', [1, 2]),
+])
+def test_incomplete_scalars_and_keys_are_dropped(text, expected):
+	assert parse_partial_json(text) == expected
+
+
+def test_empty_input_is_none():
+	assert parse_partial_json("   ") is None
+
+
+def test_malformed_input_raises_value_error():
+	with pytest.raises(ValueError):
+		parse_partial_json('{"a": nope}')
+	with pytest.raises(ValueError):
+		parse_partial_json("{a: 1}")
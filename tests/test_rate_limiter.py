@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+
+from services.llm_pool import SharedRateLimiter
+
+
+def test_requests_wait_for_the_request_rate():
+	limiter = SharedRateLimiter(max_rate=2, time_period=0.2, tokens_per_minute=1_000_000)
+
+	async def run():
+		start = time.monotonic()
+		for _ in range(4):
+			async with limiter.limit():
+				pass
+		return time.monotonic() - start
+
+	# Two requests from the full bucket, then one every 0.1s
+	assert 0.15 <= asyncio.run(run()) < 1.0
+
+
+def test_tokens_wait_for_the_token_rate():
+	limiter = SharedRateLimiter(max_rate=100, time_period=1, tokens_per_minute=6_000)
+
+	async def run():
+		async with limiter.limit(6_000):
+			pass
+		start = time.monotonic()
+		async with limiter.limit(30):
+			pass
+		return time.monotonic() - start
+
+	# 30 tokens refill in 0.3s at 100 tokens a second
+	assert 0.25 <= asyncio.run(run()) < 1.0
+
+
+def test_oversized_requests_are_capped_to_the_bucket():
+	limiter = SharedRateLimiter(max_rate=10, time_period=1, tokens_per_minute=1_000)
+
+	async def run():
+		async with limiter.limit(50_000) as reservation:
+			return reservation.tokens
+
+	assert asyncio.run(run()) == 1_000
+
+
+def test_settling_returns_unused_tokens():
+	limiter = SharedRateLimiter(max_rate=100, time_period=1, tokens_per_minute=6_000)
+
+	async def run():
+		async with limiter.limit(6_000) as reservation:
+			reservation.settle(1_000)
+		start = time.monotonic()
+		async with limiter.limit(4_000):
+			pass
+		return time.monotonic() - start
+
+	assert asyncio.run(run()) < 0.2
+
+
+def test_limit_is_shared_across_event_loops():
+	limiter = SharedRateLimiter(max_rate=4, time_period=0.4, tokens_per_minute=1_000_000)
+	finished = []
+
+	def session():
+		async def run():
+			for _ in range(3):
+				async with limiter.limit():
+					pass
+		asyncio.run(run())
+		finished.append(time.monotonic())
+
+	start = time.monotonic()
+	threads = [threading.Thread(target=session) for _ in range(4)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	# 12 requests: 4 from the full bucket, 8 more at 10 a second
+	assert max(finished) - start >= 0.7
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+
+from models.campaign_brief import CampaignBrief
+from utils.response_cache import ResponseCache, normalise_text
+
+_BRIEF = CampaignBrief(
+	title="Spring launch",
+	objective_summary="Grow trial",
+	target_audience=["students"],
+	key_insights=["price sensitive"],
+	value_proposition="Cheaper coffee",
+	messaging_pillars=["value"],
+	channels=["social"],
+	recommendations=["sampling"],
+	kpis=["trial rate"],
+	input_tokens=1200,
+	model_name="gpt-4o",
+)
+
+
+def _cache(tmp_path, ttl_seconds=3600, max_entries=100):
+	return ResponseCache(str(tmp_path / "responses.sqlite3"), ttl_seconds, max_entries)
+
+
+def test_round_trip_keeps_accounting_fields(tmp_path):
+	cache = _cache(tmp_path)
+	cache.put("k", "brief", _BRIEF)
+
+	cached = cache.get("k", CampaignBrief)
+
+	assert cached == _BRIEF
+	assert cached.input_tokens == 1200
+	assert (cache.hits, cache.misses) == (1, 0)
+	assert cache.get("other", CampaignBrief) is None
+	assert cache.misses == 1
+
+
+def test_entries_survive_a_new_process(tmp_path):
+	_cache(tmp_path).put("k", "brief", _BRIEF)
+
+	assert _cache(tmp_path).get("k", CampaignBrief) == _BRIEF
+
+
+def test_keys_ignore_case_and_spacing_of_normalised_text():
+	objectives = normalise_text("  Grow   TRIAL\namong students ")
+
+	assert objectives == "grow trial among students"
+	assert ResponseCache.make_key("brief", objectives=objectives, model="a") == ResponseCache.make_key("brief", model="a", objectives=objectives)
+	assert ResponseCache.make_key("brief", objectives=objectives, model="a") != ResponseCache.make_key("brief", objectives=objectives, model="b")
+	assert ResponseCache.make_key("brief", objectives=objectives) != ResponseCache.make_key("media_plan", objectives=objectives)
+
+
+def test_expired_entries_are_not_served(tmp_path):
+	cache = _cache(tmp_path, ttl_seconds=0.2)
+	cache.put("k", "brief", _BRIEF)
+	time.sleep(0.3)
+
+	assert cache.get("k", CampaignBrief) is None
+
+
+def test_least_recently_used_entries_are_dropped(tmp_path):
+	cache = _cache(tmp_path, max_entries=2)
+	cache.put("a", "brief", _BRIEF)
+	time.sleep(0.01)
+	cache.put("b", "brief", _BRIEF)
+	time.sleep(0.01)
+	cache.get("a", CampaignBrief)
+	time.sleep(0.01)
+	cache.put("c", "brief", _BRIEF)
+
+	assert cache.get("a", CampaignBrief) is not None
+	assert cache.get("b", CampaignBrief) is None
+	assert cache.get("c", CampaignBrief) is not None
+
+
+def test_concurrent_writers_and_readers(tmp_path):
+	cache = _cache(tmp_path)
+	errors = []
+
+	def session(n):
+		try:
+			for i in range(20):
+				cache.put(f"{n}-{i}", "brief", _BRIEF)
+				assert cache.get(f"{n}-{i}", CampaignBrief) == _BRIEF
+		except Exception as e:
+			errors.append(e)
+
+	threads = [threading.Thread(target=session, args=(n,)) for n in range(4)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	assert errors == []
+	assert cache.hits == 80
+
+
+def test_brief_service_serves_repeated_requests_from_the_cache():
+	from services.brief_service import BriefService
+
+	async def run(research):
+		service = BriefService()
+		return await service.generate_brief(research, "Grow trial among students"), await service.generate_brief(research, "grow  trial among STUDENTS")
+
+	research = f"Coffee research {time.time()}: students buy oat milk lattes."
+	first, second = asyncio.run(run(research))
+
+	assert not first.from_cache
+	assert second.from_cache
+	assert second.model_dump(exclude={"from_cache"}) == first.model_dump(exclude={"from_cache"})
@@ -0,0 +1,51 @@
+from utils.retrieval import retrieve_research, split_passages
+from utils.token_counter import count_tokens
+
+
+def _filler(topic, count):
+	return "\n\n".join(f"Paragraph {i} about {topic} with some general background wording for padding." for i in range(count))
+
+
+def test_research_within_budget_is_returned_whole():
+	documents = [("a.txt", "Coffee sales grew."), ("b.txt", "Tea sales fell.")]
+
+	retrieved = retrieve_research(documents, "coffee", budget_tokens=1000)
+
+	assert not retrieved.filtered
+	assert retrieved.text == "### Source: a.txt\n\nCoffee sales grew.\n\n### Source: b.txt\n\nTea sales fell."
+
+
+def test_passages_are_bounded_and_keep_their_document():
+	passages = split_passages("a.txt", _filler("coffee", 40), max_tokens=50, document=3)
+
+	assert len(passages) > 1
+	assert all(passage.tokens <= 50 and passage.document == 3 for passage in passages)
+	assert [passage.position for passage in passages] == list(range(len(passages)))
+
+
+def test_relevant_passages_are_chosen_within_budget_in_document_order():
+	relevant = "Oat milk lattes drove espresso growth among students."
+	documents = [("market.txt", _filler("weather", 60) + "\n\n" + relevant + "\n\n" + _filler("shipping", 60))]
+
+	retrieved = retrieve_research(documents, "oat milk espresso students", budget_tokens=300)
+
+	assert retrieved.filtered
+	assert relevant in retrieved.text
+	assert retrieved.selected_tokens <= 300
+	assert count_tokens(retrieved.text) <= 300 + 20
+	positions = [passage.position for passage in retrieved.passages]
+	assert positions == sorted(positions)
+
+
+def test_documents_sharing_a_file_name_stay_apart():
+	documents = [
+		("notes.txt", _filler("weather", 30) + "\n\nArabica beans doubled in price."),
+		("notes.txt", _filler("shipping", 30) + "\n\nIndependent coffee shops closed."),
+	]
+
+	retrieved = retrieve_research(documents, "arabica beans coffee shops", budget_tokens=300)
+
+	assert retrieved.filtered
+	assert retrieved.text.count("### Source: notes.txt") == 2
+	assert {passage.document for passage in retrieved.passages} == {0, 1}
+	assert "Arabica" in retrieved.text and "Independent" in retrieved.text
@@ -0,0 +1,66 @@
+import json
+
+from models.campaign_brief import CampaignBrief
+from services.structured_repair import output_fields, plan_repair, repair_schema
+
+_BRIEF = {
+	"title": "Spring launch",
+	"objective_summary": "Grow trial",
+	"target_audience": ["students"],
+	"key_insights": ["price sensitive"],
+	"value_proposition": "Cheaper coffee",
+	"messaging_pillars": ["value"],
+	"channels": ["social"],
+	"recommendations": ["sampling"],
+	"kpis": ["trial rate"],
+}
+
+
+def test_accounting_fields_are_not_requested():
+	fields = output_fields(CampaignBrief)
+
+	assert "title" in fields and "timeline" in fields
+	assert not {"input_tokens", "model_name", "from_cache"} & set(fields)
+
+
+def test_truncated_reply_keeps_complete_fields_and_drops_the_last():
+	text = json.dumps(_BRIEF)
+	cut = text[:text.index('"channels"') + len('"channels": ["soc')]
+
+	plan = plan_repair(CampaignBrief, cut)
+
+	assert plan.truncated
+	assert list(plan.kept) == ["title", "objective_summary", "target_audience", "key_insights", "value_proposition", "messaging_pillars"]
+	assert plan.fields == ("channels", "recommendations", "kpis", "budget_guidance", "timeline")
+	assert "cut off" in plan.problem
+
+
+def test_invalid_field_is_requested_again():
+	plan = plan_repair(CampaignBrief, json.dumps({**_BRIEF, "kpis": "trial rate"}))
+
+	assert not plan.truncated
+	assert plan.fields == ("kpis",)
+	assert "kpis" not in plan.kept
+	assert "kpis was invalid" in plan.problem
+
+
+def test_missing_required_field_is_requested_but_not_optional_ones():
+	reply = {name: value for name, value in _BRIEF.items() if name != "channels"}
+
+	plan = plan_repair(CampaignBrief, json.dumps(reply))
+
+	assert plan.fields == ("channels",)
+	assert plan.problem == "it was missing channels"
+
+
+def test_nothing_to_salvage():
+	assert plan_repair(CampaignBrief, "not json at all") is None
+	assert plan_repair(CampaignBrief, "[1, 2]") is None
+	assert plan_repair(CampaignBrief, json.dumps(_BRIEF)) is None
+
+
+def test_repair_schema_is_reused_and_limited_to_the_fields():
+	schema = repair_schema(CampaignBrief, ("channels", "kpis"))
+
+	assert schema is repair_schema(CampaignBrief, ("channels", "kpis"))
+	assert set(schema.model_json_schema()["properties"]) == {"channels", "kpis"}
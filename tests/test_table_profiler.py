@@ -0,0 +1,131 @@
+import io
+import math
+import random
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+from utils import table_profiler
+from utils import file_loader
+from utils.file_loader import load_file_to_text
+from utils.table_profiler import ColumnProfile, TableProfiler
+
+
+def _values(count, seed=0):
+	rng = random.Random(seed)
+	return [rng.gauss(100, 15) for _ in range(count)]
+
+
+def test_row_by_row_statistics_match_pandas():
+	values = _values(1000)
+	column = ColumnProfile("spend")
+	for value in values:
+		column.add(value)
+
+	expected = pd.Series(values).describe()
+	stats = column.describe()
+	for key in ("count", "mean", "std", "min", "25%", "50%", "75%", "max"):
+		assert stats[key] == pytest.approx(expected[key])
+
+
+def test_reservoir_stays_bounded_and_quantiles_stay_close(monkeypatch):
+	monkeypatch.setattr(table_profiler, "RESERVOIR_SIZE", 500)
+	values = _values(20000, seed=2)
+	column = ColumnProfile("spend")
+	for value in values:
+		column.add(value)
+
+	assert len(column.reservoir) == 500
+	assert column.quantile(0.5) == pytest.approx(float(pd.Series(values).median()), abs=3)
+
+
+def test_heavy_hitters_survive_a_long_tail(monkeypatch):
+	monkeypatch.setattr(table_profiler, "HEAVY_HITTER_CAPACITY", 10)
+	column = ColumnProfile("region")
+	for i in range(2000):
+		column.add("north" if i % 3 == 0 else f"town-{i}")
+
+	assert len(column.counts) <= 10
+	assert column.top_values(1)[0][0] == "north"
+
+
+def test_missing_and_mixed_values():
+	column = ColumnProfile("mixed")
+	for value in (None, math.nan, "  ", 3, True):
+		column.add(value)
+
+	assert (column.numeric_count, column.text_count, column.other_count) == (1, 0, 1)
+	assert not column.is_numeric
+	assert math.isnan(column.std())
+
+
+def test_excel_sheets_are_summarised_in_one_pass():
+	workbook = openpyxl.Workbook()
+	sheet = workbook.active
+	sheet.title = "Spend"
+	sheet.append(["channel", "spend"])
+	for i, value in enumerate(_values(50, seed=4)):
+		sheet.append([["tv", "social"][i % 2], value])
+	workbook.create_sheet("Empty")
+	out = io.BytesIO()
+	workbook.save(out)
+
+	text = load_file_to_text("plan.xlsx", out.getvalue(), use_cache=False)
+
+	assert "Number of sheets: 2" in text
+	assert "Sheet names: Spend, Empty" in text
+	assert "Columns: channel, spend" in text and "Rows: 50" in text
+	assert "Numeric Column Statistics:" in text
+	assert "Sheet is empty." in text
+
+
+def test_chunked_statistics_match_row_by_row():
+	values = _values(5000, seed=1)
+	by_row = ColumnProfile("spend")
+	for value in values:
+		by_row.add(value)
+	by_chunk = ColumnProfile("spend")
+	for start in range(0, len(values), 700):
+		by_chunk.add_numbers(np.array(values[start:start + 700]))
+
+	assert by_chunk.numeric_count == by_row.numeric_count
+	assert by_chunk.mean == pytest.approx(by_row.mean)
+	assert by_chunk.std() == pytest.approx(by_row.std())
+	assert (by_chunk.min, by_chunk.max) == (by_row.min, by_row.max)
+
+
+def test_chunked_reservoir_stays_bounded(monkeypatch):
+	monkeypatch.setattr(table_profiler, "RESERVOIR_SIZE", 500)
+	values = _values(20000, seed=2)
+	column = ColumnProfile("spend")
+	for start in range(0, len(values), 3000):
+		column.add_numbers(np.array(values[start:start + 3000]))
+
+	assert len(column.reservoir) == 500
+	assert column.quantile(0.5) == pytest.approx(float(np.median(values)), abs=3)
+
+
+def test_frame_chunks_and_rows_give_the_same_report():
+	df = pd.DataFrame({"channel": ["tv", "social", "search", None] * 25, "spend": _values(100, seed=3)})
+	by_frame = TableProfiler(list(df.columns))
+	for start in range(0, len(df), 30):
+		by_frame.add_frame(df.iloc[start:start + 30])
+	by_row = TableProfiler(list(df.columns))
+	by_row.add_rows(df.astype(object).where(df.notna(), None).values.tolist())
+
+	assert by_frame.rows == by_row.rows == 100
+	assert by_frame.format_text("Media") == by_row.format_text("Media")
+
+
+def test_csv_is_read_in_chunks_with_a_sampled_encoding(monkeypatch):
+	monkeypatch.setattr(file_loader, "_CSV_CHUNK_ROWS", 7)
+	rows = [f"caf\xe9 {i % 3},{value}" for i, value in enumerate(_values(40, seed=5))]
+	data = ("name,spend\n" + "\n".join(rows)).encode("latin-1")
+
+	text = load_file_to_text("spend.csv", data, use_cache=False)
+
+	assert text.startswith("CSV Data:")
+	assert "Rows: 40" in text
+	assert "caf\xe9 0" in text
@@ -1,47 +1,208 @@
 import streamlit as st
 import asyncio
-from typing import List
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from models.campaign_brief import CampaignBrief
 from services.brief_service import BriefService
-from utils.file_loader import load_file_to_text
-from config.settings import INPUT_COST, OUTPUT_COST
-from ui.media_plan_generator import render_media_plan_generator
+from services.job_queue import Job, JobStatus, get_worker
+from utils.file_loader import FileExtractionResult, load_files_to_text
+from utils.extraction_cache import get_extraction_cache
+from utils.dedup import remove_near_duplicates
+from utils.retrieval import retrieve_research
+from utils.token_cost import calculate_cost
+from utils.upload_spool import SpooledFile, spool_upload
+from config.settings import (
+	MODEL, INGEST_MAX_TOKENS_PER_FILE, STREAMING_ENABLED, PIPELINE_SPECULATIVE_MEDIA_PLAN
+)
+from ui.job_status import poll_job, submit_job
+from ui.rendering import render_once
+from ui.session_artifacts import get_artifact, put_artifact
+from ui.trace_view import render_trace_waterfall, traced_render
+from ui.media_plan_generator import (
+	DEFAULT_MEDIA_PROMPT, media_plan_request_key, render_media_plan_generator, start_speculative_media_plan
+)
 
 
-def _display_brief(brief):
+_BRIEF_SECTIONS = (
+	("Objective Summary", "objective_summary"),
+	("Target Audience", "target_audience"),
+	("Key Insights", "key_insights"),
+	("Value Proposition", "value_proposition"),
+	("Messaging Pillars", "messaging_pillars"),
+	("Recommended Channels", "channels"),
+	("Recommendations", "recommendations"),
+	("KPIs", "kpis"),
+	("Budget Guidance", "budget_guidance"),
+	("Timeline", "timeline"),
+)
+
+
+def _brief_markdown(data: dict) -> str:
+	"""Markdown for the fields of a brief (or of a streaming brief's partial dict) that have values."""
+	parts = [f"**Title**: {data.get('title', '')}"]
+	for title, key in _BRIEF_SECTIONS:
+		value = data.get(key)
+		if not value:
+			continue
+		parts.append(f"**{title}**")
+		parts.append("\n".join(f"- {item}" for item in value) if isinstance(value, list) else str(value))
+	return "\n\n".join(parts)
+
+
+def _display_brief(brief, partial: bool = False):
+	"""Render a CampaignBrief, or whichever fields of a streaming brief (a dict) have arrived."""
 	st.subheader("Campaign Brief")
-	st.markdown(f"**Title**: {brief.title}")
-	st.markdown("**Objective Summary**")
-	st.write(brief.objective_summary)
-
-	def _render_list(title: str, items: List[str]):
-		if items:
-			st.markdown(f"**{title}**")
-			for it in items:
-				st.write(f"- {it}")
-
-	_render_list("Target Audience", brief.target_audience)
-	_render_list("Key Insights", brief.key_insights)
-	st.markdown("**Value Proposition**")
-	st.write(brief.value_proposition)
-	_render_list("Messaging Pillars", brief.messaging_pillars)
-	_render_list("Recommended Channels", brief.channels)
-	_render_list("Recommendations", brief.recommendations)
-	_render_list("KPIs", brief.kpis)
-	if brief.budget_guidance:
-		st.markdown("**Budget Guidance**")
-		st.write(brief.budget_guidance)
-	if brief.timeline:
-		st.markdown("**Timeline**")
-		st.write(brief.timeline)
+	if partial:
+		st.markdown(_brief_markdown(brief))
+	else:
+		# A finished brief never changes, so its markdown is built once
+		st.markdown(render_once(brief, lambda b: _brief_markdown(b.model_dump())))
 
+
+def _display_brief_usage(brief: CampaignBrief):
+	input_tokens = brief.input_tokens + brief.summarisation_input_tokens
+	output_tokens = brief.output_tokens + brief.summarisation_output_tokens
 	col_a, col_b, col_c = st.columns(3)
-	col_a.metric("Input Tokens", brief.input_tokens)
-	col_b.metric("Output Tokens", brief.output_tokens)
+	col_a.metric("Input Tokens", input_tokens)
+	col_b.metric("Output Tokens", output_tokens)
+	cost = 0.0 if brief.from_cache else (
+		calculate_cost(brief.model_name or MODEL, brief.input_tokens, brief.output_tokens)
+		+ calculate_cost(MODEL, brief.summarisation_input_tokens, brief.summarisation_output_tokens)
+	)
 	col_c.metric(
 		"Cost (in $)",
-		f"{(brief.input_tokens * INPUT_COST/1000 + brief.output_tokens * OUTPUT_COST/1000):.4f}",
-		help="Estimated cost based on token usage"
+		f"{cost:.4f}",
+		help="Estimated cost based on token usage, including research summarisation"
+	)
+	if brief.model_name:
+		st.caption(f"Generated by {brief.model_name}")
+	if brief.from_cache:
+		st.caption("Served from the response cache at no API cost.")
+	if 0 <= brief.packed_research_tokens < brief.research_tokens:
+		st.caption(
+			f"Research condensed from {brief.research_tokens:,} to {brief.packed_research_tokens:,} tokens "
+			f"({brief.research_tokens - brief.packed_research_tokens:,} saved) using "
+			f"{brief.summarisation_input_tokens + brief.summarisation_output_tokens:,} summarisation tokens"
+		)
+
+
+def _brief_section(brief: CampaignBrief):
+	"""The finished brief and its trace."""
+	with traced_render("brief_render_parent", "render.brief"):
+		_display_brief(brief)
+	render_trace_waterfall(st.session_state.get("brief_trace_id"))
+
+
+@dataclass
+class ResearchSelection:
+	"""Token counts of the retrieval step, kept for display without the research text"""
+	original_tokens: int
+	selected_tokens: int
+	passages_per_source: Dict[str, int]
+	duplicate_paragraphs: int = 0
+	duplicate_bytes: int = 0
+	duplicate_tokens: int = 0
+
+	@property
+	def filtered(self) -> bool:
+		return self.selected_tokens < self.original_tokens
+
+
+@dataclass
+class BriefJobResult:
+	brief: CampaignBrief
+	extraction: List[FileExtractionResult]
+	retrieval: Optional[ResearchSelection] = None
+	media_job_id: Optional[str] = None  # speculative media plan started in pipeline mode
+	media_key: Optional[str] = None
+
+
+def _display_extraction_details(results: List[FileExtractionResult], retrieval: Optional[ResearchSelection] = None):
+	with st.expander("File extraction details", expanded=False):
+		for result in results:
+			status = "cached" if result.cached else ("ok" if result.ok else f"failed: {result.error}")
+			passages = ""
+			if retrieval is not None and retrieval.filtered:
+				passages = f", {retrieval.passages_per_source.get(result.filename, 0)} passages used"
+			st.write(f"- {result.filename}: {result.elapsed_seconds:.2f}s ({status}{passages})")
+		if retrieval is not None and retrieval.duplicate_paragraphs:
+			st.caption(
+				f"Removed {retrieval.duplicate_paragraphs:,} duplicate paragraphs repeated across files "
+				f"({retrieval.duplicate_bytes / 1024:,.1f} KB, {retrieval.duplicate_tokens:,} tokens)"
+			)
+		if retrieval is not None and retrieval.filtered:
+			st.caption(
+				f"Research narrowed from {retrieval.original_tokens:,} to {retrieval.selected_tokens:,} tokens: "
+				f"the passages that best match the objectives were sent to the model"
+			)
+		stats = get_extraction_cache().stats()
+		st.caption(f"Extraction cache: {stats.hits} hits ({stats.memory_hits} memory, {stats.disk_hits} disk), {stats.misses} misses")
+
+
+async def _brief_job(
+	job: Job,
+	files: List[Tuple[str, SpooledFile]],
+	objectives: str,
+	system_prompt: str | None,
+	media_prompt: str | None = None,
+) -> BriefJobResult:
+	"""Extract the research files and generate a brief; runs on the background worker.
+
+	With a media_prompt (pipeline mode) the media plan is started as soon as
+	the brief is parsed, without waiting for the user to ask for it.
+	"""
+	job.report(0.05, "Extracting research files...")
+	try:
+		# to_thread (unlike run_in_executor) carries the job's tracing context into the thread
+		results = await asyncio.to_thread(load_files_to_text, files, max_tokens=INGEST_MAX_TOKENS_PER_FILE)
+	finally:
+		# Freed as soon as they are read; the job's cleanup covers a job cancelled before it ran
+		_release_files(files)
+	documents = [(result.filename, result.text) for result in results if result.ok]
+	# Keep only the per-file metadata; documents holds the only copy of the text
+	results = [replace(result, text="") for result in results]
+	if not documents:
+		raise ValueError("; ".join(f"Failed to read {result.filename}: {result.error}" for result in results))
+	# Drop paragraphs repeated across files (e.g. v1/v2 of a deck), then keep only the
+	# passages relevant to the objectives when the research is over budget
+	deduped = await asyncio.to_thread(remove_near_duplicates, documents)
+	retrieved = await asyncio.to_thread(retrieve_research, deduped.documents, objectives)
+	# Only the selected research is needed from here on; its segments are joined
+	# once, into the prompt, rather than into a copy of the context here
+	del documents
+	deduped.documents = []
+
+	job.report(0.3, "Generating brief...")
+	service = BriefService()
+	if STREAMING_ENABLED:
+		async for update in service.stream_brief(retrieved.segments, objectives, system_prompt):
+			job.partial = update.partial
+			brief = update.parsed
+	else:
+		brief = await service.generate_brief(retrieved.segments, objectives, system_prompt)
+	selection = ResearchSelection(
+		retrieved.original_tokens, retrieved.selected_tokens, retrieved.passages_per_source(),
+		deduped.removed_paragraphs, deduped.removed_bytes, deduped.removed_tokens,
 	)
+	outcome = BriefJobResult(brief, results, selection)
+	if media_prompt:
+		outcome.media_job_id = start_speculative_media_plan(brief, media_prompt).id
+		outcome.media_key = media_plan_request_key(brief, media_prompt)
+	return outcome
+
+
+def _release_files(files: List[Tuple[str, SpooledFile]]):
+	for _, spooled in files:
+		spooled.release()
+
+
+def _cancel_media_jobs():
+	"""Cancel media plan jobs (requested or speculative) that belong to the current brief."""
+	worker = get_worker()
+	worker.cancel(st.session_state.pop("media_plan_job_id", None))
+	worker.cancel(st.session_state.pop("speculative_media_job_id", None))
+	st.session_state.pop("speculative_media_key", None)
 
 
 def render_brief_generator():
@@ -59,6 +220,12 @@ def render_brief_generator():
 	advanced = st.expander("Advanced settings", expanded=False)
 	with advanced:
 		custom_prompt = st.text_area("System prompt (optional)", value="")
+		pipeline = st.checkbox(
+			"Start the media plan as soon as the brief is ready",
+			value=PIPELINE_SPECULATIVE_MEDIA_PLAN,
+			help="Generates the media plan in the background while you review the brief. "
+			"It is discarded if you change the media planning prompt.",
+		)
 
 	if st.button("Generate Brief"):
 		if not objectives.strip():
@@ -68,30 +235,48 @@ def render_brief_generator():
 			st.warning("Please upload at least one research file.")
 			return
 
-		with st.spinner("Generating brief..."):
-			# Load research files into a single context string
-			texts: List[str] = []
-			for uf in uploaded_files:
-				try:
-					texts.append(load_file_to_text(uf.name, uf.getvalue()))
-				except Exception as e:
-					st.error(f"Failed to read {uf.name}: {e}")
-					return
-			research_context = "\n\n".join(texts)
-
-			service = BriefService()
-			brief = asyncio.run(service.generate_brief(research_context, objectives, custom_prompt or None))
-
-			# Store in session state (key change)
-			st.session_state.campaign_brief = brief
-			st.session_state.media_plan = None
+		# Spooled to disk: the job and ingest workers read the files by path, not from copies in memory
+		files = [(uf.name, spool_upload(uf)) for uf in uploaded_files]
+		_cancel_media_jobs()
+		submit_job("brief_job_id", "brief", partial(
+			_brief_job, files=files, objectives=objectives, system_prompt=custom_prompt or None,
+			media_prompt=(st.session_state.get("media_prompt") or DEFAULT_MEDIA_PROMPT) if pipeline else None,
+		), cleanup=partial(_release_files, files))
+
+	# Collect the brief once the background job finishes
+	job = poll_job("brief_job_id", render_partial=partial(_display_brief, partial=True))
+	if job is not None:
+		if job.status == JobStatus.SUCCEEDED:
+			# Session state keeps handles; the brief itself lives in the artifact store
+			put_artifact("campaign_brief", job.result.brief)
+			put_artifact("brief_extraction", job.result.extraction, List[FileExtractionResult])
+			st.session_state.brief_retrieval = job.result.retrieval
+			put_artifact("media_plan", None)
 			st.session_state.media_plan_generated = False
 			st.session_state.media_plan_key = 0
+			# A media plan still being generated belongs to the previous brief
+			_cancel_media_jobs()
+			if job.result.media_job_id:
+				st.session_state.speculative_media_job_id = job.result.media_job_id
+				st.session_state.speculative_media_key = job.result.media_key
+			st.session_state.brief_trace_id = job.span.trace_id
+			st.session_state.brief_render_parent = job.span
+		elif job.status == JobStatus.FAILED:
+			st.error(f"Failed to generate brief: {job.error}")
+			render_trace_waterfall(job.span.trace_id if job.span else None)
+
+	extraction = get_artifact("brief_extraction")
+	if extraction is not None:
+		for result in extraction:
+			if not result.ok:
+				st.error(f"Failed to read {result.filename}: {result.error}")
+		_display_extraction_details(extraction, st.session_state.get("brief_retrieval"))
 
 	# Always show brief if it exists
-	if "campaign_brief" in st.session_state:
-		_display_brief(st.session_state.campaign_brief)
+	campaign_brief = get_artifact("campaign_brief")
+	if campaign_brief is not None:
+		_brief_section(campaign_brief)
+		_display_brief_usage(campaign_brief)
 
-	# Always show media plan generator if brief exists
-	if "campaign_brief" in st.session_state:
-		render_media_plan_generator(st.session_state.campaign_brief)
+		# Always show media plan generator if brief exists
+		render_media_plan_generator(campaign_brief)
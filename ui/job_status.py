@@ -0,0 +1,50 @@
+import time
+from typing import Any, Callable, Optional
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+from config.settings import JOB_POLL_INTERVAL_SECONDS
+from services.job_queue import Job, get_worker
+
+
+def submit_job(state_key: str, kind: str, fn, cleanup=None) -> Job:
+	"""Submit fn(job) to the background worker and remember it in session state, replacing any earlier job."""
+	worker = get_worker()
+	worker.cancel(st.session_state.get(state_key))
+	job = worker.submit(kind, fn, cleanup=cleanup)
+	st.session_state[state_key] = job.id
+	return job
+
+
+def poll_job(
+	state_key: str,
+	render_partial: Optional[Callable[[Any], None]] = None,
+	in_fragment: bool = False,
+) -> Optional[Job]:
+	"""Return the finished job stored under state_key, if any.
+
+	While the job is still running this shows its progress (and its partial
+	result through render_partial) and reruns the script after a short pause,
+	so the script runner is never blocked on the LLM round-trip and the job
+	survives reruns. Called from a fragment (in_fragment=True), only the
+	fragment is rerun when Streamlit allows it.
+	"""
+	job = get_worker().get(st.session_state.get(state_key))
+	if job is None:
+		st.session_state.pop(state_key, None)
+		return None
+	if not job.done:
+		st.progress(job.progress, text=job.message)
+		if render_partial is not None and job.partial:
+			render_partial(job.partial)
+		time.sleep(JOB_POLL_INTERVAL_SECONDS)
+		if in_fragment:
+			try:
+				st.rerun(scope="fragment")
+			except (TypeError, StreamlitAPIException):
+				# Streamlit < 1.37, or the fragment is running as part of a full-app run
+				pass
+		st.rerun()
+	st.session_state.pop(state_key, None)
+	# The caller takes the result from here; the worker need not keep it for the TTL
+	get_worker().discard(job.id)
+	return job
@@ -1,11 +1,82 @@
 import streamlit as st
-from typing import List
+from functools import partial
+from typing import Any, Dict, List, Optional
+from models.campaign_brief import CampaignBrief
 from models.media_plan import MediaPlan
-from config.settings import INPUT_COST, OUTPUT_COST
+from services.job_queue import Job, JobStatus, get_worker
+from services.media_service import MediaService
+from config.settings import MODEL, STREAMING_ENABLED
+from ui.job_status import poll_job, submit_job
+from ui.rendering import fragment, render_once
+from ui.session_artifacts import get_artifact, put_artifact
+from ui.trace_view import render_trace_waterfall, traced_render
+from utils.response_cache import hash_text
+from utils.token_cost import calculate_cost
 
+# Default media planning prompt
+DEFAULT_MEDIA_PROMPT = """You are a senior media planning expert. Based on the provided campaign brief, create a comprehensive media plan that includes:
 
-def _display_media_plan(media_plan: MediaPlan):
-	"""Display the generated media plan in a structured format"""
+1. Specific media channels with detailed budget allocations
+2. Target audience segmentation for each channel
+3. Content strategy and messaging approach
+4. Timing and frequency recommendations
+5. Expected reach and engagement metrics
+6. Success measurement criteria
+7. Risk mitigation strategies
+8. Implementation timeline
+
+Focus on creating an integrated media strategy that maximizes ROI and aligns with the campaign objectives."""
+
+
+_CHANNEL_FIELDS = (
+	("Description", "description"),
+	("Budget Allocation", "budget_allocation"),
+	("Target Audience", "target_audience"),
+	("Content Strategy", "content_strategy"),
+	("Timing", "timing"),
+	("Expected Reach", "expected_reach"),
+)
+
+
+def _bullets(items: List[str]) -> str:
+	return "\n".join(f"- {item}" for item in items)
+
+
+def _channel_markdown(channel: dict) -> str:
+	lines = [f"**{label}:** {channel[key]}" for label, key in _CHANNEL_FIELDS if key in channel]
+	if channel.get("success_metrics"):
+		lines.append("**Success Metrics:**\n\n" + _bullets(channel["success_metrics"]))
+	return "\n\n".join(lines)
+
+
+def _media_plan_markdown(data: dict) -> Dict[str, Any]:
+	"""Markdown for each section of a media plan (or of a streaming plan's partial dict)."""
+	return {
+		"objectives": _bullets(data.get("primary_objectives") or []),
+		"channels": [
+			(f"{i}. {channel.get('channel_name', '…')}", _channel_markdown(channel))
+			for i, channel in enumerate(data.get("media_channels") or [], 1)
+		],
+		"risk_mitigation": _bullets(data.get("risk_mitigation") or []),
+		"success_measurement": _bullets(data.get("success_measurement") or []),
+	}
+
+
+def _dump_media_plan(media_plan: MediaPlan) -> tuple:
+	data = media_plan.model_dump()
+	return data, _media_plan_markdown(data)
+
+
+def _display_media_plan(media_plan: MediaPlan, partial: bool = False):
+	"""Display the generated media plan in a structured format.
+
+	With partial=True, media_plan is the dict of fields streamed so far.
+	"""
+	if partial:
+		data, sections = media_plan, _media_plan_markdown(media_plan)
+	else:
+		# A finished plan never changes, so it is dumped and its markdown built once
+		data, sections = render_once(media_plan, _dump_media_plan)
 	st.subheader("Media Plan")
 	
 	# Create a container with border styling
@@ -13,79 +84,119 @@ def _display_media_plan(media_plan: MediaPlan):
 		st.markdown("---")
 		
 		# Title section
-		st.markdown(f"### 📺 {media_plan.title}")
+		st.markdown(f"### 📺 {data.get('title', '')}")
 		st.markdown("---")
 		
 		# Overview
-		st.markdown("#### 📋 Overview")
-		st.info(media_plan.overview)
+		if data.get("overview"):
+			st.markdown("#### 📋 Overview")
+			st.info(data["overview"])
 		
 		# Budget and Duration
 		col1, col2 = st.columns(2)
 		with col1:
-			st.metric("Total Budget", media_plan.total_budget)
+			st.metric("Total Budget", data.get("total_budget", "…"))
 		with col2:
-			st.metric("Campaign Duration", media_plan.campaign_duration)
+			st.metric("Campaign Duration", data.get("campaign_duration", "…"))
 		
 		# Primary Objectives
-		if media_plan.primary_objectives:
-			st.markdown("#### 🎯 Primary Objectives")
-			for objective in media_plan.primary_objectives:
-				st.markdown(f"• {objective}")
+		if sections["objectives"]:
+			st.markdown("#### 🎯 Primary Objectives\n\n" + sections["objectives"])
 		
 		# Media Channels
-		if media_plan.media_channels:
+		if sections["channels"]:
 			st.markdown("#### 📡 Media Channels")
-			for i, channel in enumerate(media_plan.media_channels, 1):
-				with st.expander(f"{i}. {channel.channel_name}", expanded=True):
-					st.markdown(f"**Description:** {channel.description}")
-					st.markdown(f"**Budget Allocation:** {channel.budget_allocation}")
-					st.markdown(f"**Target Audience:** {channel.target_audience}")
-					st.markdown(f"**Content Strategy:** {channel.content_strategy}")
-					st.markdown(f"**Timing:** {channel.timing}")
-					st.markdown(f"**Expected Reach:** {channel.expected_reach}")
-					
-					if channel.success_metrics:
-						st.markdown("**Success Metrics:**")
-						for metric in channel.success_metrics:
-							st.markdown(f"• {metric}")
+			for name, body in sections["channels"]:
+				with st.expander(name, expanded=True):
+					st.markdown(body)
 		
 		# Integrated Strategy
-		st.markdown("#### 🔗 Integrated Strategy")
-		st.success(media_plan.integrated_strategy)
+		if data.get("integrated_strategy"):
+			st.markdown("#### 🔗 Integrated Strategy")
+			st.success(data["integrated_strategy"])
 		
 		# Risk Mitigation
-		if media_plan.risk_mitigation:
-			st.markdown("#### ⚠️ Risk Mitigation")
-			for risk in media_plan.risk_mitigation:
-				st.markdown(f"• {risk}")
+		if sections["risk_mitigation"]:
+			st.markdown("#### ⚠️ Risk Mitigation\n\n" + sections["risk_mitigation"])
 		
 		# Success Measurement
-		if media_plan.success_measurement:
-			st.markdown("#### 📊 Success Measurement")
-			for measurement in media_plan.success_measurement:
-				st.markdown(f"• {measurement}")
+		if sections["success_measurement"]:
+			st.markdown("#### 📊 Success Measurement\n\n" + sections["success_measurement"])
 		
 		# Implementation Timeline
-		st.markdown("#### ⏰ Implementation Timeline")
-		st.info(media_plan.implementation_timeline)
+		if data.get("implementation_timeline"):
+			st.markdown("#### ⏰ Implementation Timeline")
+			st.info(data["implementation_timeline"])
 		
 		st.markdown("---")
-	
-	# Display metrics in a separate section
+
+
+def _display_media_plan_usage(media_plan: MediaPlan):
 	st.markdown("### 📈 Usage Metrics")
 	col_a, col_b, col_c = st.columns(3)
 	col_a.metric("Input Tokens", media_plan.input_tokens)
 	col_b.metric("Output Tokens", media_plan.output_tokens)
+	cost = 0.0 if media_plan.from_cache else calculate_cost(media_plan.model_name or MODEL, media_plan.input_tokens, media_plan.output_tokens)
 	col_c.metric(
 		"Cost (in $)",
-		f"{(media_plan.input_tokens * INPUT_COST/1000 + media_plan.output_tokens * OUTPUT_COST/1000):.4f}",
+		f"{cost:.4f}",
 		help="Estimated cost based on token usage"
 	)
+	if media_plan.model_name:
+		st.caption(f"Generated by {media_plan.model_name}")
+	if media_plan.from_cache:
+		st.caption("Served from the response cache at no API cost.")
+
+
+async def _media_plan_job(job: Job, campaign_brief: CampaignBrief, prompt: str) -> MediaPlan:
+	"""Generate a media plan; runs on the background worker."""
+	job.report(0.1, "Generating media plan...")
+	service = MediaService()
+	if not STREAMING_ENABLED:
+		return await service.generate_media_plan(campaign_brief, prompt)
+	async for update in service.stream_media_plan(campaign_brief, prompt):
+		job.partial = update.partial
+		media_plan = update.parsed
+	return media_plan
+
+
+def media_plan_request_key(campaign_brief: CampaignBrief, prompt: str) -> str:
+	"""Identify a media plan request by the brief and prompt it was generated from."""
+	return hash_text(campaign_brief.model_dump_json() + "\n" + prompt)
+
+
+def start_speculative_media_plan(campaign_brief: CampaignBrief, prompt: str) -> Job:
+	"""Start a media plan for a freshly generated brief before the user asks for it.
 
+	Called on the worker loop by the brief job, so the plan overlaps with the
+	time the user spends reading the brief.
+	"""
+	job = get_worker().submit("media_plan", partial(_media_plan_job, campaign_brief=campaign_brief, prompt=prompt))
+	job.message = "Media plan started in the background"
+	return job
 
+
+def _speculative_job_id(campaign_brief: CampaignBrief, prompt: str) -> Optional[str]:
+	"""Return the speculative media plan job if it still matches the brief and prompt; cancel it otherwise."""
+	job_id = st.session_state.get("speculative_media_job_id")
+	if not job_id:
+		return None
+	job = get_worker().get(job_id)
+	matches = campaign_brief is not None and st.session_state.get("speculative_media_key") == media_plan_request_key(campaign_brief, prompt)
+	if job is None or not matches or job.status in (JobStatus.FAILED, JobStatus.CANCELLED):
+		get_worker().cancel(st.session_state.pop("speculative_media_job_id", None))
+		st.session_state.pop("speculative_media_key", None)
+		return None
+	return job_id
+
+
+@fragment
 def render_media_plan_generator(campaign_brief):
-	"""Render the media plan generator section"""
+	"""Render the media plan generator section.
+
+	Runs as a fragment: the prompt, Generate and Regenerate widgets and the
+	job polling rerun only this section, not the uploader and brief above it.
+	"""
 	st.markdown("---")
 	st.markdown("### 📺 Generate Media Plan")
 	
@@ -97,48 +208,39 @@ def render_media_plan_generator(campaign_brief):
 	if 'media_plan_key' not in st.session_state:
 		st.session_state.media_plan_key = 0
 	
-	# Default media planning prompt
-	default_media_prompt = """You are a senior media planning expert. Based on the provided campaign brief, create a comprehensive media plan that includes:
-
-1. Specific media channels with detailed budget allocations
-2. Target audience segmentation for each channel
-3. Content strategy and messaging approach
-4. Timing and frequency recommendations
-5. Expected reach and engagement metrics
-6. Success measurement criteria
-7. Risk mitigation strategies
-8. Implementation timeline
-
-Focus on creating an integrated media strategy that maximizes ROI and aligns with the campaign objectives."""
-	
 	# Optional custom prompt for media plan
 	advanced_media = st.expander("Advanced media planning settings", expanded=False)
 	with advanced_media:
-		custom_media_prompt = st.text_area("Media planning system prompt (optional)", value=default_media_prompt)
+		custom_media_prompt = st.text_area("Media planning system prompt (optional)", value=DEFAULT_MEDIA_PROMPT, key="media_prompt")
+	prompt = custom_media_prompt or DEFAULT_MEDIA_PROMPT
+
+	# A plan started speculatively with the brief is only useful for the same brief and prompt
+	speculative_job_id = _speculative_job_id(campaign_brief, prompt)
 	
-	# Direct button approach - handle everything in the button click
+	# Generation runs on the background worker; the job id survives reruns
 	if st.button("Generate Media Plan", key=f"generate_media_{st.session_state.media_plan_key}", type="primary"):
 		if not campaign_brief:
 			st.warning("Please generate a campaign brief first.")
+		elif speculative_job_id:
+			# Adopt the speculative job: it is already running or finished
+			st.session_state.media_plan_job_id = st.session_state.pop("speculative_media_job_id")
 		else:
-			try:
-				with st.spinner("Generating media plan..."):
-					from services.media_service import MediaService
-					import asyncio
-					
-					service = MediaService()
-					media_plan = asyncio.run(service.generate_media_plan(
-						campaign_brief, 
-						custom_media_prompt or default_media_prompt
-					))
-					
-					# Store the media plan in session state
-					st.session_state.media_plan = media_plan
-					st.session_state.media_plan_generated = True
-					
-			except Exception as e:
-				st.error(f"Error generating media plan: {str(e)}")
-				st.error("Please check your OpenAI API key and try again.")
+			submit_job("media_plan_job_id", "media_plan", partial(
+				_media_plan_job, campaign_brief=campaign_brief, prompt=prompt
+			))
+
+	job = poll_job("media_plan_job_id", render_partial=partial(_display_media_plan, partial=True), in_fragment=True)
+	if job is not None:
+		if job.status == JobStatus.SUCCEEDED:
+			# Store the media plan in session state
+			put_artifact("media_plan", job.result)
+			st.session_state.media_plan_generated = True
+			st.session_state.media_plan_trace_id = job.span.trace_id
+			st.session_state.media_plan_render_parent = job.span
+		elif job.status == JobStatus.FAILED:
+			st.error(f"Error generating media plan: {job.error}")
+			st.error("Please check your OpenAI API key and try again.")
+			render_trace_waterfall(job.span.trace_id if job.span else None)
 	
 	# Regenerate button
 	if st.session_state.media_plan:
@@ -148,10 +250,14 @@ Focus on creating an integrated media strategy that maximizes ROI and aligns wit
 			st.session_state.media_plan_key += 1
 	
 	# Display the media plan if it exists in session state
-	if st.session_state.media_plan:
-		_display_media_plan(st.session_state.media_plan)
+	media_plan = get_artifact("media_plan")
+	if media_plan is not None:
+		with traced_render("media_plan_render_parent", "render.media_plan"):
+			_display_media_plan(media_plan)
+		_display_media_plan_usage(media_plan)
+		render_trace_waterfall(st.session_state.get("media_plan_trace_id"))
 	else:
 		# Debug info
 		st.info("No media plan generated yet. Click 'Generate Media Plan' to create one.")
-		st.write("Debug - Media plan state:", st.session_state.media_plan is not None)
+		st.write("Debug - Media plan state:", st.session_state.get("media_plan") is not None)
 		st.write("Debug - Media plan generated:", st.session_state.media_plan_generated)
@@ -0,0 +1,42 @@
+import threading
+import weakref
+from typing import Any, Callable, Dict, Tuple, TypeVar
+import streamlit as st
+
+T = TypeVar("T")
+
+# id(obj) -> (weak reference to obj, rendered value); entries go when the object is collected
+_rendered: Dict[int, Tuple[weakref.ref, Any]] = {}
+_rendered_lock = threading.Lock()
+
+
+def fragment(fn: Callable) -> Callable:
+	"""st.fragment where available (Streamlit >= 1.33), otherwise fn runs as part of every full rerun.
+
+	Widgets inside a fragment rerun only the fragment, so the rest of the page
+	(file uploader, brief) is not rebuilt on every click.
+	"""
+	decorator = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+	return decorator(fn) if decorator is not None else fn
+
+
+def render_once(obj: Any, build: Callable[[Any], T]) -> T:
+	"""Return build(obj), computed once per object for as long as the object is alive.
+
+	Used for the markdown of finished briefs and plans, which never change
+	after generation but would otherwise be rebuilt on every rerun.
+	"""
+	key = id(obj)
+	with _rendered_lock:
+		entry = _rendered.get(key)
+		if entry is not None and entry[0]() is obj:
+			return entry[1]
+	value = build(obj)
+	with _rendered_lock:
+		_rendered[key] = (weakref.ref(obj, lambda _, key=key: _forget(key)), value)
+	return value
+
+
+def _forget(key: int) -> None:
+	with _rendered_lock:
+		_rendered.pop(key, None)
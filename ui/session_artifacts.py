@@ -0,0 +1,33 @@
+import uuid
+from typing import Any, Optional
+import streamlit as st
+from utils.artifact_store import ArtifactHandle, get_artifact_store
+
+
+def _session_id() -> str:
+	if "artifact_session_id" not in st.session_state:
+		st.session_state.artifact_session_id = uuid.uuid4().hex
+	return st.session_state.artifact_session_id
+
+
+def put_artifact(name: str, value: Any, type_: Any = None) -> None:
+	"""Store value in the artifact store and keep only its handle in st.session_state[name]."""
+	if value is None:
+		st.session_state[name] = None
+		return
+	st.session_state[name] = get_artifact_store().put(_session_id(), name, value, type_)
+
+
+def get_artifact(name: str) -> Optional[Any]:
+	"""Load the artifact whose handle is in st.session_state[name], or None.
+
+	An artifact evicted after the session sat idle is dropped from session
+	state, as if it had never been generated.
+	"""
+	handle = st.session_state.get(name)
+	if not isinstance(handle, ArtifactHandle):
+		return handle
+	value = get_artifact_store().get(handle)
+	if value is None:
+		del st.session_state[name]
+	return value
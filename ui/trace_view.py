@@ -0,0 +1,69 @@
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+import altair as alt
+import pandas as pd
+import streamlit as st
+from utils.tracing import Span, get_span_buffer, span
+
+
+def traced_render(state_key: str, name: str):
+	"""Span for the first full render after a job finishes, attached to the job's trace.
+
+	The job's span is taken from session state, so reruns that redraw the same
+	result are not traced again.
+	"""
+	parent: Optional[Span] = st.session_state.pop(state_key, None)
+	return span(name, parent=parent) if parent is not None else nullcontext()
+
+
+def _depths(spans: List[Span]) -> Dict[str, int]:
+	by_id = {s.span_id: s for s in spans}
+	depths: Dict[str, int] = {}
+
+	def depth(s: Span) -> int:
+		if s.span_id not in depths:
+			parent = by_id.get(s.parent_id)
+			depths[s.span_id] = 0 if parent is None else depth(parent) + 1
+		return depths[s.span_id]
+
+	for s in spans:
+		depth(s)
+	return depths
+
+
+def render_trace_waterfall(trace_id: Optional[str], title: str = "Latency waterfall"):
+	"""Collapsible waterfall of the spans recorded for one trace."""
+	if not trace_id:
+		return
+	spans = sorted(get_span_buffer().spans(trace_id), key=lambda s: s.start_ns)
+	if not spans:
+		return
+	with st.expander(title, expanded=False):
+		start_ns = spans[0].start_ns
+		depths = _depths(spans)
+		rows = [
+			{
+				"span": f"{i:>3} " + "· " * depths[s.span_id] + s.name,
+				"start_ms": (s.start_ns - start_ns) / 1e6,
+				"end_ms": (s.end_ns - start_ns) / 1e6,
+				"duration_ms": round(s.duration_seconds * 1000, 1),
+				"status": "error" if s.error else "ok",
+				"details": ", ".join(f"{key}={value}" for key, value in s.attributes.items()),
+			}
+			for i, s in enumerate(spans, 1)
+		]
+		df = pd.DataFrame(rows)
+		chart = alt.Chart(df).mark_bar().encode(
+			x=alt.X("start_ms:Q", title="ms since start"),
+			x2="end_ms:Q",
+			y=alt.Y("span:N", sort=None, title=None),
+			color=alt.Color("status:N", scale=alt.Scale(domain=["ok", "error"], range=["#4c78a8", "#e45756"]), legend=None),
+			tooltip=["span", "duration_ms", "details"],
+		).properties(height=max(120, 22 * len(rows)))
+		try:
+			st.altair_chart(chart, width="stretch")
+		except TypeError:
+			# Older Streamlit only has use_container_width, deprecated since
+			st.altair_chart(chart, use_container_width=True)
+		total = (max(s.end_ns for s in spans) - start_ns) / 1e9
+		st.caption(f"{len(spans)} spans over {total:.2f}s")
@@ -0,0 +1,157 @@
+from __future__ import annotations
+from collections import OrderedDict
+from contextlib import closing
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from pydantic import TypeAdapter
+
+from config.settings import (
+	ARTIFACT_STORE_PATH,
+	ARTIFACT_IDLE_TTL_SECONDS,
+	ARTIFACT_MEMORY_CACHE_ENTRIES,
+)
+
+# Access times are written at most this often per artifact, so reruns stay read-only
+_TOUCH_INTERVAL_SECONDS = 60
+_EVICT_INTERVAL_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class ArtifactHandle:
+	"""What session state keeps instead of the artifact itself"""
+	key: str
+	type_: Any  # a pydantic model or any type pydantic can serialise, e.g. List[SomeDataclass]
+	version: int
+	size: int  # compressed bytes on disk
+
+
+@lru_cache(maxsize=64)
+def _adapter(type_: Any) -> TypeAdapter:
+	return TypeAdapter(type_)
+
+
+class ArtifactStore:
+	"""Session artifacts (briefs, plans, extraction results) kept on disk instead of in session state.
+
+	Values are stored as zlib-compressed JSON in SQLite under a per-session
+	slot. A small process-wide LRU holds recently loaded values, so memory is
+	bounded by that cache rather than by the number of open sessions.
+	Artifacts not accessed for idle_ttl_seconds are deleted.
+	"""
+
+	def __init__(self, path: str, idle_ttl_seconds: int, memory_entries: int):
+		self.path = path
+		self.idle_ttl_seconds = idle_ttl_seconds
+		self.memory_entries = memory_entries
+		self._memory: OrderedDict = OrderedDict()  # (key, version) -> value
+		self._touched: dict = {}  # key -> when its access time was last written
+		self._lock = threading.Lock()
+		self._last_evict = 0.0
+		os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+		with closing(self._connect()) as conn:
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute(
+				"CREATE TABLE IF NOT EXISTS artifacts ("
+				"key TEXT PRIMARY KEY, version INTEGER NOT NULL, payload BLOB NOT NULL, "
+				"created REAL NOT NULL, accessed REAL NOT NULL)"
+			)
+			conn.execute("CREATE INDEX IF NOT EXISTS artifacts_accessed ON artifacts (accessed)")
+
+	def _connect(self) -> sqlite3.Connection:
+		return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+	def put(self, session_id: str, slot: str, value: Any, type_: Any = None) -> ArtifactHandle:
+		"""Store `value` in the session's slot, replacing what was there, and return its handle."""
+		type_ = type_ or type(value)
+		payload = zlib.compress(_adapter(type_).dump_json(value), 6)
+		key = f"{session_id}:{slot}"
+		now = time.time()
+		with self._lock, closing(self._connect()) as conn:
+			row = conn.execute("SELECT version FROM artifacts WHERE key = ?", (key,)).fetchone()
+			version = row[0] + 1 if row else 1
+			conn.execute(
+				"INSERT OR REPLACE INTO artifacts (key, version, payload, created, accessed) VALUES (?, ?, ?, ?, ?)",
+				(key, version, payload, now, now),
+			)
+			# Handles to the replaced value must miss, as they do on disk
+			self._memory.pop((key, version - 1), None)
+			self._remember((key, version), value)
+			self._touched[key] = now
+		self._evict_idle(now)
+		return ArtifactHandle(key, type_, version, len(payload))
+
+	def get(self, handle: ArtifactHandle) -> Optional[Any]:
+		"""Load the artifact behind `handle`, or None if it was evicted or replaced."""
+		cache_key = (handle.key, handle.version)
+		now = time.time()
+		with self._lock:
+			value = self._memory.get(cache_key)
+			if value is not None:
+				self._memory.move_to_end(cache_key)
+			touch = now - self._touched.get(handle.key, 0.0) >= _TOUCH_INTERVAL_SECONDS
+			if touch:
+				self._touched[handle.key] = now
+		if value is not None and not touch:
+			return value
+
+		with closing(self._connect()) as conn:
+			if touch:
+				conn.execute("UPDATE artifacts SET accessed = ? WHERE key = ? AND version = ?", (now, handle.key, handle.version))
+			if value is not None:
+				return value
+			row = conn.execute(
+				"SELECT payload FROM artifacts WHERE key = ? AND version = ?", (handle.key, handle.version)
+			).fetchone()
+		if row is None:
+			return None
+		value = _adapter(handle.type_).validate_json(zlib.decompress(row[0]))
+		with self._lock:
+			self._remember(cache_key, value)
+		return value
+
+	def delete(self, handle: ArtifactHandle) -> None:
+		with self._lock, closing(self._connect()) as conn:
+			conn.execute("DELETE FROM artifacts WHERE key = ? AND version = ?", (handle.key, handle.version))
+			self._memory.pop((handle.key, handle.version), None)
+
+	def _remember(self, cache_key: tuple, value: Any) -> None:
+		"""Caller holds the lock."""
+		self._memory[cache_key] = value
+		self._memory.move_to_end(cache_key)
+		while len(self._memory) > self.memory_entries:
+			self._memory.popitem(last=False)
+
+	def _evict_idle(self, now: float) -> None:
+		if now - self._last_evict < _EVICT_INTERVAL_SECONDS:
+			return
+		self._last_evict = now
+		cutoff = now - self.idle_ttl_seconds
+		with closing(self._connect()) as conn:
+			conn.execute("DELETE FROM artifacts WHERE accessed < ?", (cutoff,))
+		with self._lock:
+			self._touched = {key: touched for key, touched in self._touched.items() if touched >= cutoff}
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+	"""Return the process-wide session artifact store."""
+	global _store
+	if _store is None:
+		with _store_lock:
+			if _store is None:
+				_store = ArtifactStore(
+					ARTIFACT_STORE_PATH,
+					idle_ttl_seconds=ARTIFACT_IDLE_TTL_SECONDS,
+					memory_entries=ARTIFACT_MEMORY_CACHE_ENTRIES,
+				)
+	return _store
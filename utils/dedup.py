@@ -0,0 +1,155 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+import hashlib
+import random
+import re
+import zlib
+
+try:
+	import numpy as np
+except Exception:
+	np = None
+
+from config.settings import (
+	MODEL,
+	DEDUP_ENABLED,
+	DEDUP_SIMILARITY_THRESHOLD,
+	DEDUP_MIN_WORDS,
+	DEDUP_SHINGLE_WORDS,
+	DEDUP_NUM_PERMUTATIONS,
+	DEDUP_LSH_BANDS,
+)
+from utils.token_counter import count_tokens
+from utils.tracing import span
+
+_PRIME = (1 << 31) - 1  # hashes are kept below this so a * x + b fits in 64 bits
+_WORD = re.compile(r"\w+")
+
+
+@dataclass
+class DedupResult:
+	"""Documents with near-duplicate paragraphs removed, and what the removal saved"""
+	documents: List[Tuple[str, str]]
+	removed_paragraphs: int = 0
+	removed_bytes: int = 0
+	removed_tokens: int = 0
+	removed_per_source: Dict[str, int] = field(default_factory=dict)
+
+
+class MinHasher:
+	"""MinHash signatures of word shingles; similar signatures mean similar Jaccard overlap"""
+
+	def __init__(self, num_permutations: int = DEDUP_NUM_PERMUTATIONS, shingle_words: int = DEDUP_SHINGLE_WORDS, seed: int = 1):
+		rng = random.Random(seed)
+		self.shingle_words = shingle_words
+		self.a = [rng.randrange(1, _PRIME) for _ in range(num_permutations)]
+		self.b = [rng.randrange(0, _PRIME) for _ in range(num_permutations)]
+		if np is not None:
+			self._a = np.array(self.a, dtype=np.uint64)[:, None]
+			self._b = np.array(self.b, dtype=np.uint64)[:, None]
+
+	def shingles(self, text: str) -> List[int]:
+		words = _WORD.findall(text.casefold())
+		size = min(self.shingle_words, len(words))
+		return list({
+			zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) & _PRIME
+			for i in range(len(words) - size + 1)
+		})
+
+	def signature(self, text: str) -> Tuple[int, ...]:
+		shingles = self.shingles(text)
+		if not shingles:
+			return tuple([_PRIME] * len(self.a))
+		if np is not None:
+			x = np.array(shingles, dtype=np.uint64)[None, :]
+			return tuple(((self._a * x + self._b) % _PRIME).min(axis=1).tolist())
+		return tuple(min((a * x + b) % _PRIME for x in shingles) for a, b in zip(self.a, self.b))
+
+
+def estimated_similarity(first: Sequence[int], second: Sequence[int]) -> float:
+	"""Estimated Jaccard similarity of the shingle sets behind two signatures."""
+	return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+def remove_near_duplicates(
+	documents: Sequence[Tuple[str, str]],
+	threshold: float = DEDUP_SIMILARITY_THRESHOLD,
+	min_words: int = DEDUP_MIN_WORDS,
+	bands: int = DEDUP_LSH_BANDS,
+	model_name: str = MODEL,
+) -> DedupResult:
+	"""Drop paragraphs of each (source, text) document that nearly repeat a paragraph of an earlier document.
+
+	Each line is a paragraph: DOCX paragraphs and table rows, and PDF text
+	lines and pages, are separated by single newlines, so blank-line blocks
+	would make a whole file one unit. Paragraphs are compared by MinHash over
+	word shingles, with LSH banding so only likely matches are compared.
+	Repeats within one document (e.g. identical table rows or summary lines
+	of a spreadsheet) are content, not overlap between files, and are kept.
+	Paragraphs shorter than min_words are always kept; short headings
+	legitimately repeat.
+	"""
+	if not DEDUP_ENABLED:
+		return DedupResult(list(documents))
+	with span("dedup", documents=len(documents)) as dedup_span:
+		result = _remove_near_duplicates(documents, threshold, min_words, bands, model_name)
+		dedup_span.set(removed_paragraphs=result.removed_paragraphs, removed_tokens=result.removed_tokens)
+	return result
+
+
+def _remove_near_duplicates(
+	documents: Sequence[Tuple[str, str]],
+	threshold: float,
+	min_words: int,
+	bands: int,
+	model_name: str,
+) -> DedupResult:
+	hasher = MinHasher()
+	rows = len(hasher.a) // bands
+	buckets: Dict[Tuple[int, bytes], List[Tuple[int, ...]]] = {}
+	exact: set = set()
+	result = DedupResult([])
+
+	for source, text in documents:
+		kept: List[str] = []
+		# Indexed once the document is done, so its paragraphs only match later documents
+		pending: Dict[bytes, List[Tuple[Tuple[int, bytes], Tuple[int, ...]]]] = {}
+		for paragraph in text.split("\n"):
+			if not paragraph.strip():
+				# Keep blank-line paragraph breaks, but not runs left by removed paragraphs
+				if kept and kept[-1].strip():
+					kept.append("")
+				continue
+			if len(_WORD.findall(paragraph)) < min_words:
+				kept.append(paragraph)
+				continue
+			digest = hashlib.sha1(" ".join(paragraph.split()).casefold().encode("utf-8")).digest()
+			duplicate = digest in exact
+			signature = None
+			band_keys = []
+			if not duplicate:
+				signature = hasher.signature(paragraph)
+				band_keys = [
+					(band, hashlib.sha1(repr(signature[band * rows:(band + 1) * rows]).encode()).digest())
+					for band in range(bands)
+				]
+				duplicate = any(
+					estimated_similarity(signature, other) >= threshold
+					for key in band_keys
+					for other in buckets.get(key, ())
+				)
+			if duplicate:
+				result.removed_paragraphs += 1
+				result.removed_bytes += len(paragraph.encode("utf-8"))
+				result.removed_tokens += count_tokens(paragraph, model_name)
+				result.removed_per_source[source] = result.removed_per_source.get(source, 0) + 1
+				continue
+			pending.setdefault(digest, [(key, signature) for key in band_keys])
+			kept.append(paragraph)
+		for digest, entries in pending.items():
+			exact.add(digest)
+			for key, signature in entries:
+				buckets.setdefault(key, []).append(signature)
+		result.documents.append((source, "\n".join(kept).strip("\n")))
+	return result
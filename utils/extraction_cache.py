@@ -0,0 +1,194 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+import hashlib
+import os
+import sys
+import threading
+
+from config.settings import (
+	EXTRACTION_CACHE_DIR,
+	EXTRACTION_CACHE_MEMORY_MAX_BYTES,
+	EXTRACTION_CACHE_DISK_MAX_BYTES,
+)
+
+# Block size files are hashed in
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass
+class CacheStats:
+	"""Hit/miss counters for the extraction cache"""
+	memory_hits: int = 0
+	disk_hits: int = 0
+	misses: int = 0
+	memory_bytes: int = 0
+	disk_bytes: int = 0
+
+	@property
+	def hits(self) -> int:
+		return self.memory_hits + self.disk_hits
+
+
+class ExtractionCache:
+	"""Two-tier (memory LRU + disk) cache of extracted file text.
+
+	Entries are content-addressed: the key is a hash of the file bytes, the
+	file extension and the extractor version, so re-uploading the same file
+	under any name hits the cache while extractor changes invalidate it.
+	"""
+
+	def __init__(self, cache_dir: str, memory_max_bytes: int, disk_max_bytes: int):
+		self.cache_dir = cache_dir
+		self.memory_max_bytes = memory_max_bytes
+		self.disk_max_bytes = disk_max_bytes
+		self._memory: "OrderedDict[str, str]" = OrderedDict()
+		self._lock = threading.Lock()
+		self._stats = CacheStats()
+		os.makedirs(self.cache_dir, exist_ok=True)
+		self._stats.disk_bytes = sum(size for _, size, _ in self._scan_disk())
+
+	@staticmethod
+	def make_key(filename: str, file_bytes, version: str) -> str:
+		"""Return the content-addressed key for a file.
+
+		file_bytes may be any buffer (bytes, a memory-mapped file); it is hashed
+		block by block so a mapped file is never read into memory as a whole.
+		"""
+		ext = os.path.splitext(filename.lower())[1]
+		digest = hashlib.sha256()
+		digest.update(f"{version}:{ext}:".encode("utf-8"))
+		with memoryview(file_bytes) as view:
+			for start in range(0, len(view), _HASH_BLOCK_SIZE):
+				digest.update(view[start:start + _HASH_BLOCK_SIZE])
+		return digest.hexdigest()
+
+	def get(self, key: str) -> Optional[str]:
+		with self._lock:
+			text = self._memory.get(key)
+			if text is not None:
+				self._memory.move_to_end(key)
+				self._stats.memory_hits += 1
+				return text
+
+		path = self._path(key)
+		try:
+			with open(path, "r", encoding="utf-8") as fh:
+				text = fh.read()
+			os.utime(path)  # mtime doubles as the disk tier's LRU clock
+		except OSError:
+			with self._lock:
+				self._stats.misses += 1
+			return None
+
+		with self._lock:
+			self._stats.disk_hits += 1
+			self._remember(key, text)
+		return text
+
+	def put(self, key: str, text: str) -> None:
+		with self._lock:
+			self._remember(key, text)
+
+		path = self._path(key)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+		try:
+			with open(tmp_path, "w", encoding="utf-8") as fh:
+				fh.write(text)
+			# An entry that is overwritten no longer counts towards the budget
+			previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+			os.replace(tmp_path, path)
+		except OSError:
+			# The disk tier is best-effort; the memory tier still holds the entry
+			if os.path.exists(tmp_path):
+				os.remove(tmp_path)
+			return
+
+		with self._lock:
+			self._stats.disk_bytes += os.path.getsize(path) - previous_size
+			over_budget = self._stats.disk_bytes > self.disk_max_bytes
+		if over_budget:
+			self._evict_disk()
+
+	def stats(self) -> CacheStats:
+		with self._lock:
+			return CacheStats(**vars(self._stats))
+
+	def clear(self) -> None:
+		with self._lock:
+			self._memory.clear()
+			self._stats = CacheStats()
+		for path, _, _ in self._scan_disk():
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+
+	def _remember(self, key: str, text: str) -> None:
+		"""Insert into the memory tier and evict least-recently-used entries. Caller holds the lock.
+
+		Entries are measured by the memory their strings take (sys.getsizeof),
+		not by their length in characters.
+		"""
+		size = sys.getsizeof(text)
+		if size > self.memory_max_bytes:
+			return
+		previous = self._memory.pop(key, None)
+		if previous is not None:
+			self._stats.memory_bytes -= sys.getsizeof(previous)
+		self._memory[key] = text
+		self._stats.memory_bytes += size
+		while self._stats.memory_bytes > self.memory_max_bytes and self._memory:
+			_, evicted = self._memory.popitem(last=False)
+			self._stats.memory_bytes -= sys.getsizeof(evicted)
+
+	def _evict_disk(self) -> None:
+		"""Delete the least recently used disk entries until under 90% of the budget."""
+		entries = sorted(self._scan_disk(), key=lambda entry: entry[2])
+		total = sum(size for _, size, _ in entries)
+		target = int(self.disk_max_bytes * 0.9)
+		for path, size, _ in entries:
+			if total <= target:
+				break
+			try:
+				os.remove(path)
+				total -= size
+			except OSError:
+				pass
+		with self._lock:
+			self._stats.disk_bytes = total
+
+	def _scan_disk(self):
+		for root, _, files in os.walk(self.cache_dir):
+			for name in files:
+				if not name.endswith(".txt"):
+					continue
+				path = os.path.join(root, name)
+				try:
+					st = os.stat(path)
+				except OSError:
+					continue
+				yield path, st.st_size, st.st_mtime
+
+	def _path(self, key: str) -> str:
+		return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+
+_cache: Optional[ExtractionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> ExtractionCache:
+	"""Return the process-wide extraction cache shared by all Streamlit sessions."""
+	global _cache
+	if _cache is None:
+		with _cache_lock:
+			if _cache is None:
+				_cache = ExtractionCache(
+					EXTRACTION_CACHE_DIR,
+					memory_max_bytes=EXTRACTION_CACHE_MEMORY_MAX_BYTES,
+					disk_max_bytes=EXTRACTION_CACHE_DISK_MAX_BYTES,
+				)
+	return _cache
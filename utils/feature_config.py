@@ -0,0 +1,120 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+import logging
+import os
+import re
+import threading
+
+import yaml
+
+from config.settings import FEATURE_CONFIG_PATH
+
+logger = logging.getLogger(__name__)
+
+# Page-title sections that are not part of a skill's name in feature_config.yml
+_TITLE_SECTIONS = ("skill", "playground")
+_WORD = re.compile(r"\w+")
+# Stamp before the first load; unlike None (no file) it never matches a stat result
+_NOT_LOADED = object()
+
+
+@lru_cache(maxsize=1024)
+def normalise_skill_key(name: str) -> str:
+	"""Compare skill names from page titles and config keys: "Skill > QuizzBot!" == "quizzbot".
+
+	The section prefix, case, punctuation and spacing are ignored.
+	"""
+	section, sep, rest = name.partition(">")
+	if sep and section.strip().casefold() in _TITLE_SECTIONS:
+		name = rest
+	return " ".join(_WORD.findall(name.casefold()))
+
+
+class FeatureConfig:
+	"""Parsed feature_config.yml: which users may see each gated skill.
+
+	Skills missing from the config, and every skill when the config is empty,
+	are available to all users.
+	"""
+
+	def __init__(self, agents: Mapping[str, Iterable[str]], error: Optional[str] = None):
+		self.agents: Dict[str, FrozenSet[str]] = {}
+		for name, users in (agents or {}).items():
+			key = normalise_skill_key(str(name))
+			self.agents[key] = self.agents.get(key, frozenset()) | frozenset(str(user) for user in users or ())
+		# Inverted index, so a rerun looks a user up once instead of scanning every skill's list
+		user_skills: Dict[str, set] = {}
+		for key, users in self.agents.items():
+			for user in users:
+				user_skills.setdefault(user, set()).add(key)
+		self.user_skills: Dict[str, FrozenSet[str]] = {user: frozenset(keys) for user, keys in user_skills.items()}
+		self.error = error
+
+	@classmethod
+	def parse(cls, text: str) -> "FeatureConfig":
+		config = yaml.safe_load(text) or {}
+		return cls(config.get("feature_management", {}).get("agents", {}) or {})
+
+	def skills_for(self, user_id: str) -> FrozenSet[str]:
+		"""Normalised keys of the gated skills `user_id` may see."""
+		return self.user_skills.get(user_id, frozenset())
+
+	def is_available(self, skill: str, user_id: str, allowed: Optional[FrozenSet[str]] = None) -> bool:
+		key = normalise_skill_key(skill)
+		if key not in self.agents:
+			return True
+		return key in (self.skills_for(user_id) if allowed is None else allowed)
+
+
+class FeatureConfigService:
+	"""Serve the parsed feature config, re-reading the file only when it changes on disk"""
+
+	def __init__(self, path: str):
+		self.path = path
+		self._config = FeatureConfig({})
+		self._stamp: object = _NOT_LOADED
+		self._lock = threading.Lock()
+
+	def get(self) -> FeatureConfig:
+		try:
+			stat = os.stat(self.path)
+			stamp = (stat.st_mtime_ns, stat.st_size)
+		except FileNotFoundError:
+			stamp = None
+		if stamp == self._stamp:
+			return self._config
+		with self._lock:
+			if stamp != self._stamp:
+				self._config = self._load(stamp)
+				self._stamp = stamp
+			return self._config
+
+	def _load(self, stamp: Optional[Tuple[int, int]]) -> FeatureConfig:
+		if stamp is None:
+			return FeatureConfig({}, error="Feature configuration file not found. All features will be available.")
+		try:
+			with open(self.path, "r", encoding="utf-8") as f:
+				config = FeatureConfig.parse(f.read())
+		except (OSError, yaml.YAMLError) as e:
+			if isinstance(self._stamp, tuple):
+				# Keep serving the last good config while the file is being edited
+				logger.error("Keeping previous feature configuration: %s", e)
+				return self._config
+			return FeatureConfig({}, error=f"Error parsing feature configuration: {e}")
+		logger.info("Loaded feature configuration for %d skills from %s", len(config.agents), self.path)
+		return config
+
+
+_service: Optional[FeatureConfigService] = None
+_service_lock = threading.Lock()
+
+
+def get_feature_config_service() -> FeatureConfigService:
+	"""Return the process-wide feature config service."""
+	global _service
+	if _service is None:
+		with _service_lock:
+			if _service is None:
+				_service = FeatureConfigService(FEATURE_CONFIG_PATH)
+	return _service
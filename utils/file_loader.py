@@ -1,16 +1,28 @@
 from __future__ import annotations
-from typing import List
-import io
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import codecs
+import itertools
+import math
+import multiprocessing
+import re
+import threading
+import time
+import zipfile
+from xml.etree.ElementTree import iterparse
 
 try:
-	import docx  # python-docx
+	import pdfplumber
 except Exception:
-	docx = None
+	pdfplumber = None
 
 try:
-	import pdfplumber
+	import pypdfium2 as pdfium
 except Exception:
-	pdfplumber = None
+	pdfium = None
 
 try:
 	import pandas as pd
@@ -22,164 +34,739 @@ try:
 except Exception:
 	openpyxl = None
 
+from config.settings import (
+	EXTRACTION_CACHE_ENABLED,
+	INGEST_MAX_WORKERS,
+	PDF_ENGINE,
+	PDF_PARALLEL_MIN_PAGES,
+	PDF_MIN_PAGES_PER_TASK,
+	PDF_ESTIMATED_TOKENS_PER_PAGE,
+)
+from utils.extraction_cache import ExtractionCache, get_extraction_cache
+from utils.table_profiler import TableProfiler
+from utils.token_counter import CHARS_PER_TOKEN, count_tokens
+from utils.tracing import Span, adopt, capture_spans, span
+from utils.upload_spool import FileData, SpooledFile, data_size, mapped, open_reader
 
-def _read_txt(file_bytes: bytes) -> str:
-	return file_bytes.decode("utf-8", errors="ignore")
+# Bump whenever extractor output changes so cached text is invalidated
+EXTRACTOR_VERSION = "5"
 
 
-def _read_docx(file_bytes: bytes) -> str:
-	if not docx:
-		raise RuntimeError("python-docx is not installed")
-	buf = io.BytesIO(file_bytes)
-	document = docx.Document(buf)
-	return "\n".join(p.text for p in document.paragraphs)
+# Size of the byte blocks plain-text files are decoded in
+_TXT_BLOCK_SIZE = 64 * 1024
 
 
-def _read_pdf(file_bytes: bytes) -> str:
-	if not pdfplumber:
-		raise RuntimeError("pdfplumber is not installed")
-	buf = io.BytesIO(file_bytes)
-	text_parts: List[str] = []
-	with pdfplumber.open(buf) as pdf:
-		for page in pdf.pages:
-			text_parts.append(page.extract_text() or "")
-	return "\n".join(text_parts)
+def iter_txt_chunks(data: FileData) -> Iterator[str]:
+	"""Yield decoded blocks of a UTF-8 text file."""
+	decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+	with mapped(data) as buffer, memoryview(buffer) as view:
+		for start in range(0, len(view), _TXT_BLOCK_SIZE):
+			chunk = decoder.decode(view[start:start + _TXT_BLOCK_SIZE])
+			if chunk:
+				yield chunk
+	tail = decoder.decode(b"", final=True)
+	if tail:
+		yield tail
 
 
-def _read_excel(file_bytes: bytes) -> str:
-	if not pd:
-		raise RuntimeError("pandas is not installed")
-	
-	buf = io.BytesIO(file_bytes)
-	text_parts = []
-	
+_WORD_NAMESPACES = (
+	"{http://schemas.openxmlformats.org/wordprocessingml/2006/main}",
+	"{http://purl.oclc.org/ooxml/wordprocessingml/main}",  # ISO strict
+)
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_DOCX_PART = re.compile(r"word/(header|footer)(\d*)\.xml$")
+# Separates the cells of a table row in extracted text
+DOCX_CELL_SEPARATOR = " | "
+
+
+def _word_tag(tag: str) -> Optional[str]:
+	"""Local name of a WordprocessingML tag, or None for other namespaces."""
+	namespace, _, local = tag.rpartition("}")
+	return local if namespace + "}" in _WORD_NAMESPACES else None
+
+
+def _iter_docx_part(stream) -> Iterator[str]:
+	"""Yield the lines of one WordprocessingML part: paragraphs, and table rows as delimited cells.
+
+	The XML is parsed incrementally and each top-level block is discarded once
+	read, so memory does not grow with the document.
+	"""
+	paragraphs: List[List[str]] = []  # text runs of the paragraphs being read (text boxes nest)
+	cells: List[List[str]] = []  # paragraphs of the table cells being read (tables nest)
+	rows: List[List[str]] = []  # cells of the table rows being read
+	container = None
+	depth = 0
+	skip_depth = None  # inside mc:Fallback, which repeats the mc:Choice content
+	for event, elem in iterparse(stream, events=("start", "end")):
+		if event == "start":
+			depth += 1
+			if skip_depth is None and elem.tag == _MC_FALLBACK:
+				skip_depth = depth
+			local = _word_tag(elem.tag)
+			if depth == 2:
+				container = elem if local in ("body", "hdr", "ftr") else container
+			if skip_depth is not None:
+				continue
+			if local == "p":
+				paragraphs.append([])
+			elif local == "tc":
+				cells.append([])
+			elif local == "tr":
+				rows.append([])
+			continue
+
+		local = _word_tag(elem.tag)
+		if skip_depth is None and local is not None:
+			if local == "t" and paragraphs:
+				paragraphs[-1].append(elem.text or "")
+			elif local == "tab" and paragraphs:
+				paragraphs[-1].append("\t")
+			elif local in ("br", "cr") and paragraphs:
+				paragraphs[-1].append("\n")
+			elif local == "p" and paragraphs:
+				text = "".join(paragraphs.pop())
+				if paragraphs:
+					paragraphs[-1].append(text)  # a text box inside a paragraph
+				elif cells:
+					cells[-1].append(text)
+				else:
+					yield text
+			elif local == "tc" and cells:
+				cell = " ".join(" ".join(text.split()) for text in cells.pop() if text.strip())
+				if rows:
+					rows[-1].append(cell)
+			elif local == "tr" and rows:
+				row = DOCX_CELL_SEPARATOR.join(rows.pop())
+				if cells:
+					cells[-1].append(row)  # a table nested in a cell
+				elif row.strip(DOCX_CELL_SEPARATOR + " "):
+					yield row
+		if skip_depth == depth:
+			skip_depth = None
+		depth -= 1
+		if depth == 2 and container is not None:
+			# A top-level block has been read: drop it and everything parsed so far
+			container.clear()
+
+
+def _docx_parts(package: zipfile.ZipFile, kind: str) -> List[str]:
+	parts = [(match.group(2), name) for name in package.namelist() if (match := _DOCX_PART.match(name)) and match.group(1) == kind]
+	return [name for _, name in sorted(parts, key=lambda part: int(part[0] or 0))]
+
+
+def iter_docx_paragraphs(data: FileData) -> Iterator[str]:
+	"""Yield a DOCX file's lines one at a time, newline-separated.
+
+	Headers come first and footers last (each distinct text once), around the
+	body's paragraphs and table rows. word/document.xml is streamed out of the
+	zip rather than loaded into a document object model.
+	"""
+	with open_reader(data) as fh:
+		try:
+			package = zipfile.ZipFile(fh)
+		except zipfile.BadZipFile as e:
+			raise ValueError(f"Not a valid DOCX file: {e}") from e
+		with package:
+			if "word/document.xml" not in package.namelist():
+				raise ValueError("Not a valid DOCX file: word/document.xml is missing")
+			first = True
+
+			def emit(line: str) -> str:
+				nonlocal first
+				line, first = (line if first else "\n" + line), False
+				return line
+
+			def repeated_parts(kind: str, label: str) -> Iterator[str]:
+				seen = set()
+				for name in _docx_parts(package, kind):
+					with package.open(name) as stream:
+						text = " ".join(line.strip() for line in _iter_docx_part(stream) if line.strip())
+					if text and text not in seen:
+						seen.add(text)
+						yield emit(f"{label}: {text}")
+
+			yield from repeated_parts("header", "Header")
+			with package.open("word/document.xml") as stream:
+				for line in _iter_docx_part(stream):
+					yield emit(line)
+			yield from repeated_parts("footer", "Footer")
+
+
+class PdfplumberEngine:
+	"""Full layout analysis; slow, but finds text in pages other engines return empty"""
+	name = "pdfplumber"
+
+	@contextmanager
+	def open(self, data: FileData) -> Iterator[Any]:
+		"""The parsed document, for reading pages one at a time with page_text."""
+		if not pdfplumber:
+			raise RuntimeError("pdfplumber is not installed")
+		with open_reader(data) as fh, pdfplumber.open(fh) as pdf:
+			yield pdf
+
+	def page_text(self, pdf: Any, i: int) -> str:
+		"""Text of page i of an open document, releasing the page's layout cache once read."""
+		with span("ingest.pdf_page", page=i + 1, engine=self.name) as page_span:
+			page = pdf.pages[i]
+			text = page.extract_text() or ""
+			getattr(page, "close", page.flush_cache)()
+			page_span.set(chars=len(text))
+		return text
+
+	def page_count(self, data: FileData) -> int:
+		with self.open(data) as pdf:
+			return len(pdf.pages)
+
+	def iter_pages(self, data: FileData, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+		"""Yield the text of pages start..stop-1."""
+		with self.open(data) as pdf:
+			stop = len(pdf.pages) if stop is None else min(stop, len(pdf.pages))
+			for i in range(start, stop):
+				yield self.page_text(pdf, i)
+
+
+class PdfiumEngine:
+	"""Text-only extraction through PDFium; one to two orders of magnitude faster than pdfplumber"""
+	name = "pdfium"
+	# PDFium is not thread-safe, and the server process extracts on several threads
+	_lock = threading.Lock()
+
+	@staticmethod
+	def _open(data: FileData):
+		# PDFium reads a spooled file itself, loading only the objects it needs
+		return pdfium.PdfDocument(data.path if isinstance(data, SpooledFile) else data)
+
+	def page_count(self, data: FileData) -> int:
+		with self._lock:
+			document = self._open(data)
+			try:
+				return len(document)
+			finally:
+				document.close()
+
+	def iter_pages(self, data: FileData, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+		with self._lock:
+			document = self._open(data)
+		try:
+			stop = len(document) if stop is None else min(stop, len(document))
+			for i in range(start, stop):
+				with span("ingest.pdf_page", page=i + 1, engine=self.name) as page_span, self._lock:
+					page = document[i]
+					textpage = page.get_textpage()
+					text = textpage.get_text_range().replace("\r\n", "\n")
+					textpage.close()
+					page.close()
+					page_span.set(chars=len(text))
+				yield text
+		finally:
+			with self._lock:
+				document.close()
+
+
+def get_pdf_engine(name: str = PDF_ENGINE):
+	"""The configured PDF text engine; "auto" prefers pdfium when it is installed."""
+	if name == "auto":
+		name = "pdfium" if pdfium else "pdfplumber"
+	if name == "pdfium":
+		if not pdfium:
+			raise RuntimeError("pypdfium2 is not installed")
+		return PdfiumEngine()
+	if name == "pdfplumber":
+		return PdfplumberEngine()
+	raise ValueError(f"Unknown PDF engine: {name}")
+
+
+def iter_pdf_pages(data: FileData, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+	"""Yield the text of each page in turn (optionally only pages start..stop-1), newline-separated.
+
+	Pages are read with the configured engine. With a fast engine, pages it
+	returns no text for (e.g. unusual font encodings) are re-read with
+	pdfplumber, which parses the document once for all such pages. Memory
+	stays flat regardless of the page count.
+	"""
+	engine = get_pdf_engine()
+	fallback = PdfplumberEngine() if engine.name != "pdfplumber" and pdfplumber else None
+	with ExitStack() as stack:
+		fallback_pdf = None
+		for i, text in enumerate(engine.iter_pages(data, start, stop), start):
+			if not text.strip() and fallback is not None:
+				if fallback_pdf is None:
+					fallback_pdf = stack.enter_context(fallback.open(data))
+				text = fallback.page_text(fallback_pdf, i)
+			yield text if i == 0 else "\n" + text
+
+
+def _read_txt(data: FileData) -> str:
+	return "".join(iter_txt_chunks(data))
+
+
+def _read_docx(data: FileData) -> str:
+	return "".join(iter_docx_paragraphs(data))
+
+
+def _read_pdf(data: FileData) -> str:
+	return "".join(iter_pdf_pages(data))
+
+
+def _read_excel(data: FileData) -> str:
+	"""Summarise every sheet of a workbook in a single streaming pass per sheet."""
+	buf = open_reader(data)
 	try:
-		# Read all sheets from the Excel file
-		excel_file = pd.ExcelFile(buf)
-		sheet_names = excel_file.sheet_names
-		
-		text_parts.append(f"Excel File Analysis")
-		text_parts.append(f"Number of sheets: {len(sheet_names)}")
-		text_parts.append(f"Sheet names: {', '.join(sheet_names)}")
-		text_parts.append("")
-		
-		# Process each sheet
-		for sheet_name in sheet_names:
-			text_parts.append(f"=== Sheet: {sheet_name} ===")
-			
-			# Read the sheet
-			df = pd.read_excel(buf, sheet_name=sheet_name)
-			
-			# Add sheet information
-			text_parts.append(f"Columns: {', '.join(df.columns.tolist())}")
-			text_parts.append(f"Rows: {len(df)}")
-			text_parts.append("")
-			
-			# Add sample data (first 10 rows)
-			if len(df) > 0:
-				text_parts.append("Sample Data (first 10 rows):")
-				text_parts.append(df.head(10).to_string(index=False))
-				text_parts.append("")
-				
-				# Add basic statistics for numeric columns
-				numeric_cols = df.select_dtypes(include=['number']).columns
-				if len(numeric_cols) > 0:
-					text_parts.append("Numeric Column Statistics:")
-					text_parts.append(df[numeric_cols].describe().to_string())
-					text_parts.append("")
-				
-				# Add value counts for categorical columns (first few categories)
-				categorical_cols = df.select_dtypes(include=['object']).columns
-				if len(categorical_cols) > 0:
-					text_parts.append("Categorical Column Value Counts (top 5):")
-					for col in categorical_cols[:3]:  # Limit to first 3 categorical columns
-						text_parts.append(f"\n{col}:")
-						value_counts = df[col].value_counts().head(5)
-						for value, count in value_counts.items():
-							text_parts.append(f"  {value}: {count}")
-					text_parts.append("")
-			else:
-				text_parts.append("Sheet is empty.")
-				text_parts.append("")
-			
-			# Reset buffer position for next sheet
-			buf.seek(0)
-		
-		return "\n".join(text_parts)
-		
-	except Exception as e:
-		# Fallback: try to read as a single sheet
+		is_zip = buf.read(2) == b"PK"
 		buf.seek(0)
-		try:
-			df = pd.read_excel(buf)
-			return _format_dataframe_text(df, "Excel Data")
-		except Exception as e2:
-			raise RuntimeError(f"Failed to read Excel file: {str(e2)}")
+		if openpyxl and is_zip:
+			sheets = _iter_xlsx_sheets(buf)
+		else:
+			# Legacy .xls (or openpyxl missing): pandas parses the workbook once for all sheets
+			sheets = _iter_dataframe_sheets(buf)
+
+		sheet_parts = []
+		sheet_names = []
+		for sheet_name, rows in sheets:
+			sheet_names.append(sheet_name)
+			sheet_parts.append(f"=== Sheet: {sheet_name} ===")
+			with span("ingest.sheet", sheet=sheet_name) as sheet_span:
+				header = next(rows, None)
+				profiler = TableProfiler(header or [])
+				profiler.add_rows(rows)
+				sheet_parts.append(profiler.format_text())
+				sheet_span.set(rows=profiler.rows)
+			if profiler.rows == 0:
+				sheet_parts.append("Sheet is empty.")
+				sheet_parts.append("")
+	except Exception as e:
+		raise RuntimeError(f"Failed to read Excel file: {str(e)}")
+	finally:
+		buf.close()
+
+	text_parts = [
+		"Excel File Analysis",
+		f"Number of sheets: {len(sheet_names)}",
+		f"Sheet names: {', '.join(sheet_names)}",
+		"",
+	]
+	return "\n".join(text_parts + sheet_parts)
+
+
+def _iter_xlsx_sheets(buf: BinaryIO) -> Iterator[Tuple[str, Iterator[tuple]]]:
+	"""Yield (sheet_name, row_iterator) using openpyxl's read-only streaming mode."""
+	workbook = openpyxl.load_workbook(buf, read_only=True, data_only=True)
+	try:
+		for worksheet in workbook.worksheets:
+			yield worksheet.title, worksheet.iter_rows(values_only=True)
+	finally:
+		workbook.close()
 
 
-def _read_csv(file_bytes: bytes) -> str:
+def _iter_dataframe_sheets(buf: BinaryIO) -> Iterator[Tuple[str, Iterator[tuple]]]:
 	if not pd:
 		raise RuntimeError("pandas is not installed")
-	buf = io.BytesIO(file_bytes)
+	frames = pd.read_excel(buf, sheet_name=None)
+	for sheet_name, df in frames.items():
+		rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+		yield str(sheet_name), itertools.chain([tuple(df.columns)], rows)
+
+
+# Rows parsed per CSV chunk; bounds memory regardless of file size
+_CSV_CHUNK_ROWS = 50_000
+# Bytes sampled from the start of a CSV to pick its encoding
+_CSV_ENCODING_SAMPLE = 64 * 1024
+
+
+def _detect_csv_encoding(sample: bytes) -> str:
+	"""Pick an encoding from a prefix sample instead of re-parsing the whole file on failure."""
+	if sample.startswith(codecs.BOM_UTF8):
+		return "utf-8-sig"
 	try:
-		# Try to read CSV with default settings
-		df = pd.read_csv(buf)
-	except Exception:
-		# If that fails, try with different encoding
+		# Non-final decode tolerates a multi-byte character cut off at the end of the sample
+		codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+		return "utf-8"
+	except UnicodeDecodeError:
+		return "latin-1"
+
+
+def _read_csv(data: FileData) -> str:
+	"""Summarise a CSV in fixed-size chunks so memory stays bounded for multi-GB files."""
+	if not pd:
+		raise RuntimeError("pandas is not installed")
+	profiler = TableProfiler([])
+	with open_reader(data) as buf:
+		encoding = _detect_csv_encoding(buf.read(_CSV_ENCODING_SAMPLE))
 		buf.seek(0)
-		df = pd.read_csv(buf, encoding='latin-1')
-	
-	return _format_dataframe_text(df, "CSV Data")
-
-
-def _format_dataframe_text(df: pd.DataFrame, title: str) -> str:
-	"""Helper function to format DataFrame as text."""
-	text_parts = []
-	
-	# Add title and basic info
-	text_parts.append(f"{title}:")
-	text_parts.append(f"Columns: {', '.join(df.columns.tolist())}")
-	text_parts.append(f"Rows: {len(df)}")
-	text_parts.append("")
-	
-	# Add sample data
-	if len(df) > 0:
-		text_parts.append("Sample Data (first 10 rows):")
-		text_parts.append(df.head(10).to_string(index=False))
-		text_parts.append("")
-		
-		# Add basic statistics for numeric columns
-		numeric_cols = df.select_dtypes(include=['number']).columns
-		if len(numeric_cols) > 0:
-			text_parts.append("Numeric Column Statistics:")
-			text_parts.append(df[numeric_cols].describe().to_string())
-			text_parts.append("")
-		
-		# Add value counts for categorical columns (first few categories)
-		categorical_cols = df.select_dtypes(include=['object']).columns
-		if len(categorical_cols) > 0:
-			text_parts.append("Categorical Column Value Counts (top 5):")
-			for col in categorical_cols[:3]:  # Limit to first 3 categorical columns
-				text_parts.append(f"\n{col}:")
-				value_counts = df[col].value_counts().head(5)
-				for value, count in value_counts.items():
-					text_parts.append(f"  {value}: {count}")
-	
-	return "\n".join(text_parts)
-
-
-def load_file_to_text(filename: str, file_bytes: bytes) -> str:
-	"""Return extracted text from an uploaded file based on extension."""
+		# Invalid bytes past the sampled prefix are replaced rather than failing the whole parse
+		with pd.read_csv(buf, encoding=encoding, encoding_errors="replace", chunksize=_CSV_CHUNK_ROWS) as reader:
+			for chunk in reader:
+				profiler.add_frame(chunk)
+	return profiler.format_text("CSV Data")
+
+
+def iter_file_chunks(filename: str, data: FileData) -> Iterator[str]:
+	"""Lazily yield text chunks of an uploaded file; "".join() of the chunks is the full text.
+
+	PDF and DOCX files are streamed page by page and paragraph by paragraph.
+	Tabular files yield their (already bounded) summary as a single chunk.
+	"""
 	lower = filename.lower()
 	if lower.endswith(".txt"):
-		return _read_txt(file_bytes)
+		return iter_txt_chunks(data)
 	if lower.endswith(".docx"):
-		return _read_docx(file_bytes)
+		return iter_docx_paragraphs(data)
 	if lower.endswith(".pdf"):
-		return _read_pdf(file_bytes)
+		return iter_pdf_pages(data)
 	if lower.endswith(".csv"):
-		return _read_csv(file_bytes)
+		return iter([_read_csv(data)])
 	if lower.endswith((".xlsx", ".xls")):
-		return _read_excel(file_bytes)
+		return iter([_read_excel(data)])
 	raise ValueError(f"Unsupported file type: {filename}")
 
+
+def take_within_budget(chunks: Iterable[str], max_chars: Optional[int] = None, max_tokens: Optional[int] = None) -> str:
+	"""Join chunks until a character or token budget is reached.
+
+	Iteration stops at the first chunk that does not fit, which is truncated to
+	the remaining budget, so unread pages are never extracted.
+	"""
+	return "".join(_Budget(max_chars, max_tokens).take(chunks))
+
+
+class _Budget:
+	"""Characters and tokens left of a per-file budget, spent chunk by chunk"""
+
+	def __init__(self, max_chars: Optional[int] = None, max_tokens: Optional[int] = None):
+		self.max_chars = max_chars
+		self.max_tokens = max_tokens
+		self.used_chars = 0
+		self.used_tokens = 0
+		self.reached = False
+
+	def remaining(self) -> Tuple[Optional[int], Optional[int]]:
+		"""(max_chars, max_tokens) for reading on where this budget left off."""
+		return (
+			None if self.max_chars is None else self.max_chars - self.used_chars,
+			None if self.max_tokens is None else self.max_tokens - self.used_tokens,
+		)
+
+	def take(self, chunks: Iterable[str]) -> List[str]:
+		"""The chunks that fit, the last one truncated; stops iterating once the budget is reached."""
+		parts: List[str] = []
+		iterator = iter(chunks)
+		try:
+			for chunk in iterator:
+				if self.reached:
+					break
+				if self.max_chars is not None and self.used_chars + len(chunk) > self.max_chars:
+					parts.append(chunk[:self.max_chars - self.used_chars])
+					self.reached = True
+					break
+				if self.max_tokens is not None:
+					chunk_tokens = count_tokens(chunk)
+					if self.used_tokens + chunk_tokens > self.max_tokens:
+						remaining = self.max_tokens - self.used_tokens
+						parts.append(chunk[:int(len(chunk) * remaining / chunk_tokens)])
+						self.reached = True
+						break
+					self.used_tokens += chunk_tokens
+				parts.append(chunk)
+				self.used_chars += len(chunk)
+		finally:
+			# Release open documents held by generator-based extractors
+			close = getattr(iterator, "close", None)
+			if close:
+				close()
+		return parts
+
+
+def load_file_to_text(
+	filename: str,
+	data: FileData,
+	use_cache: bool = True,
+	max_chars: Optional[int] = None,
+	max_tokens: Optional[int] = None,
+) -> str:
+	"""Return extracted text from an uploaded file based on extension.
+
+	Extraction stops early once max_chars or max_tokens is reached. Results are
+	served from the shared extraction cache when the same file content has been
+	extracted before with the same budget.
+	"""
+	with span("ingest.file", filename=filename, bytes=data_size(data)) as file_span:
+		if not (use_cache and EXTRACTION_CACHE_ENABLED):
+			return _extract_text(filename, data, max_chars, max_tokens)
+
+		cache = get_extraction_cache()
+		with mapped(data) as buffer:
+			key = ExtractionCache.make_key(filename, buffer, _cache_version(max_chars, max_tokens))
+		text = cache.get(key)
+		file_span.set(cached=text is not None)
+		if text is None:
+			text = _extract_text(filename, data, max_chars, max_tokens)
+			cache.put(key, text)
+		return text
+
+
+def _cache_version(max_chars: Optional[int], max_tokens: Optional[int]) -> str:
+	if max_chars is None and max_tokens is None:
+		return EXTRACTOR_VERSION
+	return f"{EXTRACTOR_VERSION}:chars={max_chars}:tokens={max_tokens}"
+
+
+def _extract_text(filename: str, data: FileData, max_chars: Optional[int] = None, max_tokens: Optional[int] = None) -> str:
+	chunks = iter_file_chunks(filename, data)
+	if max_chars is None and max_tokens is None:
+		return "".join(chunks)
+	return take_within_budget(chunks, max_chars, max_tokens)
+
+
+@dataclass
+class FileExtractionResult:
+	"""Outcome of extracting a single file in a batch"""
+	filename: str
+	text: str = ""
+	error: Optional[str] = None
+	elapsed_seconds: float = 0.0
+	cached: bool = False
+
+	@property
+	def ok(self) -> bool:
+		return self.error is None
+
+
+_ingest_pool: Optional[ProcessPoolExecutor] = None
+_ingest_pool_lock = threading.Lock()
+
+
+def _get_ingest_pool() -> ProcessPoolExecutor:
+	"""Return the process-wide ingest pool, bounded by INGEST_MAX_WORKERS."""
+	global _ingest_pool
+	with _ingest_pool_lock:
+		if _ingest_pool is None:
+			# Spawned, not forked: a fork of this multi-threaded process could inherit
+			# a lock (e.g. PdfiumEngine._lock) held by another session's thread, forever
+			_ingest_pool = ProcessPoolExecutor(max_workers=INGEST_MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+		return _ingest_pool
+
+
+def _reset_ingest_pool() -> None:
+	global _ingest_pool
+	with _ingest_pool_lock:
+		if _ingest_pool is not None:
+			_ingest_pool.shutdown(wait=False, cancel_futures=True)
+		_ingest_pool = None
+
+
+def _timed_extract(
+	filename: str,
+	data: FileData,
+	max_chars: Optional[int] = None,
+	max_tokens: Optional[int] = None,
+) -> Tuple[str, Optional[str], float, List[Span]]:
+	"""Extract one file and return (text, error, elapsed_seconds, spans). Runs in worker processes.
+
+	Spans are returned rather than recorded so the parent can attach them to its trace.
+	"""
+	start = time.perf_counter()
+	with capture_spans() as spans:
+		try:
+			with span("ingest.file", filename=filename, bytes=data_size(data)) as file_span:
+				text = _extract_text(filename, data, max_chars, max_tokens)
+				file_span.set(chars=len(text))
+			return text, None, time.perf_counter() - start, spans
+		except Exception as e:
+			# Report as a string: not every extractor exception is picklable
+			return "", str(e) or type(e).__name__, time.perf_counter() - start, spans
+
+
+def _timed_extract_pdf_range(
+	filename: str,
+	data: FileData,
+	start_page: int,
+	stop_page: int,
+	max_chars: Optional[int] = None,
+	max_tokens: Optional[int] = None,
+) -> Tuple[List[str], Optional[str], float, List[Span]]:
+	"""Like _timed_extract, for pages start_page..stop_page-1 of a PDF, returned page by page.
+
+	The pages are kept apart so the parent can apply a file's budget across
+	ranges exactly as a single pass would; a budget given here stops the range early.
+	"""
+	start = time.perf_counter()
+	with capture_spans() as spans:
+		try:
+			with span("ingest.pdf_range", filename=filename, start_page=start_page + 1, stop_page=stop_page) as range_span:
+				pages = iter_pdf_pages(data, start_page, stop_page)
+				if max_chars is None and max_tokens is None:
+					pages = list(pages)
+				else:
+					pages = _Budget(max_chars, max_tokens).take(pages)
+				range_span.set(chars=sum(len(page) for page in pages))
+			return pages, None, time.perf_counter() - start, spans
+		except Exception as e:
+			return [], str(e) or type(e).__name__, time.perf_counter() - start, spans
+
+
+def load_files_to_text(
+	files: Sequence[Tuple[str, FileData]],
+	use_cache: bool = True,
+	max_chars: Optional[int] = None,
+	max_tokens: Optional[int] = None,
+) -> List[FileExtractionResult]:
+	"""Extract many (filename, data) pairs in parallel across the ingest process pool.
+
+	Results keep the input order. A failing file is reported on its own result
+	and does not affect the others. max_chars and max_tokens apply per file.
+	PDFs of PDF_PARALLEL_MIN_PAGES pages or more are split into page ranges
+	extracted on separate workers and joined back in page order; with a budget,
+	only the pages estimated to fill it are split (see _plan_tasks).
+	"""
+	with span("ingest", files=len(files)) as ingest_span:
+		results = _load_files_to_text(files, use_cache, max_chars, max_tokens)
+		ingest_span.set(cached=sum(result.cached for result in results), failed=sum(not result.ok for result in results))
+	return results
+
+
+def _load_files_to_text(
+	files: Sequence[Tuple[str, FileData]],
+	use_cache: bool,
+	max_chars: Optional[int],
+	max_tokens: Optional[int],
+) -> List[FileExtractionResult]:
+	cache = get_extraction_cache() if (use_cache and EXTRACTION_CACHE_ENABLED) else None
+	results: List[Optional[FileExtractionResult]] = [None] * len(files)
+	keys: List[Optional[str]] = [None] * len(files)
+	pending: List[int] = []
+
+	for i, (filename, data) in enumerate(files):
+		if cache is not None:
+			start = time.perf_counter()
+			with mapped(data) as buffer:
+				keys[i] = ExtractionCache.make_key(filename, buffer, _cache_version(max_chars, max_tokens))
+			text = cache.get(keys[i])
+			if text is not None:
+				results[i] = FileExtractionResult(filename, text, elapsed_seconds=time.perf_counter() - start, cached=True)
+				continue
+		pending.append(i)
+
+	# Each task is (file index, function, args); large PDFs are split into page ranges
+	plans = {i: _plan_tasks(i, *files[i], max_chars, max_tokens) for i in pending}
+	tasks = [task for planned, _ in plans.values() for task in planned]
+	merged = {}
+	for (i, _, _), outcome in zip(tasks, _extract_in_pool(tasks)):
+		merged.setdefault(i, []).append(outcome)
+
+	outcomes = {}
+	follow_ups = []
+	for i, parts in merged.items():
+		outcomes[i] = _merge_outcomes(parts, max_chars, max_tokens)
+		_, error, _, _, budget = outcomes[i]
+		rest = plans[i][1]
+		if error is None and rest is not None and budget is not None and not budget.reached:
+			# The estimated pages fell short of the budget: read on from where they stopped
+			filename, data = files[i]
+			follow_ups.append((i, _timed_extract_pdf_range, (filename, data, *rest, *budget.remaining())))
+	for (i, _, _), (pages, error, elapsed, spans) in zip(follow_ups, _extract_in_pool(follow_ups)):
+		parts, _, first_elapsed, first_spans, _ = outcomes[i]
+		outcomes[i] = (parts + list(pages), error, first_elapsed + elapsed, first_spans + spans, None)
+
+	for i, (parts, error, elapsed, spans, _) in outcomes.items():
+		adopt(spans)
+		filename = files[i][0]
+		text = "" if error is not None else "".join(parts)
+		results[i] = FileExtractionResult(filename, text, error=error, elapsed_seconds=elapsed)
+		if cache is not None and error is None:
+			cache.put(keys[i], text)
+
+	return results
+
+
+def _plan_tasks(
+	index: int,
+	filename: str,
+	data: FileData,
+	max_chars: Optional[int],
+	max_tokens: Optional[int],
+) -> Tuple[List[Tuple[int, Callable, tuple]], Optional[Tuple[int, int]]]:
+	"""Extraction tasks for a file, and the pages (start, stop) left to read if they fall short of its budget.
+
+	A PDF long enough to split is cut into one page range per worker. With a
+	budget, only the first pages estimated to fill it (at
+	PDF_ESTIMATED_TOKENS_PER_PAGE) are split, so ranges past the budget are
+	never read; should those pages fall short, the rest is read in one more
+	pass that stops at the budget.
+	"""
+	whole = [(index, _timed_extract, (filename, data, max_chars, max_tokens))], None
+	if INGEST_MAX_WORKERS <= 1 or not filename.lower().endswith(".pdf"):
+		return whole
+	try:
+		pages = get_pdf_engine().page_count(data)
+	except Exception:
+		# Unreadable here means unreadable in the worker too, which reports the error
+		return whole
+	if pages < PDF_PARALLEL_MIN_PAGES:
+		return whole
+	budgets = []  # the budget in tokens, for estimating the pages that fill it
+	if max_tokens is not None:
+		budgets.append(max_tokens)
+	if max_chars is not None:
+		budgets.append(max_chars / CHARS_PER_TOKEN)
+	covered = min([pages] + [math.ceil(tokens / PDF_ESTIMATED_TOKENS_PER_PAGE) for tokens in budgets])
+	ranges = min(INGEST_MAX_WORKERS, covered // PDF_MIN_PAGES_PER_TASK)
+	if ranges <= 1:
+		return whole
+	bounds = [covered * r // ranges for r in range(ranges + 1)]
+	tasks = [
+		(index, _timed_extract_pdf_range, (filename, data, start, stop))
+		for start, stop in zip(bounds, bounds[1:])
+	]
+	return tasks, ((covered, pages) if budgets and covered < pages else None)
+
+
+def _merge_outcomes(
+	parts: List[tuple], max_chars: Optional[int], max_tokens: Optional[int]
+) -> Tuple[List[str], Optional[str], float, List[Span], Optional[_Budget]]:
+	"""Combine the outcomes of a file's tasks, in page order, into (texts, error, elapsed, spans, budget).
+
+	Page ranges are cut to the file's budget here; budget is what was spent of
+	it, or None when the file was extracted in a single task.
+	"""
+	if len(parts) == 1 and isinstance(parts[0][0], str):
+		text, error, elapsed, spans = parts[0]
+		return [text], error, elapsed, spans, None
+	error = next((error for _, error, _, _ in parts if error is not None), None)
+	elapsed = max(elapsed for _, _, elapsed, _ in parts)
+	spans = [s for _, _, _, range_spans in parts for s in range_spans]
+	if error is not None:
+		return [], error, elapsed, spans, None
+	budget = _Budget(max_chars, max_tokens)
+	pages = budget.take(page for range_pages, _, _, _ in parts for page in range_pages)
+	return pages, None, elapsed, spans, budget
+
+
+def _extract_in_pool(tasks: List[Tuple[int, Callable, tuple]]) -> List[tuple]:
+	"""Run tasks on the ingest pool, in task order.
+
+	Even a single task goes to the pool: a file that crashes or exhausts a
+	worker must not take the server process down with it.
+	"""
+	if not tasks:
+		return []
+	outcomes: List[Optional[tuple]] = [None] * len(tasks)
+	try:
+		pool = _get_ingest_pool()
+		futures = {pool.submit(fn, *args): t for t, (_, fn, args) in enumerate(tasks)}
+		for future in as_completed(futures):
+			t = futures[future]
+			try:
+				outcomes[t] = future.result()
+			except BrokenProcessPool:
+				raise
+			except Exception as e:
+				outcomes[t] = ("", str(e) or type(e).__name__, 0.0, [])
+	except BrokenProcessPool:
+		# A worker died (e.g. OOM on a huge file). Rebuild the pool for the next
+		# batch rather than retrying in the server process, which could die too.
+		_reset_ingest_pool()
+		outcomes = [
+			outcome or ("", "extraction worker process terminated unexpectedly", 0.0, [])
+			for outcome in outcomes
+		]
+	return outcomes
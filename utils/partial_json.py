@@ -0,0 +1,147 @@
+from __future__ import annotations
+from typing import Any, Tuple
+import json
+
+_WHITESPACE = " \t\n\r"
+_LITERALS = {"true": True, "false": False, "null": None}
+_NUMBER_CHARS = set("-+0123456789.eE")
+
+
+class _Incomplete(Exception):
+	"""Raised when the input ends in the middle of a value that cannot be kept"""
+
+
+class _PartialParser:
+	"""Recursive-descent JSON parser that tolerates input cut off at any point.
+
+	Objects and arrays are closed implicitly at end of input, and a string cut
+	off mid-way is kept (or dropped, with keep_partial_strings=False) along with
+	its key. Numbers and literals must be complete to be kept.
+	"""
+
+	def __init__(self, text: str, keep_partial_strings: bool):
+		self.text = text
+		self.pos = 0
+		self.keep_partial_strings = keep_partial_strings
+
+	def _skip_ws(self) -> None:
+		while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+			self.pos += 1
+
+	def _at_end(self) -> bool:
+		self._skip_ws()
+		return self.pos >= len(self.text)
+
+	def parse_value(self) -> Any:
+		if self._at_end():
+			raise _Incomplete()
+		ch = self.text[self.pos]
+		if ch == "{":
+			return self._parse_object()
+		if ch == "[":
+			return self._parse_array()
+		if ch == '"':
+			value, complete = self._parse_string()
+			if not complete and not self.keep_partial_strings:
+				raise _Incomplete()
+			return value
+		return self._parse_scalar()
+
+	def _parse_object(self) -> dict:
+		result: dict = {}
+		self.pos += 1
+		while True:
+			if self._at_end():
+				return result
+			ch = self.text[self.pos]
+			if ch == "}":
+				self.pos += 1
+				return result
+			if ch == ",":
+				self.pos += 1
+				continue
+			if ch != '"':
+				raise ValueError(f"Expected object key at position {self.pos}")
+			key, complete = self._parse_string()
+			if not complete or self._at_end():
+				return result
+			if self.text[self.pos] != ":":
+				raise ValueError(f"Expected ':' at position {self.pos}")
+			self.pos += 1
+			try:
+				result[key] = self.parse_value()
+			except _Incomplete:
+				return result
+
+	def _parse_array(self) -> list:
+		result: list = []
+		self.pos += 1
+		while True:
+			if self._at_end():
+				return result
+			ch = self.text[self.pos]
+			if ch == "]":
+				self.pos += 1
+				return result
+			if ch == ",":
+				self.pos += 1
+				continue
+			try:
+				result.append(self.parse_value())
+			except _Incomplete:
+				return result
+
+	def _parse_string(self) -> Tuple[str, bool]:
+		"""Return (value, complete) for the string starting at the current quote."""
+		start = self.pos
+		self.pos += 1
+		escaped = False
+		while self.pos < len(self.text):
+			ch = self.text[self.pos]
+			if escaped:
+				escaped = False
+			elif ch == "\\":
+				escaped = True
+			elif ch == '"':
+				self.pos += 1
+				return json.loads(self.text[start:self.pos]), True
+			self.pos += 1
+		# Cut off inside the string: drop a dangling escape sequence and close it
+		body = self.text[start + 1:]
+		for cut in range(len(body), max(len(body) - 6, -1), -1):
+			try:
+				return json.loads('"' + body[:cut] + '"'), False
+			except json.JSONDecodeError:
+				continue
+		return "", False
+
+	def _parse_scalar(self) -> Any:
+		start = self.pos
+		while self.pos < len(self.text) and self.text[self.pos] not in ",]}" + _WHITESPACE:
+			self.pos += 1
+		token = self.text[start:self.pos]
+		if token in _LITERALS:
+			return _LITERALS[token]
+		if self.pos >= len(self.text):
+			# Possibly cut off mid-token ("tr", "12.")
+			raise _Incomplete()
+		if token and set(token) <= _NUMBER_CHARS:
+			return json.loads(token)
+		raise ValueError(f"Invalid JSON token {token!r} at position {start}")
+
+
+def parse_partial_json(text: str, keep_partial_strings: bool = True) -> Any:
+	"""Parse JSON that may be truncated, returning the longest well-formed prefix.
+
+	Raises ValueError for input that is malformed rather than merely incomplete.
+	"""
+	text = text.strip()
+	if not text:
+		return None
+	parser = _PartialParser(text, keep_partial_strings)
+	try:
+		return parser.parse_value()
+	except _Incomplete:
+		return None
+	except json.JSONDecodeError as e:
+		raise ValueError(str(e)) from e
@@ -21,3 +21,24 @@ class Prompts:
 		"Ensure the plan aligns with the campaign objectives and budget constraints."
 	)
 
+	# Follow-up when a structured reply failed to parse: ask only for the fields still needed
+	structured_repair_prompt: str = (
+		"Your previous reply could not be used: {problem}. These fields were received and are final:\n"
+		"{kept}\n\n"
+		"Reply with only the remaining fields ({fields}), consistent with the fields above and with the "
+		"original instructions."
+	)
+
+	# Map step of research context packing: condense one chunk of research
+	research_chunk_summary_prompt: str = (
+		"You are a market research analyst. Condense the provided excerpt of market research into a dense summary "
+		"that preserves every fact, figure, segment, trend and quote relevant to the marketing objectives. "
+		"Drop boilerplate and repetition. Do not add information that is not in the excerpt."
+	)
+
+	# Reduce step of research context packing: merge several chunk summaries
+	research_merge_prompt: str = (
+		"You are a market research analyst. Merge the provided research summaries into a single dense summary. "
+		"Keep every distinct fact, figure and insight relevant to the marketing objectives, remove duplicates, "
+		"and do not add information that is not in the summaries."
+	)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+from contextlib import closing
+from typing import Iterable, Optional, Type, TypeVar, Union
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from pydantic import BaseModel
+
+from config.settings import (
+	LLM_BACKEND,
+	RESPONSE_CACHE_PATH,
+	RESPONSE_CACHE_TTL_SECONDS,
+	RESPONSE_CACHE_MAX_ENTRIES,
+)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def normalise_text(text: str) -> str:
+	"""Case- and whitespace-insensitive form of free text used in cache keys."""
+	return " ".join(text.split()).casefold()
+
+
+def hash_text(text: Union[str, Iterable[str]]) -> str:
+	"""sha256 of text, which may be given as segments; hashed without joining, to the same digest."""
+	digest = hashlib.sha256()
+	for segment in [text] if isinstance(text, str) else text:
+		digest.update(segment.encode("utf-8"))
+	return digest.hexdigest()
+
+
+class ResponseCache:
+	"""SQLite-backed cache of parsed LLM responses with a TTL and LRU size bound"""
+
+	def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+		self.path = path
+		self.ttl_seconds = ttl_seconds
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+		self._lock = threading.Lock()
+		os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+		with self._connect() as conn:
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute(
+				"CREATE TABLE IF NOT EXISTS responses ("
+				"key TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+				"created REAL NOT NULL, accessed REAL NOT NULL)"
+			)
+			conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+	@staticmethod
+	def make_key(kind: str, **parts) -> str:
+		"""Return a stable key for a request described by keyword parts."""
+		# Keyed by backend too, so stub replies never answer real requests
+		payload = json.dumps({"kind": kind, "backend": LLM_BACKEND, **parts}, sort_keys=True, default=str)
+		return hash_text(payload)
+
+	def get(self, key: str, model_cls: Type[ModelT]) -> Optional[ModelT]:
+		now = time.time()
+		with self._connect() as conn:
+			row = conn.execute(
+				"SELECT payload FROM responses WHERE key = ? AND created > ?",
+				(key, now - self.ttl_seconds),
+			).fetchone()
+			if row is not None:
+				conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+		with self._lock:
+			if row is None:
+				self.misses += 1
+				return None
+			self.hits += 1
+		return model_cls.model_validate_json(row[0])
+
+	def put(self, key: str, kind: str, value: BaseModel) -> None:
+		now = time.time()
+		with self._connect() as conn:
+			conn.execute(
+				"INSERT OR REPLACE INTO responses (key, kind, payload, created, accessed) VALUES (?, ?, ?, ?, ?)",
+				(key, kind, value.model_dump_json(), now, now),
+			)
+			conn.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl_seconds,))
+			conn.execute(
+				"DELETE FROM responses WHERE key IN ("
+				"SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+				(self.max_entries,),
+			)
+
+	def clear(self) -> None:
+		with self._connect() as conn:
+			conn.execute("DELETE FROM responses")
+
+	def _connect(self) -> closing:
+		# A short-lived autocommit connection per operation keeps the cache safe to share across threads
+		return closing(sqlite3.connect(self.path, timeout=10, isolation_level=None))
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+	"""Return the process-wide LLM response cache."""
+	global _cache
+	if _cache is None:
+		with _cache_lock:
+			if _cache is None:
+				_cache = ResponseCache(
+					RESPONSE_CACHE_PATH,
+					ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+					max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+				)
+	return _cache
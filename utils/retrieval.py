@@ -0,0 +1,213 @@
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import re
+
+from config.settings import MODEL, RETRIEVAL_ENABLED, RETRIEVAL_TOKEN_BUDGET, RETRIEVAL_PASSAGE_TOKENS
+from utils.token_counter import count_tokens, split_into_chunks
+from utils.tracing import span
+
+# BM25 term-frequency saturation and length normalisation
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TERM = re.compile(r"[^\W_]+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_STOPWORDS = frozenset(
+	"a an and are as at be been but by for from has have in into is it its of on or our that the their "
+	"them they this to was we were will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+	"""Lower-cased word terms used for both passages and queries."""
+	return [term for term in _TERM.findall(text.casefold()) if len(term) > 1 and term not in _STOPWORDS]
+
+
+@dataclass
+class Passage:
+	source: str  # file the passage was extracted from
+	position: int  # index of the passage within its source
+	text: str
+	tokens: int
+	score: float = 0.0
+	document: int = 0  # index of the source document; names may repeat (e.g. 2023/ and 2024/report.pdf)
+
+
+@dataclass
+class RetrievedContext:
+	"""Research passages selected for a query, grouped by source in document order"""
+	segments: List[str]  # source headers, separators and passage texts; "".join() is the context
+	original_tokens: int
+	selected_tokens: int
+	passages: List[Passage] = field(default_factory=list)
+	total_passages: int = 0
+
+	@property
+	def filtered(self) -> bool:
+		return self.selected_tokens < self.original_tokens
+
+	@property
+	def text(self) -> str:
+		"""The context as one string, built on each access; read it once, where the prompt is made."""
+		return "".join(self.segments)
+
+	def passages_per_source(self) -> Dict[str, int]:
+		return dict(Counter(passage.source for passage in self.passages))
+
+
+class BM25Index:
+	"""In-memory inverted index over passages, scored with Okapi BM25"""
+
+	def __init__(self, passages: Sequence[Passage], k1: float = BM25_K1, b: float = BM25_B):
+		self.passages = list(passages)
+		self.k1 = k1
+		self.b = b
+		self.postings: Dict[str, List[Tuple[int, int]]] = {}
+		self.lengths: List[int] = []
+		for i, passage in enumerate(self.passages):
+			terms = Counter(tokenize(passage.text))
+			self.lengths.append(sum(terms.values()))
+			for term, tf in terms.items():
+				self.postings.setdefault(term, []).append((i, tf))
+		self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+	def scores(self, query: str) -> List[float]:
+		scores = [0.0] * len(self.passages)
+		n = len(self.passages)
+		for term in set(tokenize(query)):
+			postings = self.postings.get(term)
+			if not postings:
+				continue
+			idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+			for i, tf in postings:
+				norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.average_length or 1))
+				scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+		return scores
+
+
+def split_passages(
+	source: str, text: str, max_tokens: int = RETRIEVAL_PASSAGE_TOKENS, model_name: str = MODEL, document: int = 0
+) -> List[Passage]:
+	"""Cut a document into passages of whole paragraphs, each at most about max_tokens."""
+	passages: List[Passage] = []
+	current: List[str] = []
+	current_tokens = 0
+
+	def flush():
+		nonlocal current, current_tokens
+		if current:
+			passages.append(Passage(source, len(passages), "\n\n".join(current), current_tokens, document=document))
+		current = []
+		current_tokens = 0
+
+	for paragraph in _PARAGRAPH_BREAK.split(text):
+		paragraph = paragraph.strip()
+		if not paragraph:
+			continue
+		tokens = count_tokens(paragraph, model_name)
+		if tokens > max_tokens:
+			flush()
+			for piece in split_into_chunks(paragraph, max_tokens, model_name):
+				passages.append(Passage(source, len(passages), piece, count_tokens(piece, model_name), document=document))
+			continue
+		if current_tokens + tokens > max_tokens:
+			flush()
+		current.append(paragraph)
+		current_tokens += tokens
+	flush()
+	return passages
+
+
+def _source_header(source: str) -> str:
+	return f"### Source: {source}"
+
+
+def retrieve_research(
+	documents: Sequence[Tuple[str, str]],
+	query: str,
+	budget_tokens: Optional[int] = None,
+	model_name: str = MODEL,
+) -> RetrievedContext:
+	"""Select the passages of (source, text) documents most relevant to `query` within budget_tokens.
+
+	Research that already fits the budget is returned whole. Otherwise passages
+	are ranked by BM25 against the query; passages that match no query term
+	are ranked after those that do, leading passages of each file first. The
+	result keeps the chosen passages in document order under a header naming
+	their source file. budget_tokens defaults to RETRIEVAL_TOKEN_BUDGET, or no
+	limit when retrieval is disabled.
+	"""
+	if budget_tokens is None:
+		budget_tokens = RETRIEVAL_TOKEN_BUDGET if RETRIEVAL_ENABLED else math.inf
+	with span("retrieval", documents=len(documents)) as retrieval_span:
+		retrieved = _retrieve(documents, query, budget_tokens, model_name)
+		retrieval_span.set(
+			original_tokens=retrieved.original_tokens,
+			selected_tokens=retrieved.selected_tokens,
+			passages=len(retrieved.passages),
+		)
+	return retrieved
+
+
+def _retrieve(documents: Sequence[Tuple[str, str]], query: str, budget_tokens: float, model_name: str) -> RetrievedContext:
+	documents = [(source, text.strip()) for source, text in documents if text.strip()]
+	original_tokens = sum(count_tokens(text, model_name) for _, text in documents)
+	if original_tokens <= budget_tokens:
+		return RetrievedContext(
+			segments=_join([(source, [text]) for source, text in documents]),
+			original_tokens=original_tokens,
+			selected_tokens=original_tokens,
+		)
+
+	passages = [
+		passage
+		for document, (source, text) in enumerate(documents)
+		for passage in split_passages(source, text, model_name=model_name, document=document)
+	]
+	for passage, score in zip(passages, BM25Index(passages).scores(query)):
+		passage.score = score
+	header_tokens = [count_tokens(_source_header(source), model_name) for source, _ in documents]
+	chosen = set()
+	headed = set()  # documents whose header is already paid for
+	used = 0
+	for i in sorted(range(len(passages)), key=lambda i: (-passages[i].score, passages[i].position)):
+		passage = passages[i]
+		cost = passage.tokens + (0 if passage.document in headed else header_tokens[passage.document])
+		if used + cost > budget_tokens:
+			continue
+		chosen.add(i)
+		headed.add(passage.document)
+		used += cost
+
+	selected = [passage for i, passage in enumerate(passages) if i in chosen]
+	grouped: Dict[int, List[str]] = {}
+	for passage in selected:
+		grouped.setdefault(passage.document, []).append(passage.text)
+	return RetrievedContext(
+		segments=_join([(documents[document][0], texts) for document, texts in grouped.items()]),
+		original_tokens=original_tokens,
+		selected_tokens=sum(passage.tokens for passage in selected),
+		passages=selected,
+		total_passages=len(passages),
+	)
+
+
+def _join(grouped: Sequence[Tuple[str, List[str]]]) -> List[str]:
+	"""Interleave source headers and texts with paragraph breaks, without copying the texts.
+
+	`grouped` is (source, texts) per document in document order; a source name
+	may appear more than once.
+	"""
+	segments: List[str] = []
+	for source, texts in grouped:
+		if segments:
+			segments.append("\n\n")
+		segments.append(f"{_source_header(source)}\n\n")
+		for i, text in enumerate(texts):
+			if i:
+				segments.append("\n\n")
+			segments.append(text)
+	return segments
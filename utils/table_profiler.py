@@ -0,0 +1,248 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import math
+import random
+
+try:
+	import numpy as np
+	import pandas as pd
+except Exception:
+	np = None
+	pd = None
+
+# Rows shown in the "Sample Data" section
+SAMPLE_ROWS = 10
+# Numeric values kept per column for quantile estimates (exact below this many rows)
+RESERVOIR_SIZE = 4096
+# Distinct values tracked per column for value counts (exact below this many distinct values)
+HEAVY_HITTER_CAPACITY = 1024
+
+
+class ColumnProfile:
+	"""Single-pass summary of one column.
+
+	Mean and standard deviation use Welford's online algorithm, quantiles come
+	from a fixed-size reservoir sample and value counts from a Misra-Gries
+	heavy-hitter summary, so memory per column is bounded regardless of row count.
+	"""
+
+	def __init__(self, name: str, seed: int = 0):
+		self.name = name
+		self.numeric_count = 0
+		self.text_count = 0
+		self.other_count = 0
+		self.mean = 0.0
+		self.m2 = 0.0
+		self.min = math.inf
+		self.max = -math.inf
+		self.reservoir: List[float] = []
+		self.counts: Dict[str, int] = {}
+		self._rng = random.Random(seed)
+
+	@property
+	def is_numeric(self) -> bool:
+		return self.numeric_count > 0 and self.text_count == 0 and self.other_count == 0
+
+	@property
+	def is_categorical(self) -> bool:
+		return self.text_count > 0
+
+	def add(self, value: Any) -> None:
+		if value is None or (isinstance(value, float) and math.isnan(value)):
+			return
+		if isinstance(value, (int, float)) and not isinstance(value, bool):
+			self._add_number(float(value))
+		elif isinstance(value, str):
+			if not value.strip():
+				return
+			self.text_count += 1
+			self._add_count(value)
+		else:
+			self.other_count += 1
+
+	def _add_number(self, x: float) -> None:
+		self.numeric_count += 1
+		delta = x - self.mean
+		self.mean += delta / self.numeric_count
+		self.m2 += delta * (x - self.mean)
+		self.min = min(self.min, x)
+		self.max = max(self.max, x)
+		if len(self.reservoir) < RESERVOIR_SIZE:
+			self.reservoir.append(x)
+		else:
+			j = self._rng.randrange(self.numeric_count)
+			if j < RESERVOIR_SIZE:
+				self.reservoir[j] = x
+
+	def _add_count(self, value: str) -> None:
+		counts = self.counts
+		if value in counts:
+			counts[value] += 1
+		elif len(counts) < HEAVY_HITTER_CAPACITY:
+			counts[value] = 1
+		else:
+			# Misra-Gries: decrement everything and drop exhausted entries (amortised O(1))
+			for key in list(counts):
+				counts[key] -= 1
+				if counts[key] == 0:
+					del counts[key]
+
+	def add_numbers(self, values: "np.ndarray") -> None:
+		"""Fold a chunk of non-null numbers in at once (Chan et al. parallel variance merge)."""
+		m = len(values)
+		if m == 0:
+			return
+		n = self.numeric_count
+		chunk_mean = float(values.mean())
+		chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+		delta = chunk_mean - self.mean
+		total = n + m
+		self.mean += delta * m / total
+		self.m2 += chunk_m2 + delta * delta * n * m / total
+		self.numeric_count = total
+		self.min = min(self.min, float(values.min()))
+		self.max = max(self.max, float(values.max()))
+
+		# Reservoir sampling (Algorithm R) over the chunk, vectorised
+		free = max(0, RESERVOIR_SIZE - len(self.reservoir))
+		self.reservoir.extend(values[:free].tolist())
+		if m > free:
+			rest = values[free:]
+			positions = np.arange(n + free, total)
+			draws = np.random.default_rng(self._rng.randrange(2 ** 32)).integers(0, positions + 1)
+			keep = draws < RESERVOIR_SIZE
+			for slot, value in zip(draws[keep].tolist(), rest[keep].tolist()):
+				self.reservoir[slot] = value
+
+	def add_counts(self, counts: Dict[str, int]) -> None:
+		"""Merge a chunk's value counts into the Misra-Gries summary."""
+		merged = self.counts
+		for value, count in counts.items():
+			self.text_count += count
+			merged[value] = merged.get(value, 0) + count
+		if len(merged) > HEAVY_HITTER_CAPACITY:
+			threshold = sorted(merged.values(), reverse=True)[HEAVY_HITTER_CAPACITY]
+			self.counts = {value: count - threshold for value, count in merged.items() if count > threshold}
+
+	def std(self) -> float:
+		if self.numeric_count < 2:
+			return math.nan
+		return math.sqrt(self.m2 / (self.numeric_count - 1))
+
+	def quantile(self, q: float) -> float:
+		"""Linear-interpolated quantile of the reservoir sample (pandas' default method)."""
+		if not self.reservoir:
+			return math.nan
+		values = sorted(self.reservoir)
+		pos = (len(values) - 1) * q
+		lo = math.floor(pos)
+		hi = min(lo + 1, len(values) - 1)
+		return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+	def describe(self) -> Dict[str, float]:
+		"""Return the statistics shown by pandas' DataFrame.describe()."""
+		return {
+			"count": float(self.numeric_count),
+			"mean": self.mean,
+			"std": self.std(),
+			"min": self.min,
+			"25%": self.quantile(0.25),
+			"50%": self.quantile(0.5),
+			"75%": self.quantile(0.75),
+			"max": self.max,
+		}
+
+	def top_values(self, n: int = 5) -> List[tuple]:
+		return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class TableProfiler:
+	"""Accumulates a bounded-memory text summary of a table, row by row or chunk by chunk"""
+
+	def __init__(self, columns: Sequence[Any]):
+		self.columns: List[ColumnProfile] = []
+		self.rows = 0
+		self.sample: List[List[Any]] = []
+		self._ensure_columns(len(columns), columns)
+
+	def _ensure_columns(self, width: int, names: Optional[Sequence[Any]] = None) -> None:
+		for i in range(len(self.columns), width):
+			name = names[i] if names is not None and i < len(names) else None
+			if name is None or (isinstance(name, float) and math.isnan(name)):
+				name = f"Unnamed: {i}"
+			self.columns.append(ColumnProfile(str(name), seed=i))
+
+	def add_row(self, values: Sequence[Any]) -> None:
+		if all(value is None for value in values):
+			return
+		if len(values) > len(self.columns):
+			self._ensure_columns(len(values))
+		self.rows += 1
+		if len(self.sample) < SAMPLE_ROWS:
+			self.sample.append(list(values))
+		for column, value in zip(self.columns, values):
+			column.add(value)
+
+	def add_rows(self, rows: Iterable[Sequence[Any]]) -> None:
+		for values in rows:
+			self.add_row(values)
+
+	def add_frame(self, df: "pd.DataFrame") -> None:
+		"""Fold a DataFrame chunk in using column-wise vectorised updates."""
+		self._ensure_columns(len(df.columns), list(df.columns))
+		self.rows += len(df)
+		if len(self.sample) < SAMPLE_ROWS:
+			self.sample.extend(df.head(SAMPLE_ROWS - len(self.sample)).values.tolist())
+		for column, (_, series) in zip(self.columns, df.items()):
+			series = series.dropna()
+			if series.empty:
+				continue
+			if pd.api.types.is_bool_dtype(series):
+				column.other_count += len(series)
+			elif pd.api.types.is_numeric_dtype(series):
+				column.add_numbers(series.to_numpy(dtype=float))
+			elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+				text = series[series.map(lambda value: isinstance(value, str) and bool(value.strip()))]
+				column.other_count += len(series) - len(text)
+				column.add_counts(text.value_counts().to_dict())
+			else:
+				column.other_count += len(series)
+
+	def format_text(self, title: Optional[str] = None) -> str:
+		"""Render the summary in the same layout as the original DataFrame-based report."""
+		if not pd:
+			raise RuntimeError("pandas is not installed")
+		names = [column.name for column in self.columns]
+		text_parts = []
+		if title:
+			text_parts.append(f"{title}:")
+		text_parts.append(f"Columns: {', '.join(names)}")
+		text_parts.append(f"Rows: {self.rows}")
+		text_parts.append("")
+
+		if self.rows == 0:
+			return "\n".join(text_parts)
+
+		width = len(names)
+		sample = [row[:width] + [None] * (width - len(row)) for row in self.sample]
+		text_parts.append(f"Sample Data (first {SAMPLE_ROWS} rows):")
+		text_parts.append(pd.DataFrame(sample, columns=names).to_string(index=False))
+		text_parts.append("")
+
+		numeric = [column for column in self.columns if column.is_numeric]
+		if numeric:
+			text_parts.append("Numeric Column Statistics:")
+			stats = pd.DataFrame({column.name: column.describe() for column in numeric})
+			text_parts.append(stats.to_string())
+			text_parts.append("")
+
+		categorical = [column for column in self.columns if column.is_categorical]
+		if categorical:
+			text_parts.append("Categorical Column Value Counts (top 5):")
+			for column in categorical[:3]:  # Limit to first 3 categorical columns
+				text_parts.append(f"\n{column.name}:")
+				for value, count in column.top_values(5):
+					text_parts.append(f"  {value}: {count}")
+			text_parts.append("")
+
+		return "\n".join(text_parts)
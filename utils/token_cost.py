@@ -1,4 +1,5 @@
-from typing import Tuple
+from typing import Any, Tuple
+from utils.constants import Constants
 
 # Costs are per 1K tokens (OpenAI pricing)
 _MODEL_COSTS: dict[str, Tuple[float, float]] = {
@@ -15,3 +16,29 @@ def get_token_costs(model_name: str) -> Tuple[float, float]:
 	"""
 	return _MODEL_COSTS.get(model_name, _MODEL_COSTS["gpt-4-turbo"])
 
+
+def _resolve_pricing_model(model_name: str) -> str:
+	"""Map a friendly or dated model name (e.g. "gpt-4o-2024-08-06") to a priced model."""
+	model_id = Constants.OPENAI_LLM_MODELS.get(model_name, model_name)
+	if model_id in _MODEL_COSTS:
+		return model_id
+	matches = [name for name in _MODEL_COSTS if model_id.startswith(name + "-")]
+	return max(matches, key=len) if matches else model_id
+
+
+def calculate_cost(model_name: str, input_tokens: int, output_tokens: int) -> float:
+	"""Return the USD cost of a call priced for the model that actually served it.
+
+	Friendly names are resolved to the model they map to; unknown (negative)
+	token counts count as zero.
+	"""
+	input_cost, output_cost = get_token_costs(_resolve_pricing_model(model_name))
+	return (max(input_tokens, 0) / 1000) * input_cost + (max(output_tokens, 0) / 1000) * output_cost
+
+
+def get_token_usage(message: Any) -> Tuple[int, int]:
+	"""Return (input_tokens, output_tokens) reported on an LLM response message, -1 if unknown."""
+	usage = getattr(message, "usage_metadata", None) or {}
+	input_tokens = usage.get("input_tokens", usage.get("prompt_tokens", -1))
+	output_tokens = usage.get("output_tokens", usage.get("completion_tokens", -1))
+	return input_tokens, output_tokens
@@ -0,0 +1,71 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import List, Optional
+
+try:
+	import tiktoken
+except Exception:
+	tiktoken = None
+
+from utils.constants import Constants
+
+# Rough characters-per-token ratio for English text, used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model_name: Optional[str]):
+	if not tiktoken:
+		return None
+	model_id = Constants.OPENAI_LLM_MODELS.get(model_name, model_name) if model_name else "gpt-4o"
+	try:
+		return tiktoken.encoding_for_model(model_id)
+	except Exception:
+		try:
+			return tiktoken.get_encoding("o200k_base")
+		except Exception:
+			# Encoding files could not be loaded (e.g. offline); fall back to estimates
+			return None
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+	"""Return the number of tokens in text for the given model.
+
+	Uses tiktoken when available and falls back to a character-based estimate.
+	"""
+	if not text:
+		return 0
+	encoding = _get_encoding(model_name)
+	if encoding is None:
+		return -(-len(text) // CHARS_PER_TOKEN)
+	return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_into_chunks(text: str, max_tokens: int, model_name: Optional[str] = None) -> List[str]:
+	"""Split text into chunks of at most max_tokens, breaking at line boundaries where possible."""
+	chunks: List[str] = []
+	current: List[str] = []
+	current_tokens = 0
+
+	def flush():
+		nonlocal current, current_tokens
+		if current:
+			chunks.append("\n".join(current))
+		current = []
+		current_tokens = 0
+
+	for line in text.split("\n"):
+		line_tokens = count_tokens(line, model_name) + 1
+		if line_tokens > max_tokens:
+			# A single oversized line (e.g. a flattened table): cut it by characters
+			flush()
+			step = max(1, len(line) * max_tokens // line_tokens)
+			for start in range(0, len(line), step):
+				chunks.append(line[start:start + step])
+			continue
+		if current_tokens + line_tokens > max_tokens:
+			flush()
+		current.append(line)
+		current_tokens += line_tokens
+	flush()
+	return [chunk for chunk in chunks if chunk.strip()]
@@ -0,0 +1,213 @@
+from __future__ import annotations
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import json
+import os
+import secrets
+import threading
+import time
+
+from config.settings import TRACING_ENABLED, TRACE_BUFFER_SIZE, TRACE_EXPORT_PATH
+
+# Spans buffered before the exporter writes even without a finished root span
+_EXPORT_BATCH_SIZE = 512
+
+
+@dataclass
+class Span:
+	"""One timed operation; spans sharing a trace_id form a tree through parent_id"""
+	name: str
+	trace_id: str
+	span_id: str
+	parent_id: Optional[str] = None
+	start_ns: int = 0
+	end_ns: int = 0
+	attributes: Dict[str, Any] = field(default_factory=dict)
+	error: Optional[str] = None
+	# Started with no enclosing span in this context (a job, a render); ends a unit of export
+	local_root: bool = False
+
+	@property
+	def duration_seconds(self) -> float:
+		return max(self.end_ns - self.start_ns, 0) / 1e9
+
+	def set(self, **attributes: Any) -> None:
+		self.attributes.update(attributes)
+
+
+class SpanBuffer:
+	"""Thread-safe ring buffer of the most recent finished spans"""
+
+	def __init__(self, max_spans: int):
+		self._spans: deque = deque(maxlen=max_spans)
+		self._lock = threading.Lock()
+
+	def add(self, span: Span) -> None:
+		with self._lock:
+			self._spans.append(span)
+
+	def spans(self, trace_id: Optional[str] = None) -> List[Span]:
+		with self._lock:
+			spans = list(self._spans)
+		if trace_id is None:
+			return spans
+		return [span for span in spans if span.trace_id == trace_id]
+
+	def clear(self) -> None:
+		with self._lock:
+			self._spans.clear()
+
+
+class OtlpFileExporter:
+	"""Append spans to a file as OTLP/JSON ExportTraceServiceRequest lines.
+
+	The format is what the OpenTelemetry Collector's file exporter writes and
+	its otlpjsonfile receiver reads. Spans are written in batches whenever a
+	local root span finishes.
+	"""
+
+	def __init__(self, path: str, service_name: str = "aura-researcher-agent"):
+		self.path = path
+		self.service_name = service_name
+		self._pending: List[Span] = []
+		self._lock = threading.Lock()
+		os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+	def export(self, span: Span) -> None:
+		with self._lock:
+			self._pending.append(span)
+			if not span.local_root and len(self._pending) < _EXPORT_BATCH_SIZE:
+				return
+			batch, self._pending = self._pending, []
+			line = json.dumps(self._request(batch))
+			with open(self.path, "a", encoding="utf-8") as f:
+				f.write(line + "\n")
+
+	def _request(self, spans: List[Span]) -> dict:
+		return {"resourceSpans": [{
+			"resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+			"scopeSpans": [{
+				"scope": {"name": __name__},
+				"spans": [self._span(span) for span in spans],
+			}],
+		}]}
+
+	@staticmethod
+	def _span(span: Span) -> dict:
+		data = {
+			"traceId": span.trace_id,
+			"spanId": span.span_id,
+			"name": span.name,
+			"kind": 1,  # SPAN_KIND_INTERNAL
+			"startTimeUnixNano": str(span.start_ns),
+			"endTimeUnixNano": str(span.end_ns),
+			"attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+			"status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+		}
+		if span.parent_id:
+			data["parentSpanId"] = span.parent_id
+		return data
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+	if isinstance(value, bool):
+		return {"key": key, "value": {"boolValue": value}}
+	if isinstance(value, int):
+		return {"key": key, "value": {"intValue": str(value)}}
+	if isinstance(value, float):
+		return {"key": key, "value": {"doubleValue": value}}
+	return {"key": key, "value": {"stringValue": str(value)}}
+
+
+_buffer = SpanBuffer(TRACE_BUFFER_SIZE)
+_exporter: Optional[OtlpFileExporter] = OtlpFileExporter(TRACE_EXPORT_PATH) if TRACE_EXPORT_PATH else None
+_current: ContextVar[Optional[Span]] = ContextVar("aura_current_span", default=None)
+# Set while capture_spans() is collecting spans to hand back to another process
+_collector: ContextVar[Optional[List[Span]]] = ContextVar("aura_span_collector", default=None)
+
+
+def get_span_buffer() -> SpanBuffer:
+	return _buffer
+
+
+def current_span() -> Optional[Span]:
+	return _current.get()
+
+
+@contextmanager
+def span(name: str, parent: Optional[Span] = None, root: bool = False, **attributes: Any) -> Iterator[Span]:
+	"""Time the enclosed block as a span, nested under the current span.
+
+	`parent` attaches the span to a span from another context (e.g. a render
+	after its background job finished); `root=True` starts a new trace.
+	Exceptions mark the span as failed and propagate.
+	"""
+	enclosing = _current.get()
+	parent = None if root else (parent or enclosing)
+	current = Span(
+		name=name,
+		trace_id=parent.trace_id if parent else secrets.token_hex(16),
+		span_id=secrets.token_hex(8),
+		parent_id=parent.span_id if parent else None,
+		start_ns=time.time_ns(),
+		attributes=attributes,
+		local_root=root or enclosing is None,
+	)
+	token = _current.set(current)
+	try:
+		yield current
+	except BaseException as e:
+		current.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+		raise
+	finally:
+		current.end_ns = time.time_ns()
+		try:
+			_current.reset(token)
+		except ValueError:
+			# Closed from another context, e.g. an abandoned async generator
+			pass
+		_record(current)
+
+
+def _record(finished: Span) -> None:
+	if not TRACING_ENABLED:
+		return
+	collector = _collector.get()
+	if collector is not None:
+		collector.append(finished)
+		return
+	_buffer.add(finished)
+	if _exporter is not None:
+		_exporter.export(finished)
+
+
+@contextmanager
+def capture_spans() -> Iterator[List[Span]]:
+	"""Collect the spans finished inside the block instead of recording them.
+
+	Used in worker processes, whose spans are returned with the result and
+	recorded in the parent with adopt().
+	"""
+	spans: List[Span] = []
+	token = _collector.set(spans)
+	try:
+		yield spans
+	finally:
+		_collector.reset(token)
+
+
+def adopt(spans: Iterable[Span]) -> None:
+	"""Record spans captured elsewhere as part of the current trace, under the current span."""
+	parent = _current.get()
+	spans = list(spans)
+	ids = {span.span_id for span in spans}
+	for captured in spans:
+		if parent is not None:
+			captured.trace_id = parent.trace_id
+			if captured.parent_id not in ids:
+				captured.parent_id = parent.span_id
+		captured.local_root = False
+		_record(captured)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Union
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from config.settings import UPLOAD_SPOOL_DIR, UPLOAD_SPOOL_MAX_AGE_SECONDS
+
+# Block size for copying uploads to disk and hashing mapped files
+SPOOL_BLOCK_SIZE = 1024 * 1024
+_SWEEP_INTERVAL_SECONDS = 10 * 60
+
+
+@dataclass(frozen=True)
+class SpooledFile:
+	"""A file on disk handed to extraction by path.
+
+	Cheap to pickle, so ingest workers receive the path rather than the bytes,
+	and each reader opens or maps the file itself.
+	"""
+	path: str
+	size: int
+	temporary: bool = False  # a spooled upload, deleted by release()
+
+	@classmethod
+	def from_path(cls, path: str) -> "SpooledFile":
+		return cls(path, os.path.getsize(path))
+
+	def release(self) -> None:
+		if self.temporary:
+			try:
+				os.remove(self.path)
+			except OSError:
+				pass
+
+
+# What the extractors accept: bytes already in memory, or a file on disk
+FileData = Union[bytes, SpooledFile]
+
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+
+def spool_upload(stream: BinaryIO, spool_dir: str = UPLOAD_SPOOL_DIR) -> SpooledFile:
+	"""Copy an uploaded file (e.g. a Streamlit UploadedFile) to a temporary file, block by block."""
+	os.makedirs(spool_dir, exist_ok=True)
+	_sweep(spool_dir)
+	stream.seek(0)
+	fd, path = tempfile.mkstemp(prefix="upload-", dir=spool_dir)
+	try:
+		with os.fdopen(fd, "wb") as fh:
+			shutil.copyfileobj(stream, fh, SPOOL_BLOCK_SIZE)
+	except BaseException:
+		os.remove(path)
+		raise
+	return SpooledFile(path, os.path.getsize(path), temporary=True)
+
+
+def data_size(data: FileData) -> int:
+	return data.size if isinstance(data, SpooledFile) else len(data)
+
+
+def open_reader(data: FileData) -> BinaryIO:
+	"""A seekable binary file object over the data; the caller closes it."""
+	if isinstance(data, SpooledFile):
+		return open(data.path, "rb")
+	return io.BytesIO(data)
+
+
+@contextmanager
+def mapped(data: FileData) -> Iterator[Union[bytes, mmap.mmap]]:
+	"""The data as a read-only buffer: bytes as they are, a file memory-mapped without reading it in."""
+	if not isinstance(data, SpooledFile):
+		yield data
+		return
+	with open(data.path, "rb") as fh:
+		if os.fstat(fh.fileno()).st_size == 0:
+			# Empty files cannot be mapped
+			yield b""
+			return
+		with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+			yield buffer
+
+
+def _sweep(spool_dir: str) -> None:
+	"""Remove spooled uploads left behind (e.g. by a job that never ran), at most every few minutes."""
+	global _last_sweep
+	now = time.time()
+	with _sweep_lock:
+		if now - _last_sweep < _SWEEP_INTERVAL_SECONDS:
+			return
+		_last_sweep = now
+	cutoff = now - UPLOAD_SPOOL_MAX_AGE_SECONDS
+	for entry in os.scandir(spool_dir):
+		try:
+			if entry.is_file() and entry.stat().st_mtime < cutoff:
+				os.remove(entry.path)
+		except OSError:
+			pass